@@ -66,6 +66,20 @@ while true; do
     echo "❌ Micro Simulator: Inactivo"
   fi
   
+  # Throughput real de los simuladores (endpoint /metrics en formato Prometheus)
+  echo "🔍 Métricas de simuladores:"
+  for sim in web-simulator db-simulator micro-simulator; do
+    if metrics=$(curl -s --max-time 5 http://$sim:9464/metrics 2>/dev/null); then
+      generated=$(echo "$metrics" | grep '^sim_events_generated_total' | awk '{s+=$2} END {print s+0}')
+      sent=$(echo "$metrics" | grep '^sim_events_sent_total' | awk '{s+=$2} END {print s+0}')
+      dropped=$(echo "$metrics" | grep '^sim_events_dropped_total' | awk '{s+=$2} END {print s+0}')
+      errors=$(echo "$metrics" | grep '^sim_send_errors_total' | awk '{s+=$2} END {print s+0}')
+      echo "📈 $sim: generados $generated, enviados $sent, descartados $dropped, errores de envío $errors"
+    else
+      echo "⚠️  $sim: métricas no disponibles"
+    fi
+  done
+  
   echo "================================="
   echo "⏰ Próxima verificación en 5 minutos..."
   echo "================================="
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark de ratio y CPU de compresión sobre eventos reales de los simuladores
+Genera con semilla un lote de cada familia y lo comprime como lo hacen las
+salidas: en bloques independientes del tamaño de un lote HTTP
+(--output logstash-http, BlockCompressor) y en un frame de archivo vaciado
+cada buffer de escritura (--file-codec, FrameCompressor). Por cada códec y
+nivel reporta el ratio y el CPU por evento del hilo que comprime, para
+elegir según lo que sobre en la máquina generadora: ancho de banda o CPU.
+zstd se mide solo si el paquete zstandard está instalado
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from colorama import init, Fore, Style
+
+# Módulos compartidos (data/simuladores/common, montado en /app/common)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.compression import BlockCompressor, FrameCompressor, zstandard
+from common.loader import FAMILIES, load_simulator_class
+
+# Inicializar colorama para output colorizado
+init()
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+DEFAULT_CODECS = "gzip-1,gzip-6,gzip-9,zstd-1,zstd-3,zstd-9"
+
+
+def chunks(payload, size):
+    """Divide las líneas de payload en bloques de hasta size bytes: [(bytes, eventos)]"""
+    blocks = []
+    current = []
+    current_bytes = 0
+    for line in payload.splitlines(keepends=True):
+        current.append(line)
+        current_bytes += len(line)
+        if current_bytes >= size:
+            blocks.append((b''.join(current), len(current)))
+            current = []
+            current_bytes = 0
+    if current:
+        blocks.append((b''.join(current), len(current)))
+    return blocks
+
+
+def compress_blocks(codec, level, blocks):
+    """Estadísticas de comprimir cada bloque por separado (un cuerpo HTTP por bloque)"""
+    compressor = BlockCompressor(codec, level)
+    for data, events in blocks:
+        compressor.compress(data, events)
+    return compressor.stats.snapshot()
+
+
+def compress_frame(codec, level, blocks):
+    """Estadísticas de comprimir los bloques como un frame de archivo con un flush por bloque"""
+    frame = FrameCompressor(codec, level)
+    for data, events in blocks:
+        frame.compress(data, events)
+    frame.finish()
+    return frame.stats.snapshot()
+
+
+def bench_family(family, codecs, count, repeat, seed, http_kb, file_kb):
+    """Filas de ratio y CPU por evento de cada códec y salida para una familia"""
+    simulator = load_simulator_class(family)(tcp_host="127.0.0.1", seed=seed, outputs=False)
+    payload = getattr(simulator, FAMILIES[family]["columns"])(count).to_bytes()
+
+    outputs = [
+        ("http", compress_blocks, chunks(payload, http_kb * 1024)),
+        ("archivo", compress_frame, chunks(payload, file_kb * 1024))
+    ]
+    rows = []
+    for codec, level in codecs:
+        for output, compress, blocks in outputs:
+            # El ratio no cambia entre repeticiones; el CPU se toma de la más rápida
+            runs = [compress(codec, level, blocks) for _ in range(repeat)]
+            best = min(runs, key=lambda run: run["cpu_us_per_event"])
+            rows.append({
+                "family": family,
+                "codec": codec,
+                "level": level,
+                "output": output,
+                "raw_bytes_per_event": best["raw_bytes"] / count,
+                "compressed_bytes_per_event": best["compressed_bytes"] / count,
+                "ratio": best["ratio"],
+                "cpu_ns_per_event": best["cpu_us_per_event"] * 1000
+            })
+    return rows
+
+
+def parse_codecs(text, parser):
+    """[(códec, nivel)] a partir de "gzip-1,zstd-3"; descarta zstd si falta el paquete"""
+    codecs = []
+    for item in (part.strip() for part in text.split(",")):
+        if not item:
+            continue
+        codec, _, level = item.partition("-")
+        if codec not in ("gzip", "zstd") or not level.isdigit():
+            parser.error(f"códec inválido: {item} (formato códec-nivel, p. ej. gzip-6)")
+        if codec == "zstd" and zstandard is None:
+            logging.warning(f"{Fore.YELLOW}{item} omitido: falta el paquete zstandard{Style.RESET_ALL}")
+            continue
+        codecs.append((codec, int(level)))
+    return codecs
+
+
+def parse_args():
+    """Parsea las opciones del benchmark"""
+    parser = argparse.ArgumentParser(description="Ratio y CPU de compresión de los eventos de cada familia")
+    parser.add_argument(
+        "--families", default=",".join(FAMILIES),
+        help="Familias a medir separadas por comas (web,db,micro)"
+    )
+    parser.add_argument("--codecs", default=DEFAULT_CODECS, help="Códecs y niveles separados por comas")
+    parser.add_argument("--count", type=int, default=20000, help="Eventos por familia")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por caso (se toma el menor CPU)")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla de los eventos generados")
+    parser.add_argument("--http-batch-kb", type=int, default=1024, help="KB por lote HTTP (como --http-batch-kb)")
+    parser.add_argument("--file-buffer-kb", type=int, default=256, help="KB por vaciado del archivo")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+    families = [family.strip() for family in args.families.split(",") if family.strip()]
+    unknown = [family for family in families if family not in FAMILIES]
+    if unknown:
+        parser.error(f"familias desconocidas: {', '.join(unknown)}")
+    if min(args.count, args.repeat, args.http_batch_kb, args.file_buffer_kb) <= 0:
+        parser.error("--count, --repeat, --http-batch-kb y --file-buffer-kb deben ser positivos")
+    args.families = families
+    args.codecs = parse_codecs(args.codecs, parser)
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = []
+    for family in args.families:
+        for row in bench_family(family, args.codecs, args.count, args.repeat, args.seed,
+                                args.http_batch_kb, args.file_buffer_kb):
+            logging.info(
+                f"{Fore.CYAN}{family:6}{Style.RESET_ALL} {row['codec']}-{row['level']:<2} {row['output']:8} "
+                f"{row['raw_bytes_per_event']:>6,.0f} -> {row['compressed_bytes_per_event']:>5,.1f} B/ev "
+                f"(x{row['ratio']:.1f})  CPU {row['cpu_ns_per_event']:>7,.0f} ns/ev"
+            )
+            results.append(row)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"count": args.count, "repeat": args.repeat, "seed": args.seed, "results": results}, f, indent=2)
+        logging.info(f"Resultados guardados en {args.output}")
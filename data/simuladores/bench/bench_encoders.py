@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de serialización sobre eventos reales de los simuladores
+Genera con semilla un lote de cada familia y mide, con los mismos eventos:
+json.dumps por dict (el camino original, que además serializaba dos veces
+por evento: una para Logstash y otra para el archivo), los codificadores de
+common.encoders (una sola serialización compartida por los destinos) y la
+serialización en columnas del lote (EventBatch.to_bytes)
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from colorama import init, Fore, Style
+
+# Módulos compartidos (data/simuladores/common, montado en /app/common)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.encoders import OrjsonEncoder, StdlibEncoder, orjson
+from common.loader import FAMILIES, load_simulator_class
+
+# Inicializar colorama para output colorizado
+init()
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def best_time(fn, repeat):
+    """Menor tiempo de repeat ejecuciones de fn (menos sensible al ruido de la máquina)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def json_cases(records, batch):
+    """Variantes de serialización de eventos JSON (db y micro)"""
+    def dumps_twice():
+        for record in records:
+            (json.dumps(record) + '\n').encode('utf-8')
+            (json.dumps(record) + '\n').encode('utf-8')
+
+    def dumps_once():
+        for record in records:
+            (json.dumps(record) + '\n').encode('utf-8')
+
+    cases = [("json.dumps x2 (antes)", dumps_twice), ("json.dumps", dumps_once)]
+    encoders = [StdlibEncoder()] + ([OrjsonEncoder()] if orjson is not None else [])
+    for encoder in encoders:
+        line = encoder.line
+        cases.append((f"encoder {encoder.name}", lambda line=line: [line(record) for record in records]))
+    cases.append(("columnas to_bytes", batch.to_bytes))
+    return cases
+
+
+def text_cases(lines, batch):
+    """Variantes de codificación de líneas de texto (web); las líneas ya llegan formateadas"""
+    def encode_twice():
+        for line in lines:
+            (line + '\n').encode('utf-8')
+            (line + '\n').encode('utf-8')
+
+    return [
+        ("línea x2 (antes)", encode_twice),
+        ("línea", lambda: [(line + '\n').encode('utf-8') for line in lines]),
+        ("columnas formato+bytes", batch.to_bytes)
+    ]
+
+
+def bench_family(family, count, repeat, seed):
+    """Mide las variantes de serialización de una familia y devuelve las filas del reporte"""
+    simulator = load_simulator_class(family)(tcp_host="127.0.0.1", seed=seed, outputs=False)
+    batch = getattr(simulator, FAMILIES[family]["columns"])(count)
+    records = batch.records()
+    size = len(batch.to_bytes())
+    cases = json_cases(records, batch) if batch.schema.json_mode else text_cases(records, batch)
+
+    rows = []
+    for name, fn in cases:
+        seconds = best_time(fn, repeat)
+        rows.append({
+            "family": family,
+            "case": name,
+            "events_per_sec": count / seconds,
+            "ns_per_event": seconds * 1e9 / count,
+            "mb_per_sec": size / seconds / (1024 * 1024)
+        })
+    return rows
+
+
+def parse_args():
+    """Parsea las opciones del benchmark"""
+    parser = argparse.ArgumentParser(description="Micro-benchmark de serialización de eventos")
+    parser.add_argument(
+        "--families", default=",".join(FAMILIES),
+        help="Familias a medir separadas por comas (web,db,micro)"
+    )
+    parser.add_argument("--count", type=int, default=20000, help="Eventos por familia")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por variante (se toma la mejor)")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla de los eventos generados")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+    families = [family.strip() for family in args.families.split(",") if family.strip()]
+    unknown = [family for family in families if family not in FAMILIES]
+    if unknown:
+        parser.error(f"familias desconocidas: {', '.join(unknown)}")
+    args.families = families
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if orjson is None:
+        logging.info(f"{Fore.YELLOW}orjson no está instalado: se mide solo el json estándar{Style.RESET_ALL}")
+
+    results = []
+    for family in args.families:
+        rows = bench_family(family, args.count, args.repeat, args.seed)
+        baseline = rows[0]["ns_per_event"]
+        for row in rows:
+            logging.info(
+                f"{Fore.CYAN}{family:5}{Style.RESET_ALL} {row['case']:24} "
+                f"{row['events_per_sec']:>12,.0f} ev/s {row['ns_per_event']:>9,.0f} ns/ev "
+                f"{row['mb_per_sec']:>8,.1f} MB/s  x{baseline / row['ns_per_event']:.1f}"
+            )
+        results.extend(rows)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"count": args.count, "seed": args.seed, "results": results}, f, indent=2)
+        logging.info(f"Resultados guardados en {args.output}")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark del coste de parseo en Logstash de cada formato de salida de web
+Genera con semilla el mismo lote de eventos en cada formato de --web-format
+(raw, json, nginx, structured), mide su serialización y lo entrega con
+LogstashSender a un receptor local de common.standin que hace lo mismo que
+el input tcp json_lines y el filtro de web de logstash.conf: decodifica el
+JSON (las líneas no JSON quedan en message con _jsonparsefailure) y aplica
+la expresión de %{COMBINEDAPACHELOG} a message salvo que el evento ya traiga
+response. El CPU del receptor por evento aproxima el coste relativo de cada
+formato en el pipeline (no el absoluto: Logstash corre en la JVM)
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from colorama import init, Fore, Style
+
+# Módulos compartidos (data/simuladores/common, montado en /app/common)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.linetemplate import WEB_FORMATS
+from common.loader import load_simulator_class
+from common.sender import LogstashSender
+from common.standin import LogstashStandin
+
+# Inicializar colorama para output colorizado
+init()
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Eventos por envío (como un lote de run_paced)
+DELIVERY_BATCH = 1000
+
+
+def best_time(fn, repeat):
+    """Menor tiempo de repeat ejecuciones de fn (menos sensible al ruido de la máquina)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_format(fmt, count, repeat, seed):
+    """Serialización, tamaño y parseo en el receptor local de count eventos en un formato"""
+    simulator = load_simulator_class("web")(tcp_host="127.0.0.1", seed=seed, web_format=fmt, outputs=False)
+    batch = simulator.build_server_columns(count)
+    payload = batch.to_bytes()
+    serialize = best_time(batch.to_bytes, repeat)
+
+    lines = payload.splitlines(keepends=True)
+    payloads = [
+        (b''.join(lines[i:i + DELIVERY_BATCH]), len(lines[i:i + DELIVERY_BATCH]))
+        for i in range(0, len(lines), DELIVERY_BATCH)
+    ]
+    # Un receptor por formato: los contadores y el CPU de parseo son solo de este formato
+    standin = LogstashStandin([0], host="127.0.0.1", grok_ports=[0])
+    stream = next(iter(standin.streams.values()))
+    try:
+        for _ in range(repeat):
+            start_bytes = stream.bytes
+            sender = LogstashSender("127.0.0.1", stream.port)
+            for chunk, events in payloads:
+                sender.send_bytes(chunk, events)
+            sender.close()
+            if not stream.wait_for_bytes(start_bytes + len(payload)):
+                raise RuntimeError(f"el receptor local recibió {stream.bytes - start_bytes} de {len(payload)} bytes")
+        # Bytes y eventos se registran juntos: con todos los bytes ya están contados todos los eventos
+        received = stream.snapshot()
+    finally:
+        standin.close()
+
+    events = received["events"]
+    return {
+        "format": fmt,
+        "events": events,
+        "bytes_per_event": len(payload) / count,
+        "serialize_ns_per_event": serialize * 1e9 / count,
+        "parse_us_per_event": received["parse_us_per_event"],
+        "json_failures": received["invalid"],
+        "grok_failures": received["grok_failures"],
+        "grok_skipped": fmt == "structured"
+    }
+
+
+def parse_args():
+    """Parsea las opciones del benchmark"""
+    parser = argparse.ArgumentParser(description="Coste de parseo en Logstash de los formatos de salida de web")
+    parser.add_argument(
+        "--formats", default=",".join(WEB_FORMATS),
+        help="Formatos a medir separados por comas (raw,json,nginx,structured)"
+    )
+    parser.add_argument("--count", type=int, default=20000, help="Eventos por formato")
+    parser.add_argument("--repeat", type=int, default=3, help="Entregas por formato (el parseo se promedia)")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla de los eventos generados")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+    formats = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in WEB_FORMATS]
+    if unknown:
+        parser.error(f"formatos desconocidos: {', '.join(unknown)}")
+    if args.count <= 0 or args.repeat <= 0:
+        parser.error("--count y --repeat deben ser positivos")
+    args.formats = formats
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = []
+    for fmt in args.formats:
+        row = bench_format(fmt, args.count, args.repeat, args.seed)
+        baseline = results[0]["parse_us_per_event"] if results else row["parse_us_per_event"]
+        logging.info(
+            f"{Fore.CYAN}{fmt:10}{Style.RESET_ALL} {row['bytes_per_event']:>7,.1f} B/ev "
+            f"serializar {row['serialize_ns_per_event']:>7,.0f} ns/ev  "
+            f"parseo {row['parse_us_per_event']:>6,.2f} µs/ev (x{baseline / max(row['parse_us_per_event'], 1e-9):.1f})  "
+            f"no JSON: {row['json_failures']}, sin match de grok: {row['grok_failures']}"
+            f"{' (sin grok)' if row['grok_skipped'] else ''}"
+        )
+        results.append(row)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"count": args.count, "repeat": args.repeat, "seed": args.seed, "results": results}, f, indent=2)
+        logging.info(f"Resultados guardados en {args.output}")
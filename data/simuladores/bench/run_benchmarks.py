@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks de generación y entrega de los simuladores
+Para cada familia mide, con eventos generados con semilla:
+  <familia>.generate   generador por evento (generate_web_log,
+                       generate_mysql_log/generate_postgresql_log,
+                       generate_microservice_log)
+  <familia>.columns    generación de un lote en columnas
+  <familia>.serialize  serialización del lote a NDJSON / líneas (bytes/s)
+  <familia>.encode     serialización evento a evento con el codificador elegido
+  <familia>.deliver    entrega con LogstashSender al receptor local de
+                       common.standin, que lee json_lines como el input tcp
+                       de Logstash (bytes/s)
+Los resultados se guardan en JSON y se comparan contra una línea base: si
+algún caso es más lento que la base por encima del umbral, termina con error
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from colorama import init, Fore, Style
+
+# Módulos compartidos (data/simuladores/common, montado en /app/common)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.encoders import ENCODERS
+from common.entities import parse_cardinality
+from common.loader import FAMILIES, load_simulator_class
+from common.sender import LogstashSender
+from common.standin import LogstashStandin
+
+# Inicializar colorama para output colorizado
+init()
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Eventos por envío en el caso deliver (como un lote de run_paced)
+DELIVERY_BATCH = 1000
+
+
+def best_time(fn, repeat):
+    """Menor tiempo de repeat ejecuciones de fn (menos sensible al ruido de la máquina)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def event_generator(family, simulator):
+    """Función que genera un evento con el generador por evento de la familia"""
+    if family == "web":
+        return simulator.generate_web_log
+    if family == "db":
+        db_id = simulator.fleet_ids[0]
+        return lambda: simulator.build_db_log(
+            db_id, simulator.rng.choice(simulator.db_types), simulator.generate_log_level()
+        )
+    return lambda: simulator.generate_microservice_log(simulator.rng.choice(simulator.services))
+
+
+def deliver(stream, payloads, total_bytes):
+    """Envía los lotes con un LogstashSender nuevo y espera a que el receptor local los reciba"""
+    start_bytes = stream.bytes
+    sender = LogstashSender("127.0.0.1", stream.port)
+    for payload, count in payloads:
+        sender.send_bytes(payload, count)
+    sender.close()
+    if not stream.wait_for_bytes(start_bytes + total_bytes):
+        raise RuntimeError(f"el receptor local recibió {stream.bytes - start_bytes} de {total_bytes} bytes")
+
+
+def bench_family(family, count, repeat, seed, encoder, stream, entity_options=None):
+    """Casos de una familia: {nombre: (segundos, bytes procesados o 0)}"""
+    simulator = load_simulator_class(family)(
+        tcp_host="127.0.0.1", seed=seed, encoder=encoder, entity_options=entity_options, outputs=False
+    )
+    build_columns = getattr(simulator, FAMILIES[family]["columns"])
+    generate = event_generator(family, simulator)
+
+    batch = build_columns(count)
+    payload = batch.to_bytes()
+    records = batch.records()
+    encode_line = simulator.encode_line
+    lines = payload.splitlines(keepends=True)
+    payloads = [
+        (b''.join(lines[i:i + DELIVERY_BATCH]), len(lines[i:i + DELIVERY_BATCH]))
+        for i in range(0, len(lines), DELIVERY_BATCH)
+    ]
+
+    cases = {
+        "generate": (best_time(lambda: [generate() for _ in range(count)], repeat), 0),
+        "columns": (best_time(lambda: build_columns(count), repeat), 0),
+        "serialize": (best_time(batch.to_bytes, repeat), len(payload)),
+        "encode": (best_time(lambda: [encode_line(record) for record in records], repeat), len(payload)),
+        "deliver": (best_time(lambda: deliver(stream, payloads, len(payload)), repeat), len(payload))
+    }
+    return cases
+
+
+def case_result(count, seconds, size):
+    """Métricas de un caso a partir de su mejor tiempo"""
+    result = {
+        "events": count,
+        "seconds": seconds,
+        "events_per_sec": count / seconds,
+        "ns_per_event": seconds * 1e9 / count
+    }
+    if size:
+        result["bytes_per_sec"] = size / seconds
+    return result
+
+
+def compare(results, baseline, threshold):
+    """Casos más lentos que la base por encima del umbral: [(caso, ns base, ns actual, factor)]"""
+    regressions = []
+    for name, current in results["cases"].items():
+        base = baseline.get("cases", {}).get(name)
+        if base is None:
+            logging.info(f"{name}: sin valor en la línea base, no se compara")
+            continue
+        ratio = current["ns_per_event"] / base["ns_per_event"]
+        color = Fore.RED if ratio > 1 + threshold else Fore.GREEN
+        logging.info(
+            f"{color}{name:16}{Style.RESET_ALL} base {base['ns_per_event']:>9,.0f} ns/ev, "
+            f"actual {current['ns_per_event']:>9,.0f} ns/ev ({(ratio - 1) * 100:+.1f}%)"
+        )
+        if ratio > 1 + threshold:
+            regressions.append((name, base["ns_per_event"], current["ns_per_event"], ratio))
+    return regressions
+
+
+def parse_args():
+    """Parsea las opciones de la suite"""
+    parser = argparse.ArgumentParser(description="Benchmarks de generación y entrega de los simuladores")
+    parser.add_argument(
+        "--families", default=",".join(FAMILIES),
+        help="Familias a medir separadas por comas (web,db,micro)"
+    )
+    parser.add_argument("--count", type=int, default=20000, help="Eventos por caso")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por caso (se toma la mejor)")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla de los eventos generados")
+    parser.add_argument(
+        "--encoder", choices=ENCODERS, default=os.environ.get("SIM_ENCODER", "auto"),
+        help="Codificador JSON del caso encode"
+    )
+    parser.add_argument(
+        "--sink-parse", action="store_true",
+        help="Parsear cada línea JSON en el receptor local, como hace el codec json_lines"
+    )
+    parser.add_argument(
+        "--cardinality",
+        help="Pools de entidades de db/micro ('default' o 'users=1000000,...'), como en los simuladores"
+    )
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados (sirve como línea base)")
+    parser.add_argument("--baseline", help="Resultados guardados contra los que comparar")
+    parser.add_argument(
+        "--threshold", type=float, default=float(os.environ.get("SIM_BENCH_THRESHOLD", 0.2)),
+        help="Lentitud máxima admitida respecto a la base (0.2 = 20%% más ns/evento)"
+    )
+    args = parser.parse_args()
+    families = [family.strip() for family in args.families.split(",") if family.strip()]
+    unknown = [family for family in families if family not in FAMILIES]
+    if unknown:
+        parser.error(f"familias desconocidas: {', '.join(unknown)}")
+    if args.count <= 0 or args.repeat <= 0:
+        parser.error("--count y --repeat deben ser positivos")
+    args.entity_options = None
+    if args.cardinality:
+        try:
+            args.entity_options = {"sizes": parse_cardinality(args.cardinality), "seed": args.seed}
+        except ValueError as e:
+            parser.error(f"--cardinality: {e}")
+    args.families = families
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "count": args.count,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "encoder": args.encoder,
+            "cardinality": args.cardinality
+        },
+        "cases": {}
+    }
+
+    for family in args.families:
+        # Un receptor por familia, como los puertos 5000/5001/5002 de Logstash
+        standin = LogstashStandin([0], host="127.0.0.1", parse=args.sink_parse)
+        stream = next(iter(standin.streams.values()))
+        for case, (seconds, size) in bench_family(
+                family, args.count, args.repeat, args.seed, args.encoder, stream, args.entity_options).items():
+            name = f"{family}.{case}"
+            result = case_result(args.count, seconds, size)
+            results["cases"][name] = result
+            throughput = f" {result['bytes_per_sec'] / (1024 * 1024):>8,.1f} MB/s" if size else ""
+            logging.info(
+                f"{Fore.CYAN}{name:16}{Style.RESET_ALL} {result['events_per_sec']:>12,.0f} ev/s "
+                f"{result['ns_per_event']:>9,.0f} ns/ev{throughput}"
+            )
+        standin.close()
+        if stream.invalid:
+            # Logstash no las descarta: quedan en message con el tag _jsonparsefailure (esperado en web)
+            results["cases"][f"{family}.deliver"]["non_json_lines"] = stream.invalid
+            logging.info(f"{family}: {stream.invalid} líneas recibidas no son JSON (irían con _jsonparsefailure)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        logging.info(f"Resultados guardados en {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            for name, base_ns, current_ns, ratio in regressions:
+                logging.error(
+                    f"{Fore.RED}Regresión en {name}: {base_ns:,.0f} -> {current_ns:,.0f} ns/evento "
+                    f"(x{ratio:.2f}, umbral {1 + args.threshold:.2f}){Style.RESET_ALL}"
+                )
+            sys.exit(1)
+        logging.info(f"{Fore.GREEN}Sin regresiones por encima del {args.threshold * 100:.0f}%{Style.RESET_ALL}")
@@ -0,0 +1,4 @@
+"""
+Componentes compartidos por los simuladores de logs del stack ELK
+(web-servers, databases y microservices)
+"""
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Runner asyncio que ejecuta los tres simuladores (web, db, micro) como tareas
+concurrentes en un solo proceso
+Cada familia tiene su propio limitador de tasa y su propia conexión no
+bloqueante hacia su puerto de Logstash. Si el buffer del socket se llena la
+generación se pausa (backpressure) en lugar de descartar eventos, y al
+detenerse se vacían los lotes en vuelo antes de cerrar. Con Logstash caído
+o sin leer, la reconexión y cada escritura quedan acotadas por la señal de
+parada y por send_timeout, así que el runner termina igual
+"""
+
+import asyncio
+import logging
+import signal
+import time
+
+from common.loader import FAMILIES
+from common.metrics import REGISTRY, metrics_summary, sender_metrics
+from common.pacing import ConstantProfile, RatePacer
+
+LABELS = {"web": "Web", "db": "DB", "micro": "Micro"}
+
+
+class AsyncStreamSender:
+    """Conexión asyncio persistente hacia un input tcp de Logstash con backpressure"""
+
+    def __init__(self, host, port, high_water=1024 * 1024, connect_timeout=3.0, send_timeout=10.0,
+                 backoff_initial=0.5, backoff_max=30.0, stop=None):
+        self.host = host
+        self.port = port
+        self.high_water = high_water
+        self.connect_timeout = connect_timeout
+        # Máximo de espera de cada escritura: un destino que deja de leer no bloquea para siempre
+        self.send_timeout = send_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        # Evento de parada del runner (asyncio.Event): corta los reintentos de conexión
+        self.stop = stop
+
+        # Contadores de envío
+        self.sent = 0
+        self.failed = 0
+        self.bytes_sent = 0
+        self.reconnects = 0
+        self.resent = 0
+        self.backpressure_waits = 0
+        self.errors = 0
+
+        # Tiempo de cada escritura incluyendo la espera por backpressure
+        self.metric_labels = {"host": host, "port": str(port), "transport": "asyncio"}
+        self.send_latency = REGISTRY.histogram(
+            "sim_send_latency_seconds", "Segundos de cada escritura por lotes hacia Logstash", **self.metric_labels
+        )
+        REGISTRY.register_collector(self._collect_metrics)
+
+        self._writer = None
+        self._connected_once = False
+        self._closing = False
+
+    def _stopping(self):
+        """Indica si se pidió detener el runner o cerrar el sender"""
+        return self._closing or (self.stop is not None and self.stop.is_set())
+
+    async def _backoff(self, seconds):
+        """Espera el backoff, o menos si mientras tanto se pide detener"""
+        if self.stop is None:
+            await asyncio.sleep(seconds)
+            return
+        try:
+            await asyncio.wait_for(self.stop.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _connect(self):
+        """Conecta con backoff exponencial; devuelve False si se pide detener antes de lograrlo"""
+        backoff = self.backoff_initial
+        while not self._stopping():
+            try:
+                _, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), timeout=self.connect_timeout
+                )
+            except (OSError, asyncio.TimeoutError) as e:
+                self.errors += 1
+                logging.error(
+                    f"No se pudo conectar a Logstash {self.host}:{self.port}: {e} "
+                    f"(reintento en {backoff:.1f}s)"
+                )
+                await self._backoff(backoff)
+                backoff = min(backoff * 2, self.backoff_max)
+                continue
+
+            writer.transport.set_write_buffer_limits(high=self.high_water)
+            self._writer = writer
+            if self._connected_once:
+                self.reconnects += 1
+                logging.info(f"Reconectado a Logstash {self.host}:{self.port}")
+            self._connected_once = True
+            return True
+        return False
+
+    async def _drop_writer(self):
+        """Cierra la conexión actual (rota o cerrándose) sin propagar sus errores"""
+        writer, self._writer = self._writer, None
+        if writer is None:
+            return
+        # abort() descarta lo que quede en el buffer (el lote se reenvía): close() esperaría a que el destino lo lea
+        writer.transport.abort()
+        try:
+            await asyncio.wait_for(writer.wait_closed(), timeout=self.connect_timeout)
+        except (ConnectionError, OSError, asyncio.TimeoutError):
+            pass
+
+    async def send(self, payload, count):
+        """Escribe un lote; espera si el buffer supera high_water y devuelve False si se descarta al detener"""
+        while True:
+            if self._writer is None or self._writer.is_closing():
+                await self._drop_writer()
+                if not await self._connect():
+                    # Detenido sin conexión: el lote no se puede entregar
+                    self.failed += count
+                    return False
+            started = time.perf_counter()
+            try:
+                self._writer.write(payload)
+                if self._writer.transport.get_write_buffer_size() > self.high_water:
+                    self.backpressure_waits += 1
+                await asyncio.wait_for(self._writer.drain(), timeout=self.send_timeout)
+                error = None
+            except asyncio.TimeoutError:
+                error = f"el destino no leyó en {self.send_timeout:g}s"
+            except (ConnectionError, OSError) as e:
+                error = e
+            if error is not None:
+                # El lote se reenvía tras reconectar en lugar de descartarse
+                logging.error(f"Error enviando a Logstash {self.host}:{self.port}: {error}")
+                self.errors += 1
+                await self._drop_writer()
+                self.resent += count
+                continue
+            self.send_latency.observe(time.perf_counter() - started)
+            self.sent += count
+            self.bytes_sent += len(payload)
+            return True
+
+    def stats(self):
+        """Devuelve los contadores actuales del sender"""
+        return {
+            "sent": self.sent,
+            "bytes_sent": self.bytes_sent,
+            "reconnects": self.reconnects,
+            "resent": self.resent,
+            "backpressure_waits": self.backpressure_waits,
+            "errors": self.errors,
+            # Los lotes con error se reenvían; solo se descartan los que quedan sin conexión al detener
+            "failed": self.failed,
+            "buffered": 0
+        }
+
+    def _collect_metrics(self):
+        """Muestras de los contadores del sender para el endpoint de métricas"""
+        return sender_metrics(self.stats(), self.metric_labels)
+
+    async def close(self):
+        """Vacía el buffer del socket y cierra la conexión"""
+        self._closing = True
+        if self._writer is None:
+            return
+        writer, self._writer = self._writer, None
+        try:
+            await asyncio.wait_for(writer.drain(), timeout=self.send_timeout)
+            writer.close()
+            await asyncio.wait_for(writer.wait_closed(), timeout=self.connect_timeout)
+        except asyncio.TimeoutError:
+            logging.error(f"Logstash {self.host}:{self.port} no leyó lo pendiente en {self.send_timeout:g}s, se descarta")
+            writer.transport.abort()
+        except (ConnectionError, OSError) as e:
+            logging.error(f"Error cerrando conexión con Logstash {self.host}:{self.port}: {e}")
+            writer.transport.abort()
+
+
+class FamilyTask:
+    """Generación a tasa controlada de una familia de logs"""
+
+    def __init__(self, family, simulator, sender, pacer):
+        self.family = family
+        self.label = LABELS[family]
+        self.simulator = simulator
+        self.sender = sender
+        self.pacer = pacer
+
+    async def run(self, stop):
+        """Genera lotes hasta que se pide detener; el lote en curso siempre se envía"""
+        build_columns = getattr(self.simulator, FAMILIES[self.family]["columns"])
+        while not stop.is_set():
+            count = await self.pacer.acquire_async()
+            batch = build_columns(count)
+            payload = batch.to_bytes()
+            probes = self.simulator.probes
+            if probes is not None and probes.due():
+                probe = self.simulator.build_probe_log(probes.next_marker())
+                payload += self.simulator.encode_line(probe)
+                count += 1
+            if not await self.sender.send(payload, count):
+                break
+            # Ceder el loop a las demás familias entre lotes
+            await asyncio.sleep(0)
+
+    def report(self):
+        """Registra la tasa lograda y los contadores de envío de la familia"""
+        self.pacer.report(self.label)
+        logging.info(metrics_summary(self.label, self.simulator.generation, self.sender))
+        stats = self.sender.stats()
+        logging.info(
+            f"{self.label} -> {self.sender.host}:{self.sender.port} - enviados: {stats['sent']}, "
+            f"reenviados: {stats['resent']}, descartados: {stats['failed']}, esperas por backpressure: {stats['backpressure_waits']}, "
+            f"reconexiones: {stats['reconnects']}, bytes: {stats['bytes_sent']}"
+        )
+
+
+async def _report_loop(tasks, interval, stop):
+    """Reporta periódicamente todas las familias"""
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            for task in tasks:
+                task.report()
+
+
+async def run_unified(simulators, rates, host, ports=None, report_interval=10.0,
+                      duration=None, high_water=1024 * 1024, profiles=None):
+    """Ejecuta las familias indicadas ({familia: simulador}) a sus tasas ({familia: eps} o perfiles de tasa)"""
+    ports = ports or {}
+    profiles = profiles or {}
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    tasks = []
+    for family, simulator in simulators.items():
+        port = ports.get(family, FAMILIES[family]["port"])
+        sender = AsyncStreamSender(host, port, high_water=high_water, stop=stop)
+        pacer = RatePacer(profiles.get(family) or ConstantProfile(rates[family]), report_interval=report_interval)
+        tasks.append(FamilyTask(family, simulator, sender, pacer))
+        logging.info(f"{LABELS[family]}: {rates[family]:.0f} eps hacia {host}:{port}")
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    if duration:
+        loop.call_later(duration, stop.set)
+
+    reporter = asyncio.create_task(_report_loop(tasks, report_interval, stop))
+    await asyncio.gather(*(task.run(stop) for task in tasks))
+
+    logging.info("Deteniendo runner unificado: vaciando lotes en vuelo...")
+    await reporter
+    for task in tasks:
+        await task.sender.close()
+        task.report()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Lotes de eventos en columnas para los simuladores
+Un lote guarda N eventos como columnas (arrays de números, índices a tablas
+de strings internados y listas de strings) en lugar de un dict por evento, y
+se serializa completo a NDJSON o a líneas de texto (Apache) con una plantilla
+precompilada: cada string internado se codifica una sola vez por proceso
+La salida NDJSON es idéntica a json.dumps del dict equivalente (mismo orden
+de claves y separadores), que sigue disponible con records() para los
+caminos que necesitan dicts (exportación _bulk, eco en consola)
+Las plantillas se compilan a f-strings (como hace namedtuple con su código),
+que formatean un ~30% más rápido que el operador %; un schema puede además
+tener un renderer propio sobre bytes (ver common.linetemplate) que to_bytes
+usa en lugar de la plantilla
+"""
+
+import json
+import re
+from json.encoder import encode_basestring_ascii
+
+# Tipos de columna
+STR = "str"      # índices a una StringTable (valores repetidos: nivel, servicio, endpoint)
+TEXT = "text"    # strings libres que requieren escape JSON (mensajes con datos)
+ID = "id"        # strings sin caracteres a escapar (timestamps, ids hex, IPs)
+INT = "int"      # enteros
+FLOAT = "float"  # reales; NaN se serializa como null
+RAW = "raw"      # fragmento JSON ya serializado con su propia clave (o vacío)
+CONST = "const"  # valor fijo de todo el lote, embebido en la plantilla
+
+NULL_FLOAT = float("nan")
+
+# Especificadores admitidos en las plantillas: %s, %d, %02d y %%
+_SPEC_RE = re.compile(r'%(%|0?\d*[sd])')
+
+
+class StringTable:
+    """Strings internados de una columna, cada uno codificado una sola vez"""
+
+    def __init__(self, values=()):
+        self.values = []
+        self.encoded = []
+        self._index = {}
+        for value in values:
+            self.intern(value)
+
+    def intern(self, value):
+        """Índice del valor en la tabla, agregándolo si es nuevo (None se serializa como null)"""
+        index = self._index.get(value)
+        if index is None:
+            index = len(self.values)
+            self._index[value] = index
+            self.values.append(value)
+            self.encoded.append("null" if value is None else encode_basestring_ascii(value))
+        return index
+
+
+def _json_template(fields, renames):
+    """Plantilla '{"a": %s, "b": {"c": %s}}' para los campos; un nivel de anidamiento con 'padre.hijo'"""
+    out = "{"
+    first = True
+    parent = ""
+    for field in fields:
+        name, kind = field[0], field[1]
+        if kind == RAW:
+            # El fragmento trae su propio separador y clave
+            if parent:
+                out += "}"
+                parent = ""
+            out += "%s"
+            first = False
+            continue
+        name = renames.get(name, name)
+        prefix, _, key = name.rpartition('.')
+        if prefix != parent:
+            if parent:
+                out += "}"
+            if prefix:
+                out += ("" if first else ", ") + encode_basestring_ascii(prefix) + ": {"
+                first = True
+            parent = prefix
+        if kind == CONST:
+            value = json.dumps(field[2]).replace("%", "%%")
+        else:
+            value = "%d" if kind == INT else "%s"
+        out += ("" if first else ", ") + encode_basestring_ascii(key) + ": " + value
+        first = False
+    if parent:
+        out += "}"
+    return out + "}"
+
+
+def compile_template(template):
+    """Compila una plantilla % en (función sobre filas -> líneas, función sobre una fila -> línea)"""
+    pieces = []
+    names = []
+    position = 0
+    for match in _SPEC_RE.finditer(template):
+        pieces.append(template[position:match.start()].replace("{", "{{").replace("}", "}}"))
+        spec = match.group(1)
+        if spec == "%":
+            pieces.append("%")
+        else:
+            name = f"c{len(names)}"
+            names.append(name)
+            width = spec[:-1]
+            pieces.append("{" + name + (":" + width + "d" if width else "") + "}")
+        position = match.end()
+    pieces.append(template[position:].replace("{", "{{").replace("}", "}}"))
+    body = "f" + repr("".join(pieces))
+    # Sin campos variables (p. ej. un schema de constantes) cada fila es una tupla vacía
+    targets = ", ".join(names) + "," if names else "()"
+    render_rows = eval(f"lambda rows: [{body} for {targets} in rows]", {})
+    render_row = eval(f"lambda {', '.join(names)}: {body}", {})
+    return render_rows, render_row
+
+
+class BatchSchema:
+    """Campos de un tipo de evento, sus tablas de strings y las plantillas de salida"""
+
+    def __init__(self, fields, templates, json_mode, renames=None):
+        self.fields = [tuple(field) for field in fields]
+        self.templates = templates
+        compiled = [compile_template(template) for template in templates]
+        self.render_rows = [rows for rows, _ in compiled]
+        self.render_row = [row for _, row in compiled]
+        self.json_mode = json_mode
+        self.renames = renames or [{}]
+        self.tables = {field[0]: StringTable() for field in self.fields if field[1] == STR}
+        # Solo las columnas variables llegan a la plantilla
+        self.columns = [field for field in self.fields if field[1] != CONST]
+        # Función columnas -> bytes equivalente a la plantilla, más rápida (None usa la plantilla)
+        self.renderer = None
+
+    def table(self, name):
+        """Tabla de strings internados de la columna name"""
+        return self.tables[name]
+
+
+def json_schema(fields, renames=None):
+    """Schema NDJSON; renames es una lista de variantes ({campo: otra clave}) elegidas por fila"""
+    renames = renames or [{}]
+    templates = [_json_template(fields, variant) for variant in renames]
+    return BatchSchema(fields, templates, True, renames)
+
+
+def text_schema(fields, template):
+    """Schema de líneas de texto con una plantilla % (por ejemplo el formato Apache)"""
+    return BatchSchema(fields, [template], False)
+
+
+class EventBatch:
+    """N eventos guardados por columnas con el schema indicado"""
+
+    __slots__ = ("schema", "size", "columns", "keys", "variants")
+
+    def __init__(self, schema, size, keys=None):
+        self.schema = schema
+        self.size = size
+        self.columns = {}
+        # Id de la flota de cada evento (no se serializa) y variante de plantilla por fila
+        self.keys = keys
+        self.variants = None
+
+    def __len__(self):
+        return self.size
+
+    def _rendered(self):
+        """Columnas convertidas a los strings (o enteros) que espera la plantilla"""
+        schema = self.schema
+        json_mode = schema.json_mode
+        rendered = []
+        for field in schema.columns:
+            name, kind = field[0], field[1]
+            column = self.columns[name]
+            if kind == STR:
+                table = schema.tables[name]
+                values = table.encoded if json_mode else table.values
+                rendered.append([values[i] for i in column])
+            elif kind == INT or kind == RAW or not json_mode:
+                rendered.append(column if kind != FLOAT else [repr(v) for v in column])
+            elif kind == FLOAT:
+                rendered.append([repr(v) if v == v else "null" for v in column])
+            elif kind == TEXT:
+                rendered.append([encode_basestring_ascii(v) if v is not None else "null" for v in column])
+            else:
+                rendered.append(['"' + v + '"' if v is not None else "null" for v in column])
+        return rendered
+
+    def lines(self):
+        """Lista de líneas serializadas (sin salto de línea)"""
+        rows = zip(*self._rendered()) if self.schema.columns else [()] * self.size
+        if self.variants is None:
+            return self.schema.render_rows[0](rows)
+        render_row = self.schema.render_row
+        return [render_row[variant](*row) for variant, row in zip(self.variants, rows)]
+
+    def to_text(self):
+        """Todo el lote como texto, una línea por evento"""
+        if not self.size:
+            return ""
+        return "\n".join(self.lines()) + "\n"
+
+    def to_bytes(self):
+        """Todo el lote codificado en UTF-8, listo para los sinks"""
+        if self.schema.renderer is not None and self.size:
+            return self.schema.renderer(self.columns)
+        return self.to_text().encode('utf-8')
+
+    def records(self):
+        """Eventos como dicts (o líneas en schemas de texto) para los caminos que los necesitan"""
+        schema = self.schema
+        if not schema.json_mode:
+            return self.lines()
+        variants = self.variants or [0] * self.size
+        records = []
+        for row in range(self.size):
+            renames = schema.renames[variants[row]]
+            record = {}
+            for field in schema.fields:
+                name, kind = field[0], field[1]
+                if kind == CONST:
+                    value = field[2]
+                else:
+                    value = self.columns[name][row]
+                if kind == STR:
+                    value = schema.tables[name].values[value]
+                elif kind == FLOAT and value != value:
+                    value = None
+                elif kind == RAW:
+                    if value:
+                        record.update(json.loads("{" + value.lstrip(", ") + "}"))
+                    continue
+                name = renames.get(name, name)
+                parent, _, key = name.rpartition('.')
+                if parent:
+                    record.setdefault(parent, {})[key] = value
+                else:
+                    record[key] = value
+            records.append(record)
+        return records
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Exportación de eventos a archivos NDJSON para la API _bulk de Elasticsearch
+Los documentos se reparten en índices diarios con el mismo nombre que usa
+Logstash (index => "<familia>-%{+YYYY.MM.dd}", fecha UTC de @timestamp) y
+cada índice se divide en archivos de tamaño acotado
+"""
+
+import json
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+
+from common.encoders import get_encoder
+
+# Equivalente al grok %{COMBINEDAPACHELOG} (nombres de campo clásicos, sin ECS)
+COMBINED_APACHE_RE = re.compile(
+    r'(?P<clientip>\S+) (?P<ident>\S+) (?P<auth>\S+) \[(?P<timestamp>[^\]]+)\] '
+    r'"(?P<verb>\S+) (?P<request>\S+) HTTP/(?P<httpversion>[^"]+)" '
+    r'(?P<response>\d{3}) (?P<bytes>\d+|-) "(?P<referrer>[^"]*)" "(?P<agent>[^"]*)"'
+)
+
+
+def parse_combined(line):
+    """Extrae los campos de una línea Apache combined (None si no coincide)"""
+    match = COMBINED_APACHE_RE.search(line)
+    if match is None:
+        return None
+    fields = match.groupdict()
+    fields["response"] = int(fields["response"])
+    fields["bytes"] = int(fields["bytes"]) if fields["bytes"] != "-" else 0
+    return fields
+
+
+@lru_cache(maxsize=4096)
+def apache_to_datetime(timestamp):
+    """Convierte "01/Sep/2025:15:30:45 +0000" a datetime (cacheado por segundo)"""
+    return datetime.strptime(timestamp, "%d/%b/%Y:%H:%M:%S %z")
+
+
+def iso_to_datetime(timestamp):
+    """Convierte un ISO8601 sin zona a datetime UTC, como el filtro date de Logstash"""
+    moment = datetime.fromisoformat(timestamp)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def bulk_entry(index_prefix, moment, doc, encoder):
+    """(índice diario, acción index + documento en NDJSON) de un documento con su instante (datetime con zona)"""
+    moment = moment.astimezone(timezone.utc)
+    index = f"{index_prefix}-{moment:%Y.%m.%d}"
+    doc["@timestamp"] = f"{moment:%Y-%m-%dT%H:%M:%S}.{moment.microsecond // 1000:03d}Z"
+    return index, ('{"index":{"_index":"' + index + '"}}\n').encode('utf-8') + encoder.line(doc)
+
+
+class BulkExporter:
+    """Escribe documentos en archivos _bulk NDJSON por índice diario y tamaño"""
+
+    def __init__(self, out_dir, index_prefix, chunk_bytes=10 * 1024 * 1024, encoder=None):
+        self.out_dir = out_dir
+        self.index_prefix = index_prefix
+        self.chunk_bytes = chunk_bytes
+        self.encoder = encoder or get_encoder()
+        os.makedirs(out_dir, exist_ok=True)
+
+        # índice -> [archivo abierto, bytes escritos, número de parte]
+        self._open = {}
+        # ruta -> documentos en el archivo
+        self.files = {}
+        self.documents = 0
+        self.bytes_written = 0
+
+    def add(self, moment, doc):
+        """Agrega un documento con su instante (datetime con zona) al índice diario"""
+        index, payload = bulk_entry(self.index_prefix, moment, doc, self.encoder)
+
+        state = self._open.get(index)
+        if state is None or (state[1] > 0 and state[1] + len(payload) > self.chunk_bytes):
+            state = self._next_chunk(index, state)
+        state[0].write(payload)
+        state[1] += len(payload)
+        self.files[state[0].name] += 1
+        self.documents += 1
+        self.bytes_written += len(payload)
+
+    def _next_chunk(self, index, state):
+        """Cierra la parte actual del índice (si existe) y abre la siguiente"""
+        part = 1
+        if state is not None:
+            state[0].close()
+            part = state[2] + 1
+        path = os.path.join(self.out_dir, f"{index}-{part:04d}.ndjson")
+        state = [open(path, 'wb'), 0, part]
+        self._open[index] = state
+        self.files[path] = 0
+        return state
+
+    def close(self):
+        """Cierra los archivos y escribe <prefijo>-manifest.json con el resumen"""
+        for state in self._open.values():
+            state[0].close()
+        self._open = {}
+
+        manifest = {
+            "index_prefix": self.index_prefix,
+            "documents": self.documents,
+            "bytes": self.bytes_written,
+            "files": [
+                {"path": os.path.basename(path), "documents": docs}
+                for path, docs in sorted(self.files.items())
+            ]
+        }
+        with open(os.path.join(self.out_dir, f"{self.index_prefix}-manifest.json"), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+        logging.info(
+            f"Exportados {self.documents} documentos {self.index_prefix} en {len(self.files)} archivos "
+            f"({self.bytes_written / 1024 / 1024:.1f} MB) en {self.out_dir}"
+        )
+        return manifest
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Opciones de línea de comandos comunes a los simuladores
+Cada opción toma su valor por defecto de una variable de entorno para poder
+configurarla desde docker-compose.yml sin cambiar el comando
+"""
+
+import argparse
+import os
+import random
+from datetime import datetime
+
+from common.compression import CODECS, check_codec
+from common.encoders import ENCODERS
+from common.entities import parse_cardinality
+from common.filesink import FSYNC_POLICIES
+from common.http_sender import HTTP_CODECS
+from common.linetemplate import WEB_FORMATS
+from common.loader import FAMILIES
+from common.pacing import build_profile
+from common.scenario import load_scenario, scenario_eps
+from common.traffic import TrafficModel, load_traffic
+
+# Destinos de los eventos
+OUTPUTS = ("logstash", "logstash-http", "elasticsearch")
+
+
+def build_parser(description):
+    """Crea el parser con las opciones compartidas por los tres simuladores"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--host", default=os.environ.get("LOGSTASH_HOST"),
+        help="Host de Logstash (por defecto el del escenario o elk-logstash)"
+    )
+    parser.add_argument(
+        "--port", type=int, default=os.environ.get("LOGSTASH_PORT"),
+        help="Puerto TCP de Logstash (por defecto el del escenario o el de cada simulador)"
+    )
+    parser.add_argument(
+        "--scenario", default=os.environ.get("SIM_SCENARIO"),
+        help="Escenario TOML/JSON/YAML: flotas por familia (hosts, tasa y peso por host), host y puertos "
+             "de Logstash y tablas de probabilidad"
+    )
+    parser.add_argument(
+        "--output", choices=OUTPUTS, default=os.environ.get("SIM_OUTPUT", "logstash"),
+        help="Destino de los eventos: logstash (inputs tcp), logstash-http (input http con lotes "
+             "comprimidos) o elasticsearch (API _bulk directa)"
+    )
+    parser.add_argument(
+        "--es-url", default=os.environ.get("ES_URL", "http://elk-elasticsearch:9200"),
+        help="URL de Elasticsearch para --output elasticsearch"
+    )
+    parser.add_argument(
+        "--es-bulk-docs", type=int, default=int(os.environ.get("SIM_ES_BULK_DOCS", 1000)),
+        help="Documentos máximos por petición _bulk"
+    )
+    parser.add_argument(
+        "--es-bulk-mb", type=float, default=float(os.environ.get("SIM_ES_BULK_MB", 5)),
+        help="Tamaño máximo de cada petición _bulk en MB (sin comprimir)"
+    )
+    parser.add_argument(
+        "--es-workers", type=int, default=int(os.environ.get("SIM_ES_WORKERS", 2)),
+        help="Conexiones HTTP keep-alive concurrentes hacia Elasticsearch"
+    )
+    parser.add_argument(
+        "--es-retries", type=int, default=int(os.environ.get("SIM_ES_RETRIES", 5)),
+        help="Reintentos con backoff de los documentos rechazados con 429"
+    )
+    parser.add_argument(
+        "--es-gzip", action="store_true", default=os.environ.get("SIM_ES_GZIP") == "1",
+        help="Comprimir con gzip el cuerpo de las peticiones _bulk"
+    )
+    parser.add_argument(
+        "--http-port", type=int, default=os.environ.get("SIM_HTTP_PORT"),
+        help="Puerto del input http de Logstash para --output logstash-http (por defecto el de cada simulador)"
+    )
+    parser.add_argument(
+        "--http-codec", choices=HTTP_CODECS, default=os.environ.get("SIM_HTTP_CODEC", "gzip"),
+        help="Compresión de cada lote HTTP (Content-Encoding que el input http descomprime)"
+    )
+    parser.add_argument(
+        "--http-level", type=int, default=int(os.environ.get("SIM_HTTP_LEVEL", 1)),
+        help="Nivel de gzip de los lotes HTTP (1 rápido ... 9 máximo ratio)"
+    )
+    parser.add_argument(
+        "--http-batch-kb", type=int, default=int(os.environ.get("SIM_HTTP_BATCH_KB", 1024)),
+        help="Tamaño de cada lote HTTP antes de comprimir"
+    )
+    parser.add_argument(
+        "--http-workers", type=int, default=int(os.environ.get("SIM_HTTP_WORKERS", 2)),
+        help="Conexiones HTTP keep-alive concurrentes hacia Logstash"
+    )
+    parser.add_argument(
+        "--spool-dir", default=os.environ.get("SIM_SPOOL_DIR"),
+        help="Directorio del spool en disco: lo que no se puede entregar a Logstash se guarda y se reenvía al reconectar"
+    )
+    parser.add_argument(
+        "--spool-max-mb", type=float, default=float(os.environ.get("SIM_SPOOL_MAX_MB", 1024)),
+        help="Tamaño máximo del spool; lleno, los lotes nuevos se descartan"
+    )
+    parser.add_argument(
+        "--spool-segment-mb", type=float, default=float(os.environ.get("SIM_SPOOL_SEGMENT_MB", 64)),
+        help="Tamaño de cada segmento del spool (se borran a medida que se reenvían)"
+    )
+    parser.add_argument(
+        "--spool-replay-eps", type=float, default=float(os.environ.get("SIM_SPOOL_REPLAY_EPS", 20000)),
+        help="Eventos/segundo máximos al reenviar el spool tras reconectar"
+    )
+    parser.add_argument(
+        "--eps", type=float, default=float(os.environ.get("SIM_EPS", 0)),
+        help="Tasa objetivo en eventos/segundo; 0 usa la del escenario o el modo clásico de ráfagas cada 5-10s"
+    )
+    parser.add_argument(
+        "--ramp-up", type=float, default=float(os.environ.get("SIM_RAMP_UP", 0)),
+        help="Segundos de rampa lineal desde 0 hasta --eps"
+    )
+    parser.add_argument(
+        "--steps", default=os.environ.get("SIM_STEPS"),
+        help="Perfil por escalones 'duración:eps,...' (por ejemplo 60:1000,60:10000)"
+    )
+    parser.add_argument(
+        "--profile", default=os.environ.get("SIM_PROFILE"),
+        help="Perfil de tráfico JSON (tasa base, ciclo diario, ráfagas e incidentes); reemplaza a --eps/--steps"
+    )
+    parser.add_argument(
+        "--report-interval", type=float, default=float(os.environ.get("SIM_REPORT_INTERVAL", 10)),
+        help="Segundos entre reportes de tasa lograda"
+    )
+    parser.add_argument(
+        "--console-every", type=int, default=int(os.environ.get("SIM_CONSOLE_EVERY", 1)),
+        help="Muestra en consola 1 de cada N eventos"
+    )
+    parser.add_argument(
+        "--console-max-rate", type=float, default=float(os.environ.get("SIM_CONSOLE_MAX_RATE", 20)),
+        help="Máximo de líneas de eventos por segundo en consola (0 sin límite)"
+    )
+    parser.add_argument(
+        "--console-status-interval", type=float, default=float(os.environ.get("SIM_CONSOLE_STATUS_INTERVAL", 10)),
+        help="Segundos entre líneas de estado de la consola (eventos por categoría y omitidos; 0 desactiva)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=int(os.environ.get("SIM_WORKERS", 1)),
+        help="Procesos que se reparten la flota simulada (requiere --eps o --steps)"
+    )
+    parser.add_argument(
+        "--metrics-port", type=int, default=int(os.environ.get("SIM_METRICS_PORT", 0)),
+        help="Puerto HTTP para exponer /metrics en formato Prometheus (0 desactiva; con --workers, puerto + índice)"
+    )
+    parser.add_argument(
+        "--probe-interval", type=float, default=float(os.environ.get("SIM_PROBE_INTERVAL", 0)),
+        help="Segundos entre eventos sonda para medir la latencia extremo a extremo (0 desactiva)"
+    )
+    parser.add_argument(
+        "--probe-run", default=os.environ.get("SIM_PROBE_RUN"),
+        help="Id de corrida de las sondas (por defecto uno aleatorio que se muestra al iniciar)"
+    )
+    parser.add_argument(
+        "--probe-ledger", default=os.environ.get("SIM_PROBE_LEDGER"),
+        help="Directorio donde registrar cuántas sondas emitió cada corrida (lo lee check_probes.py --ledger)"
+    )
+    parser.add_argument(
+        "--encoder", choices=ENCODERS, default=os.environ.get("SIM_ENCODER", "auto"),
+        help="Codificador JSON de los eventos: auto (orjson si está instalado), json u orjson"
+    )
+    parser.add_argument(
+        "--web-format", choices=WEB_FORMATS, default=os.environ.get("SIM_WEB_FORMAT", "raw"),
+        help="Formato de las líneas web hacia Logstash y el archivo: raw (texto), json (campo message), "
+             "nginx (message en formato main de Nginx) o structured (campos ya parseados, sin grok)"
+    )
+    parser.add_argument(
+        "--cardinality", default=os.environ.get("SIM_CARDINALITY"),
+        help="Pools de entidades de db/micro con popularidad Zipf: 'default' o tamaños "
+             "'users=1000000,tenants=500,tables=200,queries=5000,hosts=100,pods=1000'"
+    )
+    parser.add_argument(
+        "--zipf-exponent", type=float, default=float(os.environ.get("SIM_ZIPF_EXPONENT", 1.1)),
+        help="Exponente Zipf de la popularidad de las entidades (mayor concentra más en las primeras)"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=os.environ.get("SIM_SEED"),
+        help="Semilla para un flujo de eventos reproducible (byte a byte con --start/--end/--count)"
+    )
+    parser.add_argument(
+        "--file-max-mb", type=float, default=float(os.environ.get("SIM_FILE_MAX_MB", 100)),
+        help="Tamaño máximo del archivo de log antes de rotarlo (0 desactiva)"
+    )
+    parser.add_argument(
+        "--file-rotate-interval", type=float, default=float(os.environ.get("SIM_FILE_ROTATE_INTERVAL", 0)),
+        help="Segundos máximos antes de rotar el archivo de log (0 desactiva)"
+    )
+    parser.add_argument(
+        "--file-backups", type=int, default=int(os.environ.get("SIM_FILE_BACKUPS", 5)),
+        help="Segmentos rotados que se conservan"
+    )
+    parser.add_argument(
+        "--file-compress", action="store_true", default=os.environ.get("SIM_FILE_COMPRESS") == "1",
+        help="Comprimir con gzip los segmentos rotados"
+    )
+    parser.add_argument(
+        "--file-codec", choices=CODECS, default=os.environ.get("SIM_FILE_CODEC", "none"),
+        help="Escribir el archivo ya comprimido (gzip o zstd, un frame por segmento de rotación)"
+    )
+    parser.add_argument(
+        "--file-codec-level", type=int, default=int(os.environ.get("SIM_FILE_CODEC_LEVEL", 0)),
+        help="Nivel de --file-codec (0 el de por defecto: gzip 6, zstd 3)"
+    )
+    parser.add_argument(
+        "--file-fsync", choices=FSYNC_POLICIES, default=os.environ.get("SIM_FILE_FSYNC", "never"),
+        help="Cuándo forzar fsync: never, flush (cada vaciado) o rotate (al rotar)"
+    )
+    parser.add_argument(
+        "--file-flush-interval", type=float, default=float(os.environ.get("SIM_FILE_FLUSH_INTERVAL", 1.0)),
+        help="Segundos máximos que una línea espera en el buffer antes de escribirse"
+    )
+    parser.add_argument(
+        "--start", type=datetime.fromisoformat,
+        help="Inicio del rango de tiempo sintético (ISO8601) para generar histórico a máxima velocidad"
+    )
+    parser.add_argument(
+        "--end", type=datetime.fromisoformat,
+        help="Fin del rango de tiempo sintético (ISO8601)"
+    )
+    parser.add_argument(
+        "--count", type=int,
+        help="Número de eventos a repartir en el rango --start/--end"
+    )
+    parser.add_argument(
+        "--export-dir",
+        help="Con --start/--end/--count, escribe archivos _bulk NDJSON en este directorio en lugar de enviar a Logstash"
+    )
+    parser.add_argument(
+        "--chunk-mb", type=float, default=10,
+        help="Tamaño máximo de cada archivo _bulk exportado"
+    )
+    return parser
+
+
+def parse_args(description):
+    """Parsea y valida las opciones de línea de comandos del simulador"""
+    parser = build_parser(description)
+    args = parser.parse_args()
+    args.scenario_config = None
+    if args.scenario:
+        try:
+            args.scenario_config = load_scenario(args.scenario)
+        except (OSError, ValueError) as e:
+            parser.error(f"escenario {args.scenario}: {e}")
+        args.host = args.host or (args.scenario_config.get("logstash") or {}).get("host")
+    args.traffic = None
+    if args.profile:
+        if args.eps or args.steps:
+            parser.error("--profile define la tasa: no se combina con --eps ni --steps")
+        try:
+            args.traffic = load_traffic(args.profile)
+        except (OSError, ValueError) as e:
+            parser.error(f"perfil de tráfico {args.profile}: {e}")
+    args.entity_sizes = None
+    if args.cardinality:
+        try:
+            args.entity_sizes = parse_cardinality(args.cardinality)
+        except ValueError as e:
+            parser.error(f"--cardinality: {e}")
+        if args.zipf_exponent <= 0:
+            parser.error("--zipf-exponent debe ser positivo")
+    # Semilla de las entidades: sin --seed se elige una para que todos los workers compartan los mismos pools
+    args.entity_seed = int(args.seed) if args.seed is not None else random.SystemRandom().getrandbits(64)
+    if args.workers > 1 and not paced_mode(args):
+        parser.error("--workers requiere una tasa objetivo (--eps, --steps, --profile o eps en el escenario)")
+    if any(v is not None for v in (args.start, args.end, args.count)):
+        if args.start is None or args.end is None or not args.count:
+            parser.error("el tiempo sintético requiere --start, --end y --count")
+        if args.end <= args.start:
+            parser.error("--end debe ser posterior a --start")
+        if args.probe_interval:
+            parser.error("las sondas miden latencia en tiempo real y no aplican con --start/--end/--count")
+    if args.export_dir and not args.count:
+        parser.error("--export-dir requiere --start, --end y --count")
+    if args.export_dir and args.output == "elasticsearch":
+        parser.error("--export-dir escribe archivos _bulk: no se combina con --output elasticsearch")
+    if args.console_every <= 0 or args.console_max_rate < 0 or args.console_status_interval < 0:
+        parser.error("--console-every debe ser positivo y --console-max-rate/--console-status-interval no negativos")
+    if args.spool_dir and args.output != "logstash":
+        parser.error("--spool-dir guarda lo que no llega a los inputs tcp: las salidas HTTP reintentan por su cuenta")
+    if args.http_batch_kb <= 0 or args.http_workers <= 0 or not 0 <= args.http_level <= 9:
+        parser.error("--http-batch-kb y --http-workers deben ser positivos y --http-level estar entre 0 y 9")
+    try:
+        check_codec(args.file_codec)
+    except ValueError as e:
+        parser.error(f"--file-codec: {e}")
+    if args.file_codec != "none" and args.file_compress:
+        parser.error("--file-codec ya escribe el archivo comprimido: no se combina con --file-compress")
+    if args.web_format != "raw" and args.output == "elasticsearch":
+        parser.error("--web-format elige el formato hacia Logstash: la salida elasticsearch indexa los documentos ya parseados")
+    if args.spool_max_mb <= 0 or args.spool_segment_mb <= 0 or args.spool_replay_eps <= 0:
+        parser.error("--spool-max-mb, --spool-segment-mb y --spool-replay-eps deben ser positivos")
+    if args.es_bulk_docs <= 0 or args.es_bulk_mb <= 0 or args.es_workers <= 0 or args.es_retries < 0:
+        parser.error("--es-bulk-docs, --es-bulk-mb y --es-workers deben ser positivos y --es-retries no negativo")
+    return args
+
+
+def simulator_kwargs(args):
+    """Extrae los argumentos de conexión y archivo para el constructor del simulador"""
+    kwargs = {
+        "seed": int(args.seed) if args.seed is not None else None,
+        "file_options": {
+            "max_bytes": int(args.file_max_mb * 1024 * 1024),
+            "rotate_interval": args.file_rotate_interval,
+            "backup_count": args.file_backups,
+            "compress": args.file_compress,
+            "fsync": args.file_fsync,
+            "flush_interval": args.file_flush_interval,
+            "codec": args.file_codec,
+            "codec_level": args.file_codec_level or None
+        },
+        "probe_options": {
+            "interval": args.probe_interval,
+            "run_id": args.probe_run,
+            "ledger": args.probe_ledger
+        },
+        "encoder": args.encoder,
+        "traffic_options": {
+            "config": args.traffic,
+            "seed": int(args.seed) if args.seed is not None else None
+        },
+        "console_options": {
+            "every": args.console_every,
+            "max_rate": args.console_max_rate,
+            "status_interval": args.console_status_interval
+        },
+        "scenario": args.scenario_config
+    }
+    if args.entity_sizes:
+        kwargs["entity_options"] = {
+            "sizes": args.entity_sizes,
+            "exponent": args.zipf_exponent,
+            "seed": args.entity_seed
+        }
+    if args.spool_dir:
+        kwargs["spool_options"] = {
+            "directory": args.spool_dir,
+            "max_bytes": int(args.spool_max_mb * 1024 * 1024),
+            "segment_bytes": int(args.spool_segment_mb * 1024 * 1024),
+            "replay_rate": args.spool_replay_eps
+        }
+    if args.output == "logstash-http":
+        kwargs["http_options"] = {
+            "port": int(args.http_port) if args.http_port else None,
+            "codec": args.http_codec,
+            "level": args.http_level,
+            "batch_bytes": args.http_batch_kb * 1024,
+            "workers": args.http_workers
+        }
+    if args.output == "elasticsearch":
+        kwargs["es_options"] = {
+            "url": args.es_url,
+            "batch_docs": args.es_bulk_docs,
+            "batch_bytes": int(args.es_bulk_mb * 1024 * 1024),
+            "workers": args.es_workers,
+            "compress": args.es_gzip,
+            "max_retries": args.es_retries
+        }
+    if args.host:
+        kwargs["tcp_host"] = args.host
+    if args.port:
+        kwargs["tcp_port"] = int(args.port)
+    return kwargs
+
+
+def paced_mode(args, family=None):
+    """Indica si se pidió el modo con tasa controlada (también si el escenario da tasa a la familia, o a alguna)"""
+    if args.eps > 0 or bool(args.steps) or args.traffic is not None:
+        return True
+    return any(scenario_eps(args.scenario_config, name) > 0 for name in ([family] if family else FAMILIES))
+
+
+def rate_profile(args, family):
+    """Perfil de tasa del modo controlado: el del perfil de tráfico, el de --eps/--ramp-up/--steps o el del escenario"""
+    if args.traffic is not None:
+        return TrafficModel(args.traffic, family, args.seed)
+    if not args.eps and not args.steps:
+        return build_profile(scenario_eps(args.scenario_config, family), args.ramp_up)
+    return build_profile(args.eps, args.ramp_up, args.steps)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Reloj compartido con formato de timestamps cacheado
+La parte con resolución de segundos (fecha y hora) se formatea una sola vez
+por segundo; en cada evento solo se renderiza el sufijo de microsegundos.
+El reloj sintético recorre un rango de tiempo pasado a máxima velocidad
+"""
+
+import time
+from datetime import datetime
+
+
+class CachedClock:
+    """Reloj de pared con los prefijos de cada segundo ya formateados"""
+
+    def __init__(self):
+        self._second = None
+        self._apache = ""
+        self._iso_prefix = ""
+        self._hms_second = None
+        self._hms = ""
+
+    def now(self):
+        """Timestamp actual (segundos desde epoch)"""
+        return time.time()
+
+    def peek(self):
+        """Instante actual sin consumirlo (en el reloj sintético now() avanza un paso)"""
+        return time.time()
+
+    def _render(self, second):
+        """Formatea los prefijos del segundo indicado"""
+        moment = datetime.fromtimestamp(second)
+        self._second = second
+        self._apache = moment.strftime("%d/%b/%Y:%H:%M:%S +0000")
+        self._iso_prefix = moment.strftime("%Y-%m-%dT%H:%M:%S")
+
+    def apache(self):
+        """Timestamp en formato Apache (resolución de segundos)"""
+        second = int(self.now())
+        if second != self._second:
+            self._render(second)
+        return self._apache
+
+    def iso(self):
+        """Timestamp ISO8601 con microsegundos"""
+        return self.iso_at(self.now())
+
+    def iso_at(self, instant):
+        """Timestamp ISO8601 con microsegundos de un instante dado (p. ej. el inicio de un span)"""
+        second = int(instant)
+        if second != self._second:
+            self._render(second)
+        return f"{self._iso_prefix}.{int((instant - second) * 1000000):06d}"
+
+    def advance(self, events):
+        """Cuenta events eventos fechados sin now() (el reloj real no avanza por eventos)"""
+
+    def hms(self):
+        """Hora de pared HH:MM:SS para la consola (también con reloj sintético)"""
+        second = int(time.time())
+        if second != self._hms_second:
+            self._hms_second = second
+            self._hms = time.strftime("%H:%M:%S", time.localtime(second))
+        return self._hms
+
+
+class SyntheticClock(CachedClock):
+    """Reloj que avanza un paso fijo por evento entre start y end"""
+
+    def __init__(self, start, end, events):
+        super().__init__()
+        self.start = start.timestamp() if isinstance(start, datetime) else float(start)
+        self.end = end.timestamp() if isinstance(end, datetime) else float(end)
+        if self.end <= self.start:
+            raise ValueError("El fin del rango sintético debe ser posterior al inicio")
+        self.step = (self.end - self.start) / max(events, 1)
+        self._current = self.start
+
+    def now(self):
+        """Devuelve el instante sintético actual y avanza un paso"""
+        current = self._current
+        self._current = current + self.step
+        return current
+
+    def peek(self):
+        """Instante sintético actual sin avanzar"""
+        return self._current
+
+    def advance(self, events):
+        """Avanza un paso por cada uno de events eventos fechados sin now()"""
+        self._current += self.step * events
+
+    @property
+    def exhausted(self):
+        """Indica si ya se recorrió todo el rango"""
+        return self._current >= self.end
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Compresión de la salida de los simuladores (archivo y entrega por HTTP)
+Los eventos JSON repiten las mismas claves y valores ("environment":
+"production", user agents largos), así que comprimen muy bien. Cada
+compresor lleva la cuenta de los bytes de entrada y salida y del tiempo de
+CPU del hilo que comprime, para elegir códec y nivel según lo que sobre en
+la máquina generadora: gzip de la librería estándar siempre; zstd si el
+paquete zstandard está instalado
+"""
+
+import threading
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CODECS = ("none", "gzip", "zstd")
+
+# Extensión del archivo comprimido y nivel por defecto de cada códec
+EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+DEFAULT_LEVELS = {"gzip": 6, "zstd": 3}
+
+
+def check_codec(codec):
+    """Valida el códec; zstd requiere el paquete zstandard"""
+    if codec not in CODECS:
+        raise ValueError(f"códec de compresión desconocido: {codec} (opciones: {', '.join(CODECS)})")
+    if codec == "zstd" and zstandard is None:
+        raise ValueError("zstd requiere el paquete zstandard (pip install zstandard)")
+
+
+class CompressionStats:
+    """Bytes sin comprimir y comprimidos, eventos y CPU dedicada a comprimir"""
+
+    def __init__(self, codec, level):
+        self.codec = codec
+        self.level = level
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+        self.events = 0
+        self.cpu_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, raw_bytes, compressed_bytes, events, cpu_seconds):
+        """Registra un bloque comprimido"""
+        with self._lock:
+            self.raw_bytes += raw_bytes
+            self.compressed_bytes += compressed_bytes
+            self.events += events
+            self.cpu_seconds += cpu_seconds
+
+    def snapshot(self):
+        """Contadores, ratio (sin comprimir / comprimido) y CPU por evento en microsegundos"""
+        with self._lock:
+            return {
+                "codec": self.codec,
+                "level": self.level,
+                "raw_bytes": self.raw_bytes,
+                "compressed_bytes": self.compressed_bytes,
+                "events": self.events,
+                "ratio": self.raw_bytes / self.compressed_bytes if self.compressed_bytes else 0.0,
+                "cpu_us_per_event": self.cpu_seconds * 1e6 / self.events if self.events else 0.0
+            }
+
+    def summary(self):
+        """Texto de reporte: códec, ratio y CPU por evento"""
+        stats = self.snapshot()
+        return (
+            f"{self.codec}-{self.level} x{stats['ratio']:.1f} "
+            f"({stats['raw_bytes'] / 1024 / 1024:.1f} -> {stats['compressed_bytes'] / 1024 / 1024:.1f} MB), "
+            f"CPU {stats['cpu_us_per_event']:.2f} µs/evento"
+        )
+
+
+def _level(codec, level):
+    """Nivel pedido o el de por defecto del códec"""
+    return level if level is not None else DEFAULT_LEVELS[codec]
+
+
+class BlockCompressor:
+    """Compresión de bloques independientes (cuerpos HTTP) con estadísticas"""
+
+    def __init__(self, codec, level=None):
+        check_codec(codec)
+        self.codec = codec
+        self.level = _level(codec, level)
+        self.stats = CompressionStats(codec, self.level)
+        if codec == "zstd":
+            self._zstd = zstandard.ZstdCompressor(level=self.level)
+
+    def compress(self, data, events):
+        """Bloque comprimido de data, que representa events eventos"""
+        cpu = time.thread_time()
+        if self.codec == "gzip":
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+            out = compressor.compress(data) + compressor.flush()
+        else:
+            out = self._zstd.compress(data)
+        self.stats.record(len(data), len(out), events, time.thread_time() - cpu)
+        return out
+
+
+class FrameCompressor:
+    """Un frame comprimido en streaming (un segmento de archivo); cada bloque queda legible al escribirlo"""
+
+    def __init__(self, codec, level=None, stats=None):
+        check_codec(codec)
+        self.codec = codec
+        self.level = _level(codec, level)
+        self.stats = stats or CompressionStats(codec, self.level)
+        if codec == "gzip":
+            self._compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+            self._sync = zlib.Z_SYNC_FLUSH
+        else:
+            self._compressor = zstandard.ZstdCompressor(level=self.level).compressobj()
+            self._sync = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+
+    def compress(self, data, events):
+        """Bytes comprimidos de data; el flush de bloque deja en disco todo lo recibido hasta ahora"""
+        cpu = time.thread_time()
+        out = self._compressor.compress(data) + self._compressor.flush(self._sync)
+        self.stats.record(len(data), len(out), events, time.thread_time() - cpu)
+        return out
+
+    def finish(self):
+        """Cierra el frame (cola gzip o fin de frame zstd)"""
+        cpu = time.thread_time()
+        out = self._compressor.flush()
+        self.stats.record(0, len(out), 0, time.thread_time() - cpu)
+        return out
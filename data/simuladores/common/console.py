@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Eco de eventos a consola fuera del camino caliente
+Con PYTHONUNBUFFERED=1 cada print es una escritura bloqueante a stdout: a
+miles de eventos/s la consola se vuelve el cuello de botella e inunda
+docker logs. El reporter decide con un contador y un token bucket si un
+evento se muestra (1 de cada N, como mucho K líneas/s) antes de formatearlo,
+encola las líneas elegidas y un hilo aparte las escribe en bloque junto con
+una línea de estado periódica por flujo (eventos por categoría y omitidos).
+En los modos por lotes cada lote cuenta como sus eventos y muestra a lo sumo
+una línea
+"""
+
+import logging
+import queue
+import sys
+import threading
+import time
+
+
+class ConsoleReporter:
+    """Muestreo y escritura en segundo plano del eco de eventos de un simulador"""
+
+    def __init__(self, label, every=1, max_rate=20.0, status_interval=10.0, queue_size=1000):
+        self.label = label
+        # Se muestra 1 de cada every eventos y como mucho max_rate líneas/s (0 sin límite)
+        self.every = max(1, int(every))
+        self.max_rate = max_rate
+        self.status_interval = status_interval
+
+        # Contadores del camino caliente: solo los modifica el hilo del simulador (los lee el escritor)
+        self.seen = 0
+        self.shown = 0
+        self.suppressed = 0
+        self.categories = {}
+        self._tokens = max_rate
+        self._last_refill = time.monotonic()
+
+        self.dropped = 0
+        self._lines = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._writer = None
+        self._lock = threading.Lock()
+
+    def sample(self, category=None, count=1):
+        """Cuenta count eventos de la categoría y decide si se muestra uno de ellos (formatear solo si True)"""
+        if self._writer is None:
+            self._ensure_writer()
+        self.seen += count
+        if category is not None:
+            self.categories[category] = self.categories.get(category, 0) + count
+        if self.every > 1 and self.seen % self.every >= count:
+            self.suppressed += count
+            return False
+        if self.max_rate:
+            now = time.monotonic()
+            self._tokens = min(self.max_rate, self._tokens + (now - self._last_refill) * self.max_rate)
+            self._last_refill = now
+            if self._tokens < 1.0:
+                self.suppressed += count
+                return False
+            self._tokens -= 1.0
+        self.suppressed += count - 1
+        self.shown += 1
+        return True
+
+    def tally(self, categories):
+        """Suma los eventos de un lote por categoría ({categoría: eventos}) a la línea de estado"""
+        for category, count in categories.items():
+            self.categories[category] = self.categories.get(category, 0) + count
+
+    def write(self, text):
+        """Encola una línea ya formateada; si la cola está llena se descarta en lugar de bloquear"""
+        try:
+            self._lines.put_nowait(text)
+        except queue.Full:
+            self.dropped += 1
+
+    def status(self):
+        """Línea de estado con los eventos por categoría y lo omitido"""
+        categories = dict(self.categories)
+        total = sum(categories.values())
+        detail = ", ".join(
+            f"{name}: {count} ({count * 100 / total:.0f}%)" for name, count in sorted(categories.items())
+        ) if total else ""
+        return (
+            f"Consola {self.label} - eventos: {self.seen}, mostrados: {self.shown}, omitidos: {self.suppressed}"
+            f"{', descartados: ' + str(self.dropped) if self.dropped else ''}{' | ' + detail if detail else ''}"
+        )
+
+    def close(self):
+        """Escribe lo pendiente y detiene el hilo escritor"""
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join(timeout=2)
+
+    def _ensure_writer(self):
+        """Arranca el hilo escritor con el primer evento"""
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name=f"console-{self.label}", daemon=True)
+                    self._writer.start()
+
+    def _drain(self, lines):
+        """Escribe de una vez las líneas recibidas y todas las que sigan encoladas"""
+        try:
+            while True:
+                lines.append(self._lines.get_nowait())
+        except queue.Empty:
+            pass
+        if lines:
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
+
+    def _write_loop(self):
+        """Vacía la cola en bloques y registra la línea de estado cada status_interval segundos"""
+        next_status = time.monotonic() + self.status_interval if self.status_interval else None
+        reported = 0
+        while not self._stop.is_set():
+            try:
+                self._drain([self._lines.get(timeout=0.2)])
+            except queue.Empty:
+                pass
+            if next_status is not None and time.monotonic() >= next_status:
+                # Sin eventos nuevos no se repite la línea (modo clásico entre ráfagas)
+                if self.seen != reported:
+                    reported = self.seen
+                    logging.info(self.status())
+                next_status = time.monotonic() + self.status_interval
+        self._drain([])
+
+
+def build_console(options, label):
+    """Crea el reporter a partir de console_options ({"every", "max_rate", "status_interval"})"""
+    return ConsoleReporter(label, **(options or {}))
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Codificadores JSON intercambiables para la salida de los simuladores
+Cada evento se serializa una sola vez a bytes terminados en salto de línea
+y esos bytes se reutilizan en todos los destinos (Logstash, archivo, _bulk)
+Si orjson está instalado se usa por defecto; si no, la librería estándar
+"""
+
+import json
+import logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ENCODERS = ("auto", "json", "orjson")
+
+
+class StdlibEncoder:
+    """json de la librería estándar con un JSONEncoder reutilizado (misma salida que json.dumps)"""
+
+    name = "json"
+
+    def __init__(self):
+        self._encode = json.JSONEncoder(check_circular=False).encode
+
+    def dumps(self, obj):
+        """Serializa a str"""
+        return self._encode(obj)
+
+    def line(self, obj):
+        """Serializa a bytes con salto de línea final"""
+        return (self._encode(obj) + '\n').encode('utf-8')
+
+
+class OrjsonEncoder:
+    """orjson: salida compacta en UTF-8, varias veces más rápido que json"""
+
+    name = "orjson"
+
+    def __init__(self):
+        self._dumps = orjson.dumps
+        self._option = orjson.OPT_APPEND_NEWLINE
+
+    def dumps(self, obj):
+        """Serializa a str"""
+        return self._dumps(obj).decode('utf-8')
+
+    def line(self, obj):
+        """Serializa a bytes con salto de línea final"""
+        return self._dumps(obj, option=self._option)
+
+
+def get_encoder(name="auto"):
+    """Devuelve el codificador pedido (auto: orjson si está instalado, si no json)"""
+    name = name or "auto"
+    if name not in ENCODERS:
+        raise ValueError(f"Codificador desconocido: {name} (opciones: {', '.join(ENCODERS)})")
+    if name == "orjson" and orjson is None:
+        logging.warning("orjson no está instalado, se usa el json de la librería estándar")
+        name = "json"
+    if name == "auto":
+        name = "orjson" if orjson is not None else "json"
+    return OrjsonEncoder() if name == "orjson" else StdlibEncoder()
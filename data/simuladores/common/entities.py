@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Pools de entidades de alta cardinalidad para los logs de db y micro
+Usuarios, tenants, tablas, huellas de consultas (con sus parámetros),
+hosts y pods se generan una sola vez al arrancar, con popularidad Zipf, y
+se muestrean por índice con tablas alias: la cardinalidad de cada campo se
+ajusta de cientos a millones sin encarecer la generación por evento.
+Los valores salen de un generador propio derivado de la semilla, así que
+todos los workers comparten las mismas entidades
+"""
+
+import hashlib
+import logging
+import time
+
+from common.sampling import WeightedChoice, zipf_weights
+from common.seeding import derive_seed, make_rng
+
+# Tamaño por defecto de cada pool cuando se activan con --cardinality
+ENTITY_DEFAULTS = {
+    "users": 10000,
+    "tenants": 200,
+    "tables": 60,
+    "queries": 600,
+    "hosts": 40,
+    "pods": 300
+}
+
+TENANT_WORDS = [
+    "acme", "globex", "initech", "umbrella", "hooli", "stark", "wayne", "wonka", "tyrell", "cyberdyne",
+    "soylent", "aperture", "vandelay", "gringotts", "oscorp", "massive", "duff", "monarch", "pied", "vehement"
+]
+
+BASE_TABLES = [
+    "users", "orders", "order_items", "products", "sessions", "payments", "invoices", "events",
+    "audit_log", "carts", "shipments", "inventory", "accounts", "subscriptions", "notifications", "reviews"
+]
+
+# Formas de consulta (dialecto MySQL con ?) y el tipo de valor de cada parámetro
+QUERY_SHAPES = [
+    ("SELECT * FROM {table} WHERE id = ?", ("id",)),
+    ("SELECT * FROM {table} WHERE user_id = ? AND tenant_id = ?", ("user", "tenant")),
+    ("SELECT id, status FROM {table} WHERE user_id IN (?, ?, ?) LIMIT ?", ("user", "user", "user", "limit")),
+    ("SELECT COUNT(*) FROM {table} WHERE tenant_id = ? AND created_at > ?", ("tenant", "date")),
+    ("INSERT INTO {table} (user_id, tenant_id, amount) VALUES (?, ?, ?)", ("user", "tenant", "amount")),
+    ("UPDATE {table} SET status = ? WHERE id = ?", ("status", "id")),
+    ("UPDATE {table} SET updated_at = NOW() WHERE user_id = ? AND tenant_id = ?", ("user", "tenant")),
+    ("DELETE FROM {table} WHERE created_at < ?", ("date",)),
+    ("SELECT t.* FROM {table} t JOIN users u ON u.id = t.user_id WHERE u.id = ?", ("user",)),
+    ("SELECT * FROM {table} WHERE tenant_id = ? ORDER BY created_at DESC LIMIT ?", ("tenant", "limit"))
+]
+
+STATUSES = ["pending", "active", "shipped", "cancelled", "failed", "completed"]
+LIMITS = [10, 20, 50, 100, 500]
+POD_CHARS = "bcdfghjklmnpqrstvwxz2456789"
+
+
+def parse_cardinality(spec):
+    """Convierte 'users=100000,tenants=500' en {entidad: tamaño}; 'default' usa los tamaños por defecto"""
+    sizes = dict(ENTITY_DEFAULTS)
+    if spec.strip() == "default":
+        return sizes
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        kind, _, size = item.partition("=")
+        kind = kind.strip()
+        if kind not in ENTITY_DEFAULTS:
+            raise ValueError(f"entidad desconocida: {kind} (opciones: {', '.join(ENTITY_DEFAULTS)})")
+        try:
+            sizes[kind] = int(size)
+        except ValueError:
+            raise ValueError(f"tamaño inválido para {kind}: {size!r}")
+        if sizes[kind] <= 0:
+            raise ValueError(f"el tamaño de {kind} debe ser positivo")
+    return sizes
+
+
+class EntityPool(WeightedChoice):
+    """Valores de una entidad con popularidad Zipf en un orden aleatorio, muestreados por índice"""
+
+    def __init__(self, values, exponent, rng):
+        values = list(values)
+        # El rango de popularidad no sigue el orden de generación (el usuario 1 no es el más activo)
+        rng.shuffle(values)
+        super().__init__(values, zipf_weights(len(values), exponent))
+
+    def __len__(self):
+        return len(self.values)
+
+    def interned(self, table):
+        """Índice en la StringTable de cada valor del pool, para columnas STR"""
+        return [table.intern(value) for value in self.values]
+
+
+class QueryFingerprint:
+    """Consulta normalizada de una tabla: texto por dialecto, trozos entre parámetros e id estable"""
+
+    __slots__ = ("texts", "pieces", "params", "table", "query_id")
+
+    def __init__(self, shape, params, table):
+        mysql = shape.format(table=table)
+        # Trozos entre parámetros, compartidos por los dos dialectos
+        self.pieces = mysql.split("?")
+        postgresql = self.pieces[0] + "".join(f"${i}{piece}" for i, piece in enumerate(self.pieces[1:], 1))
+        # 0: mysql, 1: postgresql (mismo orden que db_types)
+        self.texts = (mysql, postgresql)
+        self.params = params
+        self.table = table
+        # Id de 64 bits como el queryid de pg_stat_statements (igual en ambos dialectos)
+        self.query_id = hashlib.blake2b(mysql.encode('utf-8'), digest_size=8).hexdigest()
+
+    def render(self, values):
+        """Texto de la consulta con los valores de los parámetros"""
+        pieces = self.pieces
+        out = pieces[0]
+        for value, piece in zip(values, pieces[1:]):
+            out += value + piece
+        return out
+
+
+class EntityPools:
+    """Pools de usuarios, tenants, tablas, consultas, hosts y pods generados al arrancar"""
+
+    def __init__(self, sizes, seed=None, exponent=1.1):
+        started = time.perf_counter()
+        self.seed = seed
+        self.exponent = exponent
+        self.sizes = dict(sizes)
+        rng = make_rng(derive_seed(seed, "entities") if seed is not None else None)
+
+        # Ids numéricos consecutivos, como una clave autoincremental
+        self.users = EntityPool(range(100001, 100001 + sizes["users"]), exponent, rng)
+        self.tenants = EntityPool(
+            (TENANT_WORDS[i % len(TENANT_WORDS)] + (f"-{i // len(TENANT_WORDS)}" if i >= len(TENANT_WORDS) else "")
+             for i in range(sizes["tenants"])),
+            exponent, rng
+        )
+        # Más allá de las tablas base, particiones y shards (orders_0001, ...)
+        self.tables = EntityPool(
+            (BASE_TABLES[i % len(BASE_TABLES)] + (f"_{i // len(BASE_TABLES):04d}" if i >= len(BASE_TABLES) else "")
+             for i in range(sizes["tables"])),
+            exponent, rng
+        )
+        # Cada huella es una forma de consulta sobre una tabla; como mucho formas x tablas distintas
+        count = min(sizes["queries"], len(QUERY_SHAPES) * len(self.tables))
+        self.queries = EntityPool(
+            (QueryFingerprint(*QUERY_SHAPES[i % len(QUERY_SHAPES)], self.tables.values[i // len(QUERY_SHAPES)])
+             for i in range(count)),
+            exponent, rng
+        )
+        # Nombres de nodo tipo EC2: ip-10-x-y-z.internal
+        self.hosts = EntityPool(
+            (f"ip-10-{(i >> 16) & 255}-{(i >> 8) & 255}-{i & 255}.internal" for i in range(1, sizes["hosts"] + 1)),
+            exponent, rng
+        )
+        self._sample_user = self.users.table.sample
+        # Pods por servicio, creados la primera vez que aparece el servicio (dependen solo de la semilla)
+        self._pods = {}
+
+        logging.info(
+            f"Pools de entidades: {', '.join(f'{kind}={len(getattr(self, kind))}' for kind in ('users', 'tenants', 'tables', 'queries', 'hosts'))}, "
+            f"pods={sizes['pods']}, Zipf {exponent} ({time.perf_counter() - started:.1f}s)"
+        )
+
+    def pods(self, service, services_count=10):
+        """Pool de (pod, host) de un servicio: pods de un Deployment repartidos en los nodos"""
+        pool = self._pods.get(service)
+        if pool is None:
+            rng = make_rng(derive_seed(self.seed, "pods", service) if self.seed is not None else None)
+            size = max(1, self.sizes["pods"] // services_count)
+            replica_set = "".join(rng.choice(POD_CHARS) for _ in range(10))
+            names = set()
+            while len(names) < size:
+                names.add(f"{service}-{replica_set}-{''.join(rng.choice(POD_CHARS) for _ in range(5))}")
+            hosts = self.hosts.values
+            host_table = self.hosts.table
+            pool = EntityPool(
+                ((name, hosts[host_table.sample(rng)]) for name in sorted(names)), self.exponent, rng
+            )
+            self._pods[service] = pool
+        return pool
+
+    def param_values(self, params, rng, timestamp, tenant):
+        """Valores SQL de los parámetros de una huella para un evento del tenant indicado"""
+        values = []
+        rand = rng.random
+        for kind in params:
+            if kind == "user":
+                values.append(str(self.users.values[self._sample_user(rng)]))
+            elif kind == "tenant":
+                values.append("'" + tenant + "'")
+            elif kind == "id":
+                values.append(str(1 + int(rand() * 10000000)))
+            elif kind == "amount":
+                values.append(f"{rand() * 500:.2f}")
+            elif kind == "status":
+                values.append("'" + STATUSES[int(rand() * len(STATUSES))] + "'")
+            elif kind == "date":
+                values.append("'" + timestamp[:10] + "'")
+            else:
+                values.append(str(LIMITS[int(rand() * len(LIMITS))]))
+        return values
+
+
+def build_entities(options):
+    """Crea los pools a partir de entity_options ({"sizes", "exponent", "seed"}) o None si no se pidieron"""
+    if not options or not options.get("sizes"):
+        return None
+    return EntityPools(options["sizes"], options.get("seed"), options.get("exponent", 1.1))
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Salida directa a la API _bulk de Elasticsearch, sin pasar por Logstash
+Los documentos (los mismos que indexaría el pipeline, ver bulk_document de
+cada simulador) se agrupan en peticiones acotadas por documentos y bytes que
+envía un pool de hilos, cada uno con su conexión HTTP keep-alive. Los
+documentos rechazados con 429 (cola de escritura llena) se reintentan con
+backoff exponencial; los demás errores por documento cuentan como fallidos
+"""
+
+import atexit
+import base64
+import http.client
+import json
+import logging
+import queue
+import random
+import socket
+import threading
+import time
+from urllib.parse import unquote, urlsplit
+
+from common.bulk_export import bulk_entry
+from common.compression import BlockCompressor
+from common.encoders import get_encoder
+from common.metrics import REGISTRY, sender_metrics
+
+
+class EsBulkSender:
+    """Pool de conexiones keep-alive que indexa documentos con _bulk y reintenta los rechazos"""
+
+    def __init__(self, url, index_prefix, encoder=None, batch_docs=1000, batch_bytes=5 * 1024 * 1024,
+                 workers=2, compress=False, max_retries=5, flush_interval=1.0, timeout=30.0,
+                 backoff_initial=0.5, backoff_max=30.0):
+        parts = urlsplit(url)
+        self.url = f"{parts.scheme or 'http'}://{parts.hostname}:{parts.port or 9200}"
+        self.host = parts.hostname
+        self.port = parts.port or 9200
+        self.https = parts.scheme == "https"
+        self.path = parts.path.rstrip('/') + "/_bulk"
+        self.index_prefix = index_prefix
+        self.encoder = encoder or get_encoder()
+        self.batch_docs = batch_docs
+        self.batch_bytes = batch_bytes
+        self.compress = compress
+        # gzip nivel 1: en _bulk prima el CPU del generador sobre el último punto de ratio
+        self.compressor = BlockCompressor("gzip", 1) if compress else None
+        self.max_retries = max_retries
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+
+        self.headers = {"Content-Type": "application/x-ndjson"}
+        if compress:
+            self.headers["Content-Encoding"] = "gzip"
+        if parts.username:
+            credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+            self.headers["Authorization"] = "Basic " + base64.b64encode(credentials.encode('utf-8')).decode('ascii')
+
+        # Contadores: sent son documentos indexados; rejected cuenta cada rechazo 429 (también los reintentados)
+        self.sent = 0
+        self.failed = 0
+        self.rejected = 0
+        self.retried = 0
+        self.errors = 0
+        self.reconnects = 0
+        self.bytes_sent = 0
+        self.requests = 0
+        self._queued = 0
+        self._closed = False
+        self._last_report = (time.monotonic(), 0)
+
+        self.metric_labels = {"url": self.url, "index": index_prefix}
+        self.send_latency = REGISTRY.histogram(
+            "sim_bulk_latency_seconds", "Segundos de cada petición _bulk a Elasticsearch", **self.metric_labels
+        )
+        REGISTRY.register_collector(self._collect_metrics)
+
+        # Lote en construcción (acción + documento ya codificados) y lotes listos para los workers
+        self._entries = []
+        self._entries_bytes = 0
+        self._lock = threading.Lock()
+        # Cola acotada: si Elasticsearch no da abasto, add() se bloquea y la tasa lograda lo refleja
+        self._batches = queue.Queue(maxsize=workers * 2)
+        self._workers = [
+            threading.Thread(target=self._work, name=f"bulk-{index_prefix}-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        # Hilo que envía el lote en construcción aunque no se llene
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name=f"bulk-{index_prefix}-flush", daemon=True)
+        self._flusher.start()
+
+    def add(self, moment, doc):
+        """Agrega un documento con su instante (datetime con zona) al índice diario"""
+        _, entry = bulk_entry(self.index_prefix, moment, doc, self.encoder)
+        batch = None
+        with self._lock:
+            self._entries.append(entry)
+            self._entries_bytes += len(entry)
+            if len(self._entries) >= self.batch_docs or self._entries_bytes >= self.batch_bytes:
+                batch = self._take_locked()
+        if batch:
+            self._batches.put(batch)
+
+    def flush(self):
+        """Pasa el lote en construcción a los workers"""
+        with self._lock:
+            batch = self._take_locked()
+        if batch:
+            self._batches.put(batch)
+
+    def stats(self):
+        """Devuelve los contadores actuales (mismas claves que LogstashSender más las de _bulk)"""
+        with self._lock:
+            return {
+                "sent": self.sent,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "retried": self.retried,
+                "reconnects": self.reconnects,
+                "bytes_sent": self.bytes_sent,
+                "errors": self.errors,
+                "requests": self.requests,
+                "buffered": self._queued + len(self._entries)
+            }
+
+    def summary(self):
+        """Línea de reporte con la tasa de indexación desde el reporte anterior"""
+        stats = self.stats()
+        now = time.monotonic()
+        last_time, last_sent = self._last_report
+        self._last_report = (now, stats["sent"])
+        rate = (stats["sent"] - last_sent) / (now - last_time) if now > last_time else 0.0
+        return (
+            f"Elasticsearch {self.url} ({self.index_prefix}) - indexados: {stats['sent']} ({rate:,.0f} docs/s), "
+            f"rechazos 429: {stats['rejected']}, reintentados: {stats['retried']}, fallidos: {stats['failed']}, "
+            f"peticiones: {stats['requests']}, pendientes: {stats['buffered']}, bytes: {stats['bytes_sent']}"
+            f"{', ' + self.compressor.stats.summary() if self.compressor is not None else ''}"
+        )
+
+    def _collect_metrics(self):
+        """Muestras de los contadores para el endpoint de métricas"""
+        stats = self.stats()
+        return sender_metrics(stats, self.metric_labels) + [
+            ("sim_bulk_rejected_total", "counter", "Documentos rechazados con 429 por Elasticsearch",
+             self.metric_labels, stats["rejected"]),
+            ("sim_bulk_retried_total", "counter", "Documentos reenviados tras un rechazo o error",
+             self.metric_labels, stats["retried"])
+        ]
+
+    def close(self):
+        """Envía lo pendiente, espera a los workers y cierra sus conexiones"""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        self._flusher.join(timeout=self.flush_interval * 2)
+        self.flush()
+        for _ in self._workers:
+            self._batches.put(None)
+        # Espera acotada: un worker colgado en una petición no bloquea la salida del simulador
+        deadline = time.monotonic() + self.timeout
+        for worker in self._workers:
+            worker.join(timeout=max(deadline - time.monotonic(), 0))
+        alive = sum(worker.is_alive() for worker in self._workers)
+        if alive:
+            logging.error(f"_bulk a {self.url}: {alive} workers sin terminar tras {self.timeout:.0f}s, "
+                          f"{self.stats()['buffered']} documentos pendientes descartados")
+
+    def _take_locked(self):
+        """Saca el lote en construcción (requiere self._lock)"""
+        batch = self._entries
+        self._entries = []
+        self._entries_bytes = 0
+        self._queued += len(batch)
+        return batch
+
+    def _flush_loop(self):
+        """Envía el lote en construcción cada flush_interval segundos"""
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def _work(self):
+        """Bucle de un worker: una conexión keep-alive que envía lotes hasta recibir None"""
+        conn = None
+        while True:
+            batch = self._batches.get()
+            if batch is None:
+                break
+            try:
+                conn = self._deliver(conn, batch)
+            except Exception as e:
+                # Un error inesperado descarta el lote pero no mata al worker
+                logging.error(f"_bulk a {self.url}: error inesperado, {len(batch)} documentos descartados: {e}")
+                if conn is not None:
+                    conn.close()
+                conn = None
+                with self._lock:
+                    self.errors += 1
+                    self.failed += len(batch)
+            finally:
+                with self._lock:
+                    self._queued -= len(batch)
+        if conn is not None:
+            conn.close()
+
+    def _connect(self, first):
+        """Abre una conexión HTTP persistente hacia Elasticsearch"""
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        conn = cls(self.host, self.port, timeout=self.timeout)
+        if not first:
+            with self._lock:
+                self.reconnects += 1
+        return conn
+
+    def _post(self, conn, entries):
+        """Envía una petición _bulk; devuelve (status, cuerpo de la respuesta)"""
+        body = b''.join(entries)
+        if self.compressor is not None:
+            body = self.compressor.compress(body, len(entries))
+        started = time.perf_counter()
+        if conn.sock is None:
+            conn.connect()
+            # Cabeceras y cuerpo van en escrituras separadas: sin Nagle no esperan al ACK retardado
+            conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn.request("POST", self.path, body, self.headers)
+        response = conn.getresponse()
+        data = response.read()
+        self.send_latency.observe(time.perf_counter() - started)
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += len(body)
+        return response.status, data
+
+    def _deliver(self, conn, entries):
+        """Indexa un lote reintentando los 429 y los errores de conexión; devuelve la conexión a reutilizar"""
+        backoff = self.backoff_initial
+        first = conn is None
+        for attempt in range(self.max_retries + 1):
+            if conn is None:
+                conn = self._connect(first)
+                first = False
+            try:
+                status, data = self._post(conn, entries)
+            except (OSError, http.client.HTTPException) as e:
+                logging.error(f"Error enviando _bulk a {self.url}: {e} (reintento en {backoff:.1f}s)")
+                conn.close()
+                conn = None
+                with self._lock:
+                    self.errors += 1
+                retry = entries
+            else:
+                retry = self._handle_response(status, data, entries)
+            if not retry:
+                return conn
+            if attempt == self.max_retries:
+                break
+            entries = retry
+            with self._lock:
+                self.retried += len(entries)
+            # Backoff con jitter para que los workers no reintenten todos a la vez
+            time.sleep(backoff * random.uniform(0.5, 1.0))
+            backoff = min(backoff * 2, self.backoff_max)
+
+        logging.error(f"_bulk a {self.url}: {len(retry)} documentos descartados tras {self.max_retries} reintentos")
+        with self._lock:
+            self.failed += len(retry)
+        return conn
+
+    def _handle_response(self, status, data, entries):
+        """Cuenta el resultado de una respuesta _bulk y devuelve las entradas a reintentar"""
+        if status == 429 or status >= 500:
+            # Petición completa rechazada (cola llena o nodo no disponible): se reintenta entera
+            with self._lock:
+                self.rejected += len(entries) if status == 429 else 0
+                self.errors += status >= 500
+            return entries
+        if status >= 300:
+            logging.error(f"_bulk a {self.url} respondió {status}: {data[:200]!r} ({len(entries)} documentos descartados)")
+            with self._lock:
+                self.errors += 1
+                self.failed += len(entries)
+            return []
+
+        try:
+            result = json.loads(data)
+            items = result["items"] if result.get("errors") else None
+        except (ValueError, KeyError, TypeError, AttributeError):
+            # Cuerpo cortado o que no es la respuesta de _bulk: no se sabe qué se indexó, se reintenta el lote
+            logging.error(f"_bulk a {self.url}: respuesta {status} ilegible ({data[:200]!r}), se reintenta el lote")
+            with self._lock:
+                self.errors += 1
+            return entries
+        if items is None:
+            with self._lock:
+                self.sent += len(entries)
+            return []
+
+        retry = []
+        indexed = failed = 0
+        reason = None
+        for entry, item in zip(entries, items):
+            outcome = next(iter(item.values()))
+            item_status = outcome.get("status", 500)
+            if item_status < 300:
+                indexed += 1
+            elif item_status == 429:
+                retry.append(entry)
+            else:
+                failed += 1
+                reason = reason or outcome.get("error")
+        if reason is not None:
+            logging.error(f"_bulk a {self.url}: {failed} documentos rechazados, primer error: {reason}")
+        with self._lock:
+            self.sent += indexed
+            self.failed += failed
+            self.rejected += len(retry)
+        return retry
+
+
+# Senders abiertos, para cerrarlos al salir
+_senders = []
+_senders_lock = threading.Lock()
+
+
+def build_es_sender(options, index_prefix, encoder=None):
+    """Crea el sender _bulk a partir de es_options ({"url", "batch_docs", ...}) o None si no hay"""
+    if not options:
+        return None
+    sender = EsBulkSender(index_prefix=index_prefix, encoder=encoder, **options)
+    logging.info(
+        f"Salida directa a Elasticsearch {sender.url}: lotes de {sender.batch_docs} docs / "
+        f"{sender.batch_bytes / 1024 / 1024:.1f} MB, {len(sender._workers)} workers"
+        f"{', gzip' if sender.compress else ''}"
+    )
+    with _senders_lock:
+        _senders.append(sender)
+    return sender
+
+
+def close_all():
+    """Envía lo pendiente y cierra todos los senders _bulk abiertos"""
+    with _senders_lock:
+        senders = list(_senders)
+        _senders.clear()
+    for sender in senders:
+        sender.close()
+
+
+atexit.register(close_all)
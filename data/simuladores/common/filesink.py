@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Escritura de logs a archivo con buffer y rotación
+Mantiene el archivo abierto, agrupa las líneas en escrituras grandes y rota
+por tamaño y/o tiempo, comprimiendo opcionalmente los segmentos rotados con
+gzip y conservando solo los últimos backup_count. Con codec (gzip o zstd) el
+archivo activo se escribe ya comprimido: cada segmento de rotación es un
+frame propio y cada vaciado del buffer cierra un bloque, así que lo escrito
+se puede leer (zcat, zstdcat) sin esperar a la rotación
+"""
+
+import glob
+import gzip
+import logging
+import os
+import shutil
+import threading
+import time
+
+from common.compression import DEFAULT_LEVELS, EXTENSIONS, CompressionStats, FrameCompressor, check_codec
+
+FSYNC_POLICIES = ("never", "flush", "rotate")
+
+
+def worker_log_path(path, index):
+    """Ruta del archivo de log de un worker: web-logs.log -> web-logs.w2.log"""
+    base, ext = os.path.splitext(path)
+    return f"{base}.w{index}{ext}"
+
+
+class RotatingFileSink:
+    """Archivo de log con buffer en memoria, rotación y política de fsync"""
+
+    def __init__(self, path, buffer_bytes=256 * 1024, flush_interval=1.0,
+                 max_bytes=100 * 1024 * 1024, rotate_interval=0, backup_count=5,
+                 compress=False, fsync="never", codec="none", codec_level=None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Política de fsync desconocida: {fsync} (opciones: {', '.join(FSYNC_POLICIES)})")
+        check_codec(codec)
+
+        # Con codec el archivo activo y los segmentos llevan la extensión del códec al final
+        self._base_path = path
+        self._extension = EXTENSIONS.get(codec, "")
+        self.path = path + self._extension
+        self.buffer_bytes = buffer_bytes
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        # La compresión de los segmentos rotados sobra si el archivo ya se escribe comprimido
+        self.compress = compress and codec == "none"
+        self.fsync = fsync
+        self.codec = codec
+        self._codec_level = codec_level or DEFAULT_LEVELS.get(codec)
+        self.compression = CompressionStats(codec, self._codec_level) if codec != "none" else None
+        self._frame = None
+
+        # Contadores de escritura
+        self.written = 0
+        self.bytes_written = 0
+        self.rotations = 0
+        # Escrituras fallidas y eventos perdidos en ellas (un vaciado lleva muchos eventos)
+        self.errors = 0
+        self.lost = 0
+
+        self._file = None
+        self._size = 0
+        self._opened_at = 0.0
+        self._failing = False
+        self._compressors = []
+
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._buffered_events = 0
+        self._lock = threading.Lock()
+
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name=f"filesink-{os.path.basename(path)}", daemon=True
+        )
+        self._flusher.start()
+
+    def write(self, line):
+        """Encola una línea de log (sin salto de línea final)"""
+        self.write_bytes((line + '\n').encode('utf-8'))
+
+    def write_bytes(self, data, count=1):
+        """Encola bytes ya terminados en salto de línea que representan count eventos"""
+        with self._lock:
+            self._buffer.append(data)
+            self._buffered_bytes += len(data)
+            self._buffered_events += count
+            if self._buffered_bytes >= self.buffer_bytes:
+                self._flush_locked()
+
+    def flush(self):
+        """Escribe a disco todo lo que haya en el buffer"""
+        with self._lock:
+            self._flush_locked()
+
+    def stats(self):
+        """Devuelve los contadores actuales del archivo"""
+        with self._lock:
+            return {
+                "written": self.written,
+                "bytes_written": self.bytes_written,
+                "rotations": self.rotations,
+                "errors": self.errors,
+                "lost": self.lost,
+                "buffered": self._buffered_events
+            }
+
+    def compression_summary(self):
+        """Línea de reporte de la compresión del archivo (None si se escribe sin comprimir)"""
+        if self.compression is None:
+            return None
+        return f"Compresión {self.path} - {self.compression.summary()}"
+
+    def close(self):
+        """Detiene el hilo de vaciado, escribe lo pendiente y cierra el archivo"""
+        self._stop.set()
+        self._flusher.join(timeout=self.flush_interval * 2)
+        with self._lock:
+            self._flush_locked()
+            self._close_file(self.fsync != "never")
+        for compressor in self._compressors:
+            compressor.join()
+
+    def _flush_loop(self):
+        """Vacía el buffer periódicamente cada flush_interval segundos"""
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def _flush_locked(self):
+        """Escribe el buffer con un único write (requiere self._lock)"""
+        if not self._buffer:
+            return
+
+        payload = b''.join(self._buffer)
+        count = self._buffered_events
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._buffered_events = 0
+
+        try:
+            if self._file is None:
+                self._open_file()
+            if self._frame is not None:
+                payload = self._frame.compress(payload, count)
+            self._file.write(payload)
+            self._file.flush()
+            if self.fsync == "flush":
+                os.fsync(self._file.fileno())
+        except OSError as e:
+            self.errors += 1
+            self.lost += count
+            # Un solo mensaje por racha de errores para no inundar la consola
+            if not self._failing:
+                logging.error(f"Error escribiendo archivo {self.path}: {e}")
+                self._failing = True
+            # Un frame a medias no se puede cerrar bien: el siguiente vaciado abre uno nuevo
+            self._frame = None
+            self._close_file(False)
+            return
+
+        self._failing = False
+        self.written += count
+        self.bytes_written += len(payload)
+        self._size += len(payload)
+
+        if self._should_rotate():
+            self._rotate()
+
+    def _open_file(self):
+        """Abre el archivo en modo append y toma su tamaño actual"""
+        self._file = open(self.path, 'ab')
+        self._size = self._file.tell()
+        self._opened_at = time.monotonic()
+        if self.compression is not None:
+            # Un frame por apertura: gzip y zstd leen frames concatenados como un solo flujo
+            self._frame = FrameCompressor(self.codec, self._codec_level, self.compression)
+
+    def _close_file(self, sync):
+        """Cierra el archivo actual, con fsync si se pide"""
+        if self._file is None:
+            return
+        try:
+            if self._frame is not None:
+                tail = self._frame.finish()
+                self._frame = None
+                self._file.write(tail)
+                self._size += len(tail)
+                self.bytes_written += len(tail)
+            if sync:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._file.close()
+        except OSError as e:
+            logging.error(f"Error cerrando archivo {self.path}: {e}")
+        self._file = None
+
+    def _should_rotate(self):
+        """Indica si el archivo superó el tamaño o la antigüedad máximos"""
+        if self.max_bytes and self._size >= self.max_bytes:
+            return True
+        return bool(self.rotate_interval) and time.monotonic() - self._opened_at >= self.rotate_interval
+
+    def _rotate(self):
+        """Renombra el archivo actual a un segmento con sello de tiempo"""
+        self._close_file(self.fsync in ("flush", "rotate"))
+
+        # Sello de tiempo más secuencia creciente para varias rotaciones en el mismo segundo
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        segment = f"{self._base_path}.{stamp}-{self.rotations:06d}{self._extension}"
+        while os.path.exists(segment) or os.path.exists(segment + ".gz"):
+            self.rotations += 1
+            segment = f"{self._base_path}.{stamp}-{self.rotations:06d}{self._extension}"
+
+        try:
+            os.replace(self.path, segment)
+        except OSError as e:
+            logging.error(f"Error rotando archivo {self.path}: {e}")
+            return
+        self.rotations += 1
+
+        if self.compress:
+            # Comprimir fuera del hilo de escritura
+            self._compressors = [c for c in self._compressors if c.is_alive()]
+            compressor = threading.Thread(target=self._compress_segment, args=(segment,), daemon=True)
+            compressor.start()
+            self._compressors.append(compressor)
+        else:
+            self._prune_segments()
+
+    def _compress_segment(self, segment):
+        """Comprime un segmento rotado con gzip y elimina el original"""
+        try:
+            with open(segment, 'rb') as src, gzip.open(segment + ".gz", 'wb', compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.remove(segment)
+        except OSError as e:
+            logging.error(f"Error comprimiendo {segment}: {e}")
+        self._prune_segments()
+
+    def _prune_segments(self):
+        """Elimina los segmentos rotados más antiguos por encima de backup_count"""
+        # Los nombres llevan sello de tiempo, así que el orden alfabético es cronológico
+        pattern = glob.escape(self._base_path) + (".*.gz" if self.compress else ".*" + self._extension)
+        segments = sorted(glob.glob(pattern))
+        for old in segments[:max(len(segments) - self.backup_count, 0)]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Envío por lotes comprimidos al input http de Logstash
+Alternativa a los inputs tcp para máquinas generadoras con poco ancho de
+banda: las líneas se agrupan en lotes de hasta batch_bytes, cada lote viaja
+como una petición POST application/x-ndjson comprimida con gzip
+(Content-Encoding, que el input http descomprime) y un pool de hilos los
+envía por conexiones keep-alive. Los 429 (cola de Logstash llena), los 5xx
+y los errores de conexión se reintentan con backoff exponencial
+"""
+
+import atexit
+import http.client
+import logging
+import queue
+import random
+import socket
+import threading
+import time
+
+from common.compression import BlockCompressor
+from common.loader import FAMILIES
+from common.metrics import REGISTRY, sender_metrics
+
+# Códecs que acepta el input http de Logstash en Content-Encoding
+HTTP_CODECS = ("none", "gzip")
+
+
+class LogstashHttpSender:
+    """Pool de conexiones keep-alive que envía lotes NDJSON comprimidos al input http de Logstash"""
+
+    def __init__(self, host, port, codec="gzip", level=1, batch_bytes=1024 * 1024, workers=2,
+                 flush_interval=0.5, timeout=30.0, max_retries=5, backoff_initial=0.5, backoff_max=30.0):
+        if codec not in HTTP_CODECS:
+            raise ValueError(f"el input http de Logstash no acepta {codec} (opciones: {', '.join(HTTP_CODECS)})")
+        self.host = host
+        self.port = port
+        self.url = f"http://{host}:{port}"
+        self.batch_bytes = batch_bytes
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.compressor = BlockCompressor(codec, level) if codec != "none" else None
+
+        self.headers = {"Content-Type": "application/x-ndjson"}
+        if self.compressor is not None:
+            self.headers["Content-Encoding"] = codec
+
+        # Contadores: mismas claves que LogstashSender (bytes_sent son bytes en la red, ya comprimidos)
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.rejected = 0
+        self.reconnects = 0
+        self.bytes_sent = 0
+        self.errors = 0
+        self.requests = 0
+        self._queued = 0
+        self._closed = False
+        self._last_report = (time.monotonic(), 0)
+
+        self.metric_labels = {"host": host, "port": str(port)}
+        self.send_latency = REGISTRY.histogram(
+            "sim_send_latency_seconds", "Segundos de cada escritura por lotes hacia Logstash", **self.metric_labels
+        )
+        REGISTRY.register_collector(self._collect_metrics)
+
+        # Lote en construcción y lotes listos (cuerpo sin comprimir, eventos) para los workers
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._buffered_events = 0
+        self._lock = threading.Lock()
+        # Cola acotada: si Logstash no da abasto, send_bytes() se bloquea y la tasa lograda lo refleja
+        self._batches = queue.Queue(maxsize=workers * 2)
+        self._workers = [
+            threading.Thread(target=self._work, name=f"http-{port}-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        # Hilo que envía el lote en construcción aunque no se llene
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name=f"http-{port}-flush", daemon=True)
+        self._flusher.start()
+
+    def send(self, line):
+        """Encola una línea de log (sin salto de línea final)"""
+        self.send_bytes((line + '\n').encode('utf-8'))
+
+    def send_bytes(self, data, count=1):
+        """Encola bytes ya terminados en salto de línea que representan count eventos"""
+        batch = None
+        with self._lock:
+            self._buffer.append(data)
+            self._buffered_bytes += len(data)
+            self._buffered_events += count
+            if self._buffered_bytes >= self.batch_bytes:
+                batch = self._take_locked()
+        if batch:
+            self._batches.put(batch)
+
+    def flush(self):
+        """Pasa el lote en construcción a los workers"""
+        with self._lock:
+            batch = self._take_locked()
+        if batch:
+            self._batches.put(batch)
+
+    def stats(self):
+        """Devuelve los contadores actuales (mismas claves que LogstashSender más las del lote HTTP)"""
+        with self._lock:
+            stats = {
+                "sent": self.sent,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "retried": self.retried,
+                "reconnects": self.reconnects,
+                "bytes_sent": self.bytes_sent,
+                "errors": self.errors,
+                "requests": self.requests,
+                "buffered": self._queued + self._buffered_events
+            }
+        if self.compressor is not None:
+            compression = self.compressor.stats.snapshot()
+            stats.update(raw_bytes=compression["raw_bytes"], ratio=compression["ratio"],
+                         compress_us_per_event=compression["cpu_us_per_event"])
+        return stats
+
+    def summary(self):
+        """Línea de reporte con la tasa de envío desde el reporte anterior y la compresión"""
+        stats = self.stats()
+        now = time.monotonic()
+        last_time, last_sent = self._last_report
+        self._last_report = (now, stats["sent"])
+        rate = (stats["sent"] - last_sent) / (now - last_time) if now > last_time else 0.0
+        return (
+            f"Logstash HTTP {self.url} - enviados: {stats['sent']} ({rate:,.0f} ev/s), "
+            f"rechazos 429: {stats['rejected']}, reintentados: {stats['retried']}, fallidos: {stats['failed']}, "
+            f"peticiones: {stats['requests']}, pendientes: {stats['buffered']}, bytes: {stats['bytes_sent']}"
+            f"{', ' + self.compressor.stats.summary() if self.compressor is not None else ''}"
+        )
+
+    def spool_summary(self):
+        """Sin spool en disco: los lotes se reintentan en memoria"""
+        return None
+
+    def _collect_metrics(self):
+        """Muestras de los contadores para el endpoint de métricas"""
+        stats = self.stats()
+        samples = sender_metrics(stats, self.metric_labels)
+        if self.compressor is not None:
+            samples += [
+                ("sim_raw_bytes_total", "counter", "Bytes antes de comprimir enviados a Logstash",
+                 self.metric_labels, stats["raw_bytes"]),
+                ("sim_compression_ratio", "gauge", "Bytes sin comprimir por byte comprimido",
+                 self.metric_labels, stats["ratio"])
+            ]
+        return samples
+
+    def close(self):
+        """Envía lo pendiente, espera a los workers y cierra sus conexiones"""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        self._flusher.join(timeout=self.flush_interval * 2)
+        self.flush()
+        for _ in self._workers:
+            self._batches.put(None)
+        for worker in self._workers:
+            worker.join()
+
+    def _take_locked(self):
+        """Saca el lote en construcción como (cuerpo, eventos) (requiere self._lock)"""
+        if not self._buffer:
+            return None
+        batch = (b''.join(self._buffer), self._buffered_events)
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._buffered_events = 0
+        self._queued += batch[1]
+        return batch
+
+    def _flush_loop(self):
+        """Envía el lote en construcción cada flush_interval segundos"""
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def _work(self):
+        """Bucle de un worker: una conexión keep-alive que envía lotes hasta recibir None"""
+        conn = None
+        while True:
+            batch = self._batches.get()
+            if batch is None:
+                break
+            body, count = batch
+            if self.compressor is not None:
+                # Se comprime en el worker, fuera del hilo que genera los eventos
+                body = self.compressor.compress(body, count)
+            conn = self._deliver(conn, body, count)
+            with self._lock:
+                self._queued -= count
+        if conn is not None:
+            conn.close()
+
+    def _post(self, conn, body):
+        """Envía un lote; devuelve (status, cuerpo de la respuesta)"""
+        started = time.perf_counter()
+        if conn.sock is None:
+            conn.connect()
+            # Cabeceras y cuerpo van en escrituras separadas: sin Nagle no esperan al ACK retardado
+            conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn.request("POST", "/", body, self.headers)
+        response = conn.getresponse()
+        data = response.read()
+        self.send_latency.observe(time.perf_counter() - started)
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += len(body)
+        return response.status, data
+
+    def _deliver(self, conn, body, count):
+        """Envía un lote reintentando los 429, 5xx y errores de conexión; devuelve la conexión a reutilizar"""
+        backoff = self.backoff_initial
+        first = conn is None
+        for attempt in range(self.max_retries + 1):
+            if conn is None:
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                if not first:
+                    with self._lock:
+                        self.reconnects += 1
+                first = False
+            try:
+                status, data = self._post(conn, body)
+            except (OSError, http.client.HTTPException) as e:
+                logging.error(f"Error enviando a {self.url}: {e} (reintento en {backoff:.1f}s)")
+                conn.close()
+                conn = None
+                with self._lock:
+                    self.errors += 1
+            else:
+                if status < 300:
+                    with self._lock:
+                        self.sent += count
+                    return conn
+                if status != 429 and status < 500:
+                    logging.error(f"{self.url} respondió {status}: {data[:200]!r} ({count} eventos descartados)")
+                    with self._lock:
+                        self.errors += 1
+                        self.failed += count
+                    return conn
+                with self._lock:
+                    self.rejected += count if status == 429 else 0
+                    self.errors += status >= 500
+            if attempt == self.max_retries:
+                break
+            with self._lock:
+                self.retried += count
+            # Backoff con jitter para que los workers no reintenten todos a la vez
+            time.sleep(backoff * random.uniform(0.5, 1.0))
+            backoff = min(backoff * 2, self.backoff_max)
+
+        logging.error(f"{self.url}: {count} eventos descartados tras {self.max_retries} reintentos")
+        with self._lock:
+            self.failed += count
+        return conn
+
+
+# Senders abiertos, para cerrarlos al salir
+_senders = []
+_senders_lock = threading.Lock()
+
+
+def build_http_sender(options, host, family, default_port=None):
+    """Crea el sender HTTP a partir de http_options ({"port", "codec", ...}) o None si no se pidió"""
+    if not options:
+        return None
+    options = dict(options)
+    # Puerto: el de la opción, el del escenario o el de la familia en logstash.conf
+    port = options.pop("port", None) or default_port or FAMILIES[family]["http_port"]
+    sender = LogstashHttpSender(host, port, **options)
+    logging.info(
+        f"Salida al input http de Logstash {sender.url}: lotes de {sender.batch_bytes / 1024:.0f} KB, "
+        f"{len(sender._workers)} workers"
+        f"{f', {sender.compressor.codec}-{sender.compressor.level}' if sender.compressor is not None else ', sin comprimir'}"
+    )
+    with _senders_lock:
+        _senders.append(sender)
+    return sender
+
+
+def close_all():
+    """Envía lo pendiente y cierra todos los senders HTTP abiertos"""
+    with _senders_lock:
+        senders = list(_senders)
+        _senders.clear()
+    for sender in senders:
+        sender.close()
+
+
+atexit.register(close_all)
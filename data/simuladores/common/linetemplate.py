@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Plantilla compilada de líneas de servidor web sobre bytes
+Los fragmentos constantes se codifican una sola vez al arrancar: prefijo
+del servidor, IP, cada combinación método + endpoint + protocolo, cada par
+referrer/user agent, códigos de estado y tamaños de respuesta. Una línea
+queda en siete trozos ya codificados que se anexan a un bytearray por lote,
+sin formatear ni codificar texto por evento (solo el timestamp, una vez por
+segundo del reloj). Los mismos siete cortes sirven para todos los formatos
+de salida, así que cambiar de formato no cambia el coste por evento:
+  raw         [Server-NN] + línea Apache combined en texto plano (el codec
+              json_lines de Logstash la guarda con _jsonparsefailure)
+  json        {"server", "message"} con la línea Apache combined, que el
+              grok %{COMBINEDAPACHELOG} del pipeline parsea
+  nginx       igual, con el formato main de Nginx (combined más
+              "$http_x_forwarded_for"), que el mismo grok también reconoce
+  structured  los campos que extraería el grok, ya separados: el pipeline
+              no necesita ejecutar grok
+"""
+
+from json.encoder import encode_basestring_ascii
+
+WEB_FORMATS = ("raw", "json", "nginx", "structured")
+
+
+def _quoted(text):
+    """Texto escapado para ir dentro de un string JSON (sin las comillas de los extremos)"""
+    return encode_basestring_ascii(text)[1:-1]
+
+
+def _pieces(fmt, protocol):
+    """Funciones que generan cada corte constante de una línea en el formato indicado"""
+    version = protocol.partition("/")[2]
+    if fmt == "raw":
+        return {
+            "prefix": lambda server: f"[{server}] " if server else "",
+            "ip": lambda ip: ip + " - - [",
+            "request": lambda method, endpoint: f'] "{method} {endpoint} {protocol}" ',
+            "status": lambda status: f"{status} ",
+            "tail": lambda referrer, agent: f' "{referrer}" "{agent}"\n'
+        }
+    if fmt in ("json", "nginx"):
+        # La línea de texto va escapada dentro de "message"
+        forwarded = ' "-"' if fmt == "nginx" else ""
+        return {
+            "prefix": lambda server: '{"server": ' + encode_basestring_ascii(server or "-") + ', "message": "',
+            "ip": lambda ip: _quoted(ip + " - - ["),
+            "request": lambda method, endpoint: _quoted(f'] "{method} {endpoint} {protocol}" '),
+            "status": lambda status: f"{status} ",
+            "tail": lambda referrer, agent: _quoted(f' "{referrer}" "{agent}"{forwarded}') + '"}\n'
+        }
+    if fmt == "structured":
+        # Nombres de campo de %{COMBINEDAPACHELOG} (como parse_combined), sin message
+        return {
+            "prefix": lambda server: '{"server": ' + encode_basestring_ascii(server or "-") + ', "clientip": "',
+            "ip": lambda ip: _quoted(ip) + '", "ident": "-", "auth": "-", "timestamp": "',
+            "request": lambda method, endpoint: (
+                f'", "verb": {encode_basestring_ascii(method)}, "request": {encode_basestring_ascii(endpoint)}, '
+                f'"httpversion": {encode_basestring_ascii(version)}, "response": '
+            ),
+            "status": lambda status: f'{status}, "bytes": ',
+            "tail": lambda referrer, agent: (
+                f', "referrer": {encode_basestring_ascii(referrer)}, "agent": {encode_basestring_ascii(agent)}}}\n'
+            )
+        }
+    raise ValueError(f"formato web desconocido: {fmt} (opciones: {', '.join(WEB_FORMATS)})")
+
+
+def render_fields(fmt, server, fields):
+    """Una línea (str con salto final) a partir de los campos de parse_combined, para eventos sueltos como las sondas"""
+    pieces = _pieces(fmt, "HTTP/" + fields["httpversion"])
+    return (
+        pieces["prefix"](server) + pieces["ip"](fields["clientip"]) + fields["timestamp"]
+        + pieces["request"](fields["verb"], fields["request"]) + pieces["status"](fields["response"])
+        + str(fields["bytes"]) + pieces["tail"](fields["referrer"], fields["agent"])
+    )
+
+
+class ApacheLineTemplate:
+    """Fragmentos precodificados de un formato de línea web y ensamblado de líneas por índices"""
+
+    def __init__(self, fleet_ids, ips, methods, endpoints, referrers, agents, max_size=50000,
+                 protocol="HTTP/1.1", fmt="raw"):
+        self.format = fmt
+        pieces = _pieces(fmt, protocol)
+        self._status_piece = pieces["status"]
+        self.prefixes = {
+            server_id: pieces["prefix"](f"Server-{server_id:02d}").encode('utf-8') for server_id in fleet_ids
+        }
+        self.no_prefix = pieces["prefix"](None).encode('utf-8')
+        self.ips = [pieces["ip"](ip).encode('utf-8') for ip in ips]
+        # Petición completa por combinación: requests[método][endpoint]
+        self.requests = [
+            [pieces["request"](method, endpoint).encode('utf-8') for endpoint in endpoints]
+            for method in methods
+        ]
+        self.tails = [
+            [pieces["tail"](referrer, agent).encode('utf-8') for agent in agents]
+            for referrer in referrers
+        ]
+        self.statuses = {}
+        # Tamaños de respuesta ya convertidos a texto (los rangos por código están acotados)
+        self.sizes = [b"%d" % size for size in range(max_size + 1)]
+        self._last_timestamp = None
+        self._last_encoded = b""
+
+    def status(self, status):
+        """Fragmento del código de estado, codificado la primera vez que aparece"""
+        fragment = self.statuses.get(status)
+        if fragment is None:
+            fragment = self.statuses[status] = self._status_piece(status).encode('ascii')
+        return fragment
+
+    def timestamp(self, timestamp):
+        """Timestamp codificado; el reloj repite el mismo string durante todo un segundo"""
+        if timestamp != self._last_timestamp:
+            self._last_timestamp = timestamp
+            self._last_encoded = timestamp.encode('ascii')
+        return self._last_encoded
+
+    def render(self, server_id, ip, timestamp, method, endpoint, status, size, referrer, agent):
+        """Una línea con salto final a partir de los índices de cada tabla (server_id None sin servidor)"""
+        return b"".join((
+            self.prefixes[server_id] if server_id is not None else self.no_prefix,
+            self.ips[ip], self.timestamp(timestamp), self.requests[method][endpoint],
+            self.status(status), self.sizes[size], self.tails[referrer][agent]
+        ))
+
+    def render_columns(self, columns):
+        """Todo un lote en columnas (las del schema Apache de WebLogSimulator) como bytes"""
+        prefixes = self.prefixes
+        ips = self.ips
+        requests = self.requests
+        statuses = self.statuses
+        status_fragment = self.status
+        sizes = self.sizes
+        tails = self.tails
+        timestamp = self.timestamp
+
+        out = bytearray()
+        last_stamp = None
+        stamp = b""
+        for server_id, ip, moment, method, endpoint, status, size, referrer, agent in zip(
+                columns["server_id"], columns["ip"], columns["timestamp"], columns["method"],
+                columns["endpoint"], columns["status"], columns["bytes"], columns["referrer"], columns["agent"]):
+            if moment is not last_stamp:
+                last_stamp = moment
+                stamp = timestamp(moment)
+            out += prefixes[server_id]
+            out += ips[ip]
+            out += stamp
+            out += requests[method][endpoint]
+            out += statuses.get(status) or status_fragment(status)
+            out += sizes[size]
+            out += tails[referrer][agent]
+        return bytes(out)
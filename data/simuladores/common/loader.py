@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Carga de las clases de los simuladores desde sus scripts
+En el repositorio cada script vive en su carpeta (web-servers/, databases/,
+microservices/); en los contenedores están montados directamente en /app
+"""
+
+import importlib.util
+import os
+
+# Familias de logs: script, clase, método de generación de lotes en columnas, puertos TCP y HTTP de Logstash e índice
+FAMILIES = {
+    "web": {
+        "folder": "web-servers",
+        "script": "generate_web_logs.py",
+        "class": "WebLogSimulator",
+        "columns": "build_server_columns",
+        "port": 5000,
+        "http_port": 8080,
+        "index": "web-logs"
+    },
+    "db": {
+        "folder": "databases",
+        "script": "generate_db_logs.py",
+        "class": "DatabaseLogSimulator",
+        "columns": "build_db_columns",
+        "port": 5001,
+        "http_port": 8081,
+        "index": "db-logs"
+    },
+    "micro": {
+        "folder": "microservices",
+        "script": "generate_micro_logs.py",
+        "class": "MicroserviceLogSimulator",
+        "columns": "build_instance_columns",
+        "port": 5002,
+        "http_port": 8082,
+        "index": "micro-logs"
+    }
+}
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def simulator_path(family):
+    """Ruta del script del simulador de la familia"""
+    folder, script = FAMILIES[family]["folder"], FAMILIES[family]["script"]
+    for path in (os.path.join(_BASE_DIR, folder, script), os.path.join(_BASE_DIR, script)):
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"No se encontró {script} para la familia {family}")
+
+
+def load_simulator_class(family):
+    """Importa el script de la familia y devuelve su clase de simulador"""
+    path = simulator_path(family)
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, FAMILIES[family]["class"])
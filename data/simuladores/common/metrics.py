@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Instrumentación de los simuladores en formato de texto de Prometheus
+Contadores e histogramas en memoria, expuestos por HTTP en /metrics para que
+monitor_elk.sh y los dashboards lean el throughput real de cada simulador
+Los contadores del sender se leen en el momento del scrape (collectors), de
+modo que el camino caliente solo paga una observación por lote
+"""
+
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Límites de los histogramas en segundos (de 50us a 10s)
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _format_labels(labels):
+    """Convierte {"port": "5000"} en '{port="5000"}'"""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in sorted(labels.items())) + "}"
+
+
+class Counter:
+    """Contador monótono"""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        """Suma amount al contador"""
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """Histograma de buckets fijos con suma y cuenta, como los de Prometheus"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Registra una observación"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        """Devuelve (buckets acumulados [(límite, cuenta)], suma, cuenta)"""
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = []
+        running = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return cumulative, total, count
+
+    def quantile(self, q):
+        """Cuantil aproximado con interpolación lineal dentro del bucket, como histogram_quantile de Prometheus"""
+        cumulative, _, count = self.snapshot()
+        if count == 0:
+            return 0.0
+        rank = q * count
+        lower, below = 0.0, 0
+        for bound, running in cumulative:
+            if running >= rank and running > below:
+                if bound == float("inf"):
+                    # Por encima del último límite no hay con qué interpolar
+                    return self.buckets[-1]
+                return lower + (bound - lower) * (rank - below) / (running - below)
+            lower, below = bound, running
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """Conjunto de métricas con nombre, ayuda y etiquetas"""
+
+    def __init__(self):
+        # nombre -> (tipo, ayuda, {etiquetas ordenadas: métrica})
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _get(self, kind, name, help_text, labels, factory):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._metrics.setdefault(name, (kind, help_text, {}))
+            metric = family[2].get(key)
+            if metric is None:
+                metric = factory()
+                family[2][key] = metric
+            return metric
+
+    def counter(self, name, help_text, **labels):
+        """Devuelve el contador name con esas etiquetas, creándolo si no existe"""
+        return self._get("counter", name, help_text, labels, Counter)
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS, **labels):
+        """Devuelve el histograma name con esas etiquetas, creándolo si no existe"""
+        return self._get("histogram", name, help_text, labels, lambda: Histogram(buckets))
+
+    def register_collector(self, collector):
+        """Registra una función que devuelve [(nombre, tipo, ayuda, etiquetas, valor)] al hacer scrape"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        """Texto en formato de exposición de Prometheus (version 0.0.4)"""
+        with self._lock:
+            metrics = {name: (kind, help_text, dict(series)) for name, (kind, help_text, series) in self._metrics.items()}
+            collectors = list(self._collectors)
+
+        collected = {}
+        for collector in collectors:
+            for name, kind, help_text, labels, value in collector():
+                collected.setdefault(name, (kind, help_text, []))[2].append((labels, value))
+
+        lines = []
+        for name in sorted(metrics):
+            kind, help_text, series = metrics[name]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, metric in sorted(series.items()):
+                labels = dict(key)
+                if kind == "counter":
+                    lines.append(f"{name}{_format_labels(labels)} {metric.value}")
+                    continue
+                cumulative, total, count = metric.snapshot()
+                for bound, running in cumulative:
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_format_labels(dict(labels, le=le))} {running}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        for name in sorted(collected):
+            kind, help_text, series = collected[name]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in series:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# Registro compartido por todo el proceso
+REGISTRY = MetricsRegistry()
+
+
+class GenerationMetrics:
+    """Eventos generados y tiempo de generación por lote de una familia de logs"""
+
+    def __init__(self, family, registry=REGISTRY):
+        self.family = family
+        self.events = registry.counter(
+            "sim_events_generated_total", "Eventos generados por el simulador", family=family
+        )
+        self.batch_seconds = registry.histogram(
+            "sim_generation_batch_seconds", "Segundos para generar cada lote de eventos", family=family
+        )
+
+    def record(self, count, seconds):
+        """Registra un lote de count eventos generado en seconds segundos"""
+        self.events.inc(count)
+        self.batch_seconds.observe(seconds)
+
+
+def sender_metrics(stats, labels):
+    """Convierte los contadores de un sender en muestras para un collector"""
+    return [
+        ("sim_events_sent_total", "counter", "Eventos enviados a Logstash", labels, stats["sent"]),
+        ("sim_bytes_sent_total", "counter", "Bytes enviados a Logstash", labels, stats["bytes_sent"]),
+        ("sim_send_errors_total", "counter", "Errores de conexión o envío hacia Logstash", labels, stats["errors"]),
+        ("sim_events_dropped_total", "counter", "Eventos descartados por fallos de envío", labels, stats["failed"]),
+        ("sim_reconnects_total", "counter", "Reconexiones hacia Logstash", labels, stats["reconnects"]),
+        ("sim_events_buffered", "gauge", "Eventos en el buffer pendientes de envío", labels, stats["buffered"])
+    ]
+
+
+def metrics_summary(label, generation, sender):
+    """Línea de resumen de las métricas de un simulador para el reporte periódico"""
+    stats = sender.stats()
+    gen_hist = generation.batch_seconds
+    send_hist = sender.send_latency
+    return (
+        f"Métricas {label} - generados: {generation.events.value}, "
+        f"generación por lote p50/p99: {gen_hist.quantile(0.5) * 1000:.2f}/{gen_hist.quantile(0.99) * 1000:.2f} ms, "
+        f"envío p50/p99: {send_hist.quantile(0.5) * 1000:.2f}/{send_hist.quantile(0.99) * 1000:.2f} ms, "
+        f"errores de envío: {stats['errors']}, descartados: {stats['failed']}"
+    )
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Sirve /metrics con el contenido del registro"""
+
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Sin una línea de log por cada scrape
+        pass
+
+
+def start_metrics_server(port, host="0.0.0.0", registry=REGISTRY):
+    """Expone el registro en http://host:port/metrics desde un hilo daemon"""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    try:
+        server = ThreadingHTTPServer((host, port), handler)
+    except OSError as e:
+        logging.error(f"No se pudo abrir el endpoint de métricas en el puerto {port}: {e}")
+        return None
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name=f"metrics-{port}", daemon=True)
+    thread.start()
+    logging.info(f"Métricas disponibles en http://{host}:{port}/metrics")
+    return server
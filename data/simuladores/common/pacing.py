@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Control de tasa para los simuladores (eventos por segundo)
+Token bucket que se recarga según el reloj real, de modo que el tiempo que
+toma generar y enviar los eventos se compensa automáticamente
+"""
+
+import asyncio
+import logging
+import time
+
+
+class ConstantProfile:
+    """Tasa objetivo fija, con rampa lineal opcional desde 0"""
+
+    def __init__(self, eps, ramp_up=0.0):
+        self.eps = eps
+        self.ramp_up = ramp_up
+
+    def rate_at(self, elapsed):
+        """Eventos por segundo objetivo a los elapsed segundos del inicio"""
+        if self.ramp_up > 0 and elapsed < self.ramp_up:
+            return self.eps * elapsed / self.ramp_up
+        return self.eps
+
+
+class StepProfile:
+    """Escalones de tasa [(duración_s, eps), ...]; el último se mantiene"""
+
+    def __init__(self, steps):
+        if not steps:
+            raise ValueError("El perfil por escalones necesita al menos un escalón")
+        self.steps = steps
+
+    def rate_at(self, elapsed):
+        """Eventos por segundo objetivo a los elapsed segundos del inicio"""
+        for duration, eps in self.steps:
+            if elapsed < duration:
+                return eps
+            elapsed -= duration
+        return self.steps[-1][1]
+
+
+class ScaledProfile:
+    """Aplica un factor a otro perfil (la parte de la tasa que toca a un worker)"""
+
+    def __init__(self, profile, factor):
+        self.profile = profile
+        self.factor = factor
+
+    def rate_at(self, elapsed):
+        """Eventos por segundo objetivo a los elapsed segundos del inicio"""
+        return self.profile.rate_at(elapsed) * self.factor
+
+
+def parse_steps(spec):
+    """Convierte "60:1000,60:10000,120:50000" en [(60.0, 1000.0), ...]"""
+    steps = []
+    for chunk in spec.split(','):
+        duration, eps = chunk.split(':')
+        steps.append((float(duration), float(eps)))
+    return steps
+
+
+def build_profile(eps=0.0, ramp_up=0.0, steps=None):
+    """Crea el perfil de tasa a partir de las opciones de línea de comandos"""
+    if steps:
+        return StepProfile(parse_steps(steps))
+    return ConstantProfile(eps, ramp_up)
+
+
+class RatePacer:
+    """Token bucket que entrega lotes de eventos a la tasa del perfil"""
+
+    def __init__(self, profile, max_batch=500, burst_seconds=0.05, report_interval=10.0):
+        self.profile = profile
+        self.max_batch = max_batch
+        self.burst_seconds = burst_seconds
+        self.report_interval = report_interval
+
+        self.started = time.monotonic()
+        self.total_emitted = 0
+
+        self._tokens = 0.0
+        self._last_refill = self.started
+        self._last_report = self.started
+        self._interval_emitted = 0
+        self._interval_target = 0.0
+
+    def poll(self):
+        """Recarga el bucket y devuelve (eventos a generar ahora, segundos a esperar si 0)"""
+        now = time.monotonic()
+        rate = self.profile.rate_at(now - self.started)
+        added = rate * (now - self._last_refill)
+        self._last_refill = now
+        self._interval_target += added
+
+        # La capacidad del bucket limita la ráfaga tras una pausa larga
+        capacity = max(1.0, rate * self.burst_seconds, min(rate, self.max_batch))
+        self._tokens = min(self._tokens + added, capacity)
+
+        if self._tokens >= 1:
+            count = min(int(self._tokens), self.max_batch)
+            self._tokens -= count
+            self.total_emitted += count
+            self._interval_emitted += count
+            return count, 0.0
+
+        # Esperar lo justo para acumular el siguiente token
+        return 0, min((1 - self._tokens) / rate, 0.1) if rate > 0 else 0.05
+
+    def acquire(self):
+        """Bloquea hasta que haya tokens y devuelve cuántos eventos generar ahora"""
+        while True:
+            count, wait = self.poll()
+            if count:
+                return count
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Como acquire() pero cediendo el event loop de asyncio mientras espera"""
+        while True:
+            count, wait = self.poll()
+            if count:
+                return count
+            await asyncio.sleep(wait)
+
+    def report_due(self):
+        """Indica si ya pasó el intervalo de reporte"""
+        return time.monotonic() - self._last_report >= self.report_interval
+
+    def snapshot(self):
+        """Devuelve la tasa lograda y objetivo del último intervalo y lo reinicia"""
+        now = time.monotonic()
+        elapsed = max(now - self._last_report, 1e-9)
+        snapshot = {
+            "achieved": self._interval_emitted / elapsed,
+            "target": self._interval_target / elapsed,
+            "total": self.total_emitted
+        }
+        self._last_report = now
+        self._interval_emitted = 0
+        self._interval_target = 0.0
+        return snapshot
+
+    def report(self, label):
+        """Registra la tasa lograda frente a la objetivo en el último intervalo"""
+        snapshot = self.snapshot()
+        achieved, target = snapshot["achieved"], snapshot["target"]
+        ratio = (achieved / target * 100) if target > 0 else 0.0
+        logging.info(
+            f"{label} - tasa objetivo: {target:.0f} eps, lograda: {achieved:.0f} eps "
+            f"({ratio:.1f}%), total: {snapshot['total']}"
+        )
+        return snapshot
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Eventos sonda para medir la latencia extremo a extremo del pipeline
+Los simuladores intercalan cada cierto tiempo un evento marcador con un id de
+corrida, un número de secuencia y el instante de envío; el verificador busca
+esos marcadores en los índices *-logs-* de Elasticsearch y calcula cuánto
+tardaron en ser buscables, cuántos se perdieron y cuántos llegaron desordenados.
+Con un directorio de registro cada inyector guarda ahí cuántas sondas emitió
+su corrida: el verificador cuenta así también las perdidas al final de una
+corrida y las corridas de las que no llegó ninguna
+"""
+
+import glob
+import json
+import logging
+import math
+import os
+import re
+import secrets
+import time
+import urllib.error
+import urllib.request
+
+# Los logs Apache no llevan campos propios: el marcador va en la ruta del request
+PROBE_PATH_RE = re.compile(r'/probe/(?P<run>[\w.-]+)/(?P<seq>\d+)/(?P<sent>\d+)')
+
+
+def new_run_id():
+    """Id corto y aleatorio para una corrida de sondas"""
+    return secrets.token_hex(4)
+
+
+def probe_path(marker):
+    """Ruta HTTP que codifica el marcador en un log Apache"""
+    return f"/probe/{marker['probe_run']}/{marker['probe_seq']}/{marker['probe_sent_ms']}"
+
+
+class ProbeInjector:
+    """Decide cuándo toca enviar una sonda y numera las de un simulador"""
+
+    def __init__(self, run_id, family, interval=1.0, worker_index=None, ledger_dir=None):
+        # Cada simulador (y cada worker) tiene su propia secuencia
+        suffix = family if worker_index is None else f"{family}.w{worker_index}"
+        self.run_id = f"{run_id}-{suffix}"
+        self.interval = interval
+        self.seq = 0
+        self._next = time.monotonic() + interval
+        # Archivo <corrida>.json con las sondas emitidas (None sin directorio de registro)
+        self.ledger_path = os.path.join(ledger_dir, f"{self.run_id}.json") if ledger_dir else None
+        self._ledger_error = False
+
+    def due(self):
+        """Indica si ya pasó el intervalo desde la última sonda"""
+        return time.monotonic() >= self._next
+
+    def next_marker(self):
+        """Campos del siguiente marcador (el instante de envío es del reloj real)"""
+        self.seq += 1
+        self._next = time.monotonic() + self.interval
+        if self.ledger_path is not None:
+            self._write_ledger()
+        return {
+            "probe_run": self.run_id,
+            "probe_seq": self.seq,
+            "probe_sent_ms": int(time.time() * 1000)
+        }
+
+    def _write_ledger(self):
+        """Reemplaza el registro de la corrida con la cantidad de sondas emitidas hasta ahora"""
+        temp_path = f"{self.ledger_path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({"probe_run": self.run_id, "sent": self.seq}, f)
+            os.replace(temp_path, self.ledger_path)
+        except OSError as e:
+            # Se avisa una sola vez: las sondas siguen saliendo aunque no se registren
+            if not self._ledger_error:
+                logging.error(f"No se pudo escribir el registro de sondas {self.ledger_path}: {e}")
+                self._ledger_error = True
+
+
+def build_injector(options, family, worker_index=None):
+    """Crea el inyector a partir de probe_options ({"interval", "run_id", "ledger"}) o None si están desactivadas"""
+    if not options or not options.get("interval"):
+        return None
+    injector = ProbeInjector(
+        options.get("run_id") or new_run_id(), family, options["interval"], worker_index, options.get("ledger")
+    )
+    logging.info(f"Sondas de latencia cada {injector.interval:.1f}s con id de corrida {injector.run_id}")
+    return injector
+
+
+def parse_marker(source):
+    """Extrae (run, seq, enviado_ms) de un documento indexado, o None si no es una sonda"""
+    if "probe_run" in source:
+        return source["probe_run"], int(source["probe_seq"]), int(source["probe_sent_ms"])
+    match = PROBE_PATH_RE.search(source.get("request") or source.get("message") or "")
+    if match is None:
+        return None
+    return match.group("run"), int(match.group("seq")), int(match.group("sent"))
+
+
+def read_ledger(directory, run_prefix=None):
+    """Sondas emitidas por corrida según los registros de los inyectores: {corrida: emitidas}"""
+    sent = {}
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+            run, count = entry["probe_run"], int(entry["sent"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.error(f"Registro de sondas ilegible {path}: {e}")
+            continue
+        if not run_prefix or run.startswith(run_prefix):
+            sent[run] = count
+    return sent
+
+
+def percentile(values, q):
+    """Percentil por rango más cercano sobre una lista (0 si está vacía)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # Rango ceil(q·N/100): round() redondea al par y con N impar se quedaba un rango por debajo
+    index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered) / 100.0) - 1))
+    return ordered[index]
+
+
+class ProbeChecker:
+    """Busca las sondas en Elasticsearch y acumula latencia, pérdidas y desorden"""
+
+    def __init__(self, es_url, run_prefix=None, index_pattern="*-logs-*", timeout=10.0, max_hits=10000, ledger_dir=None):
+        self.es_url = es_url.rstrip('/')
+        self.run_prefix = run_prefix
+        self.index_pattern = index_pattern
+        self.timeout = timeout
+        self.max_hits = max_hits
+        # Registros de sondas emitidas (None: el total esperado sale de la mayor secuencia vista)
+        self.ledger_dir = ledger_dir
+
+        # (run, seq) -> latencia en ms, medida la primera vez que la sonda es visible
+        self.latencies = {}
+        self.duplicates = 0
+        self.reordered = 0
+        self.errors = 0
+        # run -> mayor secuencia vista en las consultas anteriores
+        self._max_seq = {}
+
+    def _query(self):
+        """Cuerpo de la búsqueda: marcadores estructurados (db/micro) o en la ruta (web)"""
+        prefix = self.run_prefix or ""
+        # La ruta web queda en message (texto analizado, sin .keyword) o en request con el formato
+        # estructurado: la frase con prefijo encuentra /probe/<corrida> y parse_marker filtra el resto
+        path = f"/probe/{prefix}"
+        return {
+            "size": self.max_hits,
+            # Las más recientes primero: las anteriores ya se registraron en consultas previas,
+            # así que una corrida con más de max_hits sondas no deja de ver las nuevas
+            "sort": [{"@timestamp": {"order": "desc", "unmapped_type": "date"}}],
+            "_source": ["probe_run", "probe_seq", "probe_sent_ms", "request", "message"],
+            "query": {"bool": {"minimum_should_match": 1, "should": [
+                {"prefix": {"probe_run.keyword": prefix}} if prefix else {"exists": {"field": "probe_run"}},
+                {"match_phrase_prefix": {"message": path}},
+                {"match_phrase_prefix": {"request": path}}
+            ]}}
+        }
+
+    def search(self):
+        """Ejecuta la búsqueda y devuelve los _source encontrados"""
+        request = urllib.request.Request(
+            f"{self.es_url}/{self.index_pattern}/_search",
+            data=json.dumps(self._query()).encode('utf-8'),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            body = json.loads(response.read())
+        return [hit["_source"] for hit in body.get("hits", {}).get("hits", [])]
+
+    def poll(self):
+        """Consulta una vez y registra las sondas que aparecieron desde la anterior"""
+        try:
+            sources = self.search()
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            self.errors += 1
+            logging.error(f"Error consultando sondas en {self.es_url}: {e}")
+            return 0
+
+        now_ms = int(time.time() * 1000)
+        counts = {}
+        new_max = {}
+        found = 0
+        for source in sources:
+            marker = parse_marker(source)
+            if marker is None:
+                continue
+            run, seq, sent_ms = marker
+            if self.run_prefix and not run.startswith(self.run_prefix):
+                continue
+            counts[(run, seq)] = counts.get((run, seq), 0) + 1
+            if (run, seq) in self.latencies:
+                continue
+            self.latencies[(run, seq)] = now_ms - sent_ms
+            found += 1
+            # Visible después de una secuencia mayor ya vista en una consulta anterior
+            if seq < self._max_seq.get(run, 0):
+                self.reordered += 1
+            new_max[run] = max(new_max.get(run, 0), seq)
+
+        self.duplicates = sum(count - 1 for count in counts.values())
+        for run, seq in new_max.items():
+            self._max_seq[run] = max(self._max_seq.get(run, 0), seq)
+        return found
+
+    def expected(self):
+        """Sondas esperadas por corrida: las emitidas según el registro o, sin él, la mayor secuencia vista"""
+        expected = dict(self._max_seq)
+        if self.ledger_dir:
+            for run, sent in read_ledger(self.ledger_dir, self.run_prefix).items():
+                expected[run] = max(expected.get(run, 0), sent)
+        return expected
+
+    def summary(self):
+        """Percentiles de latencia y sondas perdidas/duplicadas/desordenadas"""
+        values = list(self.latencies.values())
+        expected = self.expected()
+        return {
+            "runs": len(expected),
+            "found": len(values),
+            "missing": sum(expected.values()) - len(values),
+            "duplicates": self.duplicates,
+            "reordered": self.reordered,
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+            "max_ms": max(values) if values else 0
+        }
+
+    def report(self, final=False):
+        """Registra el resumen actual; hasta el final las que faltan pueden estar en camino"""
+        summary = self.summary()
+        missing_label = "perdidas" if final else "pendientes"
+        logging.info(
+            f"Sondas - encontradas: {summary['found']} ({summary['runs']} corridas), "
+            f"latencia p50/p95/p99: {summary['p50_ms']:.0f}/{summary['p95_ms']:.0f}/{summary['p99_ms']:.0f} ms, "
+            f"máx: {summary['max_ms']:.0f} ms, {missing_label}: {summary['missing']}, "
+            f"duplicadas: {summary['duplicates']}, desordenadas: {summary['reordered']}"
+        )
+        return summary
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Muestreo rápido por lotes para la generación de eventos
+Tablas alias de Walker (O(1) por muestra, un solo random() por muestra)
+y pools de valores precalculados con popularidad tipo Zipf
+"""
+
+import random
+
+
+class AliasTable:
+    """Tabla alias de Walker para muestrear índices con pesos arbitrarios"""
+
+    def __init__(self, weights):
+        total = float(sum(weights))
+        if not weights or total <= 0:
+            raise ValueError("La tabla alias necesita pesos positivos")
+
+        size = len(weights)
+        scaled = [w * size / total for w in weights]
+        self.size = size
+        self.prob = [1.0] * size
+        self.alias = list(range(size))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+        # Lo que quede (por redondeo) tiene probabilidad 1 en su propia casilla
+
+    def sample(self, rng=random):
+        """Devuelve un índice"""
+        u = rng.random() * self.size
+        i = int(u)
+        return i if u - i < self.prob[i] else self.alias[i]
+
+    def sample_n(self, n, rng=random):
+        """Devuelve una lista de n índices"""
+        size = self.size
+        prob = self.prob
+        alias = self.alias
+        rand = rng.random
+        out = []
+        append = out.append
+        for _ in range(n):
+            u = rand() * size
+            i = int(u)
+            append(i if u - i < prob[i] else alias[i])
+        return out
+
+
+class WeightedChoice:
+    """Valores con pesos muestreados mediante una tabla alias"""
+
+    def __init__(self, values, weights=None):
+        self.values = list(values)
+        self.table = AliasTable(weights if weights is not None else [1.0] * len(self.values))
+
+    def sample(self, rng=random):
+        """Devuelve un valor"""
+        return self.values[self.table.sample(rng)]
+
+    def sample_n(self, n, rng=random):
+        """Devuelve una lista de n valores"""
+        values = self.values
+        return [values[i] for i in self.table.sample_n(n, rng)]
+
+
+def zipf_weights(size, exponent=1.1):
+    """Pesos 1/rango^exponent: pocos valores muy frecuentes y una cola larga"""
+    return [1.0 / (rank ** exponent) for rank in range(1, size + 1)]
+
+
+class ZipfPool(WeightedChoice):
+    """Pool de valores generados una vez y reutilizados con popularidad Zipf"""
+
+    def __init__(self, factory, size, exponent=1.1):
+        super().__init__([factory() for _ in range(size)], zipf_weights(size, exponent))
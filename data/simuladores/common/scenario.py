@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Escenarios: tamaño y mezcla de la flota simulada sin tocar el código
+Un archivo TOML (o JSON, o YAML si PyYAML está instalado) describe por
+familia sus flotas de hosts (cantidad, tasa por host y peso relativo), el
+host y los puertos de Logstash y las tablas de probabilidad que reemplazan
+a las del simulador (códigos de estado, niveles de log...). Se lee y valida
+una sola vez al iniciar; los simuladores precalculan de él sus tablas de
+muestreo, así que una flota de miles de hosts no encarece cada evento
+"""
+
+import json
+import os
+
+from common.loader import FAMILIES
+from common.sampling import WeightedChoice
+
+try:
+    import tomllib
+except ImportError:
+    # Python < 3.11: solo escenarios JSON o YAML
+    tomllib = None
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+# Tablas de probabilidad que admite cada familia: valores permitidos (None cualquiera)
+SCENARIO_TABLES = {
+    "web": {"status_codes": None, "methods": None},
+    "db": {"levels": ("INFO", "WARN", "ERROR"), "db_types": ("mysql", "postgresql")},
+    "micro": {"levels": ("INFO", "DEBUG", "WARN", "ERROR")}
+}
+
+# Hosts máximos por familia (los ids internados y la tabla alias crecen con la flota)
+MAX_HOSTS = 100000
+
+_FAMILY_KEYS = {"port", "http_port", "eps", "fleets"}
+_FLEET_KEYS = {"name", "count", "eps", "weight"}
+
+
+def _check_number(value, label, low=0.0, strict=False):
+    """Valida un número mayor (o mayor o igual) que low"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < low or (strict and value == low):
+        relation = "mayor que" if strict else "mayor o igual que"
+        raise ValueError(f"{label} debe ser un número {relation} {low} (recibido: {value!r})")
+
+
+def _check_port(value, label):
+    """Valida un puerto TCP"""
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 < value < 65536:
+        raise ValueError(f"{label} debe ser un puerto entre 1 y 65535 (recibido: {value!r})")
+
+
+def _normalize_table(family, name, table):
+    """Tabla {valor: peso} validada como [(valor, probabilidad)] que suma 1"""
+    label = f"{family}.{name}"
+    if not isinstance(table, dict) or not table:
+        raise ValueError(f"{label} debe ser una tabla {{valor: peso}} con al menos un valor")
+    allowed = SCENARIO_TABLES[family][name]
+    entries = []
+    for value, weight in table.items():
+        if name == "status_codes":
+            # TOML y JSON solo tienen claves de texto: el código se convierte a entero
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{label}: {value!r} no es un código de estado HTTP") from None
+            if not 100 <= value <= 599:
+                raise ValueError(f"{label}: {value} no es un código de estado HTTP")
+        elif allowed is not None and value not in allowed:
+            raise ValueError(f"{label}: valor desconocido {value!r} (opciones: {', '.join(allowed)})")
+        _check_number(weight, f"{label}.{value}")
+        entries.append((value, float(weight)))
+    total = sum(weight for _, weight in entries)
+    if total <= 0:
+        raise ValueError(f"{label} necesita al menos un peso positivo")
+    return [(value, weight / total) for value, weight in entries]
+
+
+def _validate_family(family, section):
+    """Valida la sección de una familia y normaliza sus tablas de probabilidad"""
+    if not isinstance(section, dict):
+        raise ValueError(f"{family} debe ser una tabla")
+    unknown = set(section) - _FAMILY_KEYS - set(SCENARIO_TABLES[family])
+    if unknown:
+        raise ValueError(f"{family}: claves desconocidas: {', '.join(sorted(unknown))}")
+    for key in ("port", "http_port"):
+        if key in section:
+            _check_port(section[key], f"{family}.{key}")
+    if "eps" in section:
+        _check_number(section["eps"], f"{family}.eps")
+
+    fleets = section.get("fleets")
+    if fleets is not None:
+        if not isinstance(fleets, list) or not fleets:
+            raise ValueError(f"{family}.fleets debe ser una lista con al menos una flota")
+        hosts = 0
+        for index, fleet in enumerate(fleets):
+            label = f"{family}.fleets[{index}]"
+            if not isinstance(fleet, dict):
+                raise ValueError(f"{label} debe ser una tabla")
+            unknown = set(fleet) - _FLEET_KEYS
+            if unknown:
+                raise ValueError(f"{label}: claves desconocidas: {', '.join(sorted(unknown))}")
+            count = fleet.get("count")
+            if isinstance(count, bool) or not isinstance(count, int) or count <= 0:
+                raise ValueError(f"{label}.count debe ser un entero positivo (recibido: {count!r})")
+            hosts += count
+            if "eps" in fleet:
+                _check_number(fleet["eps"], f"{label}.eps")
+            if "weight" in fleet:
+                _check_number(fleet["weight"], f"{label}.weight", strict=True)
+        if hosts > MAX_HOSTS:
+            raise ValueError(f"{family}: {hosts} hosts superan el máximo de {MAX_HOSTS}")
+        with_eps = sum("eps" in fleet for fleet in fleets)
+        if with_eps and with_eps != len(fleets):
+            raise ValueError(f"{family}: la tasa por host (eps) va en todas las flotas o en ninguna")
+        if with_eps and "eps" in section:
+            raise ValueError(f"{family}: eps de la familia y eps por host se excluyen (la tasa es la suma por host)")
+
+    for name in SCENARIO_TABLES[family]:
+        if name in section:
+            section[name] = _normalize_table(family, name, section[name])
+
+
+def validate_scenario(config):
+    """Comprueba las claves y rangos de un escenario y normaliza sus tablas; lanza ValueError con el problema"""
+    if not isinstance(config, dict):
+        raise ValueError("El escenario debe ser una tabla con las secciones logstash, web, db y micro")
+    unknown = set(config) - {"logstash"} - set(FAMILIES)
+    if unknown:
+        raise ValueError(f"Secciones desconocidas: {', '.join(sorted(unknown))} (opciones: logstash, {', '.join(FAMILIES)})")
+    logstash = config.get("logstash", {})
+    if not isinstance(logstash, dict) or set(logstash) - {"host"}:
+        raise ValueError("logstash solo admite host")
+    if "host" in logstash and (not isinstance(logstash["host"], str) or not logstash["host"]):
+        raise ValueError(f"logstash.host debe ser un nombre de host (recibido: {logstash['host']!r})")
+    for family in FAMILIES:
+        if family in config:
+            _validate_family(family, config[family])
+    return config
+
+
+def load_scenario(path):
+    """Lee y valida un escenario; el formato sale de la extensión (.toml, .json, .yaml/.yml)"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".toml":
+        if tomllib is None:
+            raise ValueError("los escenarios TOML requieren Python 3.11 o posterior (usa JSON)")
+        with open(path, 'rb') as f:
+            config = tomllib.load(f)
+    elif extension in (".yaml", ".yml"):
+        if yaml is None:
+            raise ValueError("los escenarios YAML requieren el paquete PyYAML (pip install pyyaml)")
+        with open(path, encoding='utf-8') as f:
+            try:
+                config = yaml.safe_load(f)
+            except yaml.YAMLError as e:
+                raise ValueError(f"YAML inválido: {e}") from None
+    elif extension == ".json":
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+    else:
+        raise ValueError(f"extensión desconocida {extension or '(ninguna)'} (opciones: .toml, .json, .yaml, .yml)")
+    return validate_scenario(config)
+
+
+def scenario_eps(config, family):
+    """Tasa total de la familia según el escenario: eps de la familia o suma de la tasa por host (0 si no define)"""
+    section = (config or {}).get(family) or {}
+    if "eps" in section:
+        return float(section["eps"])
+    return float(sum(fleet["count"] * fleet["eps"] for fleet in section.get("fleets", []) if "eps" in fleet))
+
+
+class FamilyScenario:
+    """Flota, destino y tablas de probabilidad de una familia (los valores del simulador si el escenario no los define)"""
+
+    def __init__(self, config, family, default_ids):
+        section = (config or {}).get(family) or {}
+        self.family = family
+        self.host = ((config or {}).get("logstash") or {}).get("host")
+        self.port = section.get("port") or FAMILIES[family]["port"]
+        self.http_port = section.get("http_port") or FAMILIES[family]["http_port"]
+        self.eps = scenario_eps(config, family)
+        self.tables = {name: section[name] for name in SCENARIO_TABLES[family] if name in section}
+
+        # Ids consecutivos desde 1, flota tras flota; peso por host: weight, si no su tasa, si no 1
+        self.fleets = []
+        self.host_weights = None
+        fleets = section.get("fleets")
+        if not fleets:
+            self.fleet_ids = list(default_ids)
+            return
+        self.fleet_ids = []
+        weights = []
+        for index, fleet in enumerate(fleets):
+            first = len(self.fleet_ids) + 1
+            count = fleet["count"]
+            weight = float(fleet.get("weight", fleet.get("eps", 1.0)))
+            self.fleets.append((fleet.get("name", f"{family}-{index}"), first, count, weight))
+            self.fleet_ids.extend(range(first, first + count))
+            weights.extend([weight] * count)
+        if len(set(weights)) > 1:
+            self.host_weights = dict(zip(self.fleet_ids, weights))
+
+    def table(self, name, default):
+        """Tabla [(valor, probabilidad)] del escenario o default si no la define"""
+        return self.tables.get(name, default)
+
+    def weight_of(self, ids):
+        """Peso total de los hosts ids (su parte de la tasa al repartir la flota entre workers)"""
+        if self.host_weights is None:
+            return float(len(ids))
+        return sum(self.host_weights[host_id] for host_id in ids)
+
+    def host_sampler(self, ids):
+        """Función (n, rng) que devuelve n ids de ids: uniforme, o con una tabla alias de los pesos por host"""
+        ids = list(ids)
+        if self.host_weights is None:
+            return lambda n, rng: rng.choices(ids, k=n)
+        # Tabla precalculada: cada muestra cuesta lo mismo con 10 hosts que con 10000
+        choice = WeightedChoice(ids, [self.host_weights[host_id] for host_id in ids])
+        return choice.sample_n
+
+    def describe(self):
+        """Texto de reporte de la flota del escenario"""
+        fleets = ", ".join(f"{name} x{count} (peso {weight:g})" for name, _, count, weight in self.fleets)
+        rate = f", {self.eps:,.0f} eps" if self.eps else ""
+        tables = f", tablas: {', '.join(self.tables)}" if self.tables else ""
+        return f"Escenario {self.family}: {len(self.fleet_ids)} hosts [{fleets}]{rate}{tables}"
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Semillas para generación reproducible
+Con la misma semilla, el mismo modo y el mismo reloj sintético, el flujo de
+eventos es idéntico byte a byte (incluidos trace/span IDs y datos de Faker).
+Las sub-semillas (Faker, cada worker) se derivan de la semilla base con un
+hash estable, de modo que no dependen del orden de arranque
+"""
+
+import hashlib
+import random
+import uuid
+
+
+def derive_seed(seed, *path):
+    """Sub-semilla estable de 64 bits para seed y una ruta ("worker", 3)"""
+    key = "/".join(str(part) for part in (seed,) + path)
+    return int.from_bytes(hashlib.sha256(key.encode('utf-8')).digest()[:8], 'big')
+
+
+def make_rng(seed=None):
+    """Generador aleatorio propio, semillado si se indica semilla"""
+    return random.Random(seed)
+
+
+def seed_faker(fake, seed):
+    """Semilla propia para una instancia de Faker (no toca el random global)"""
+    if seed is not None:
+        fake.seed_instance(derive_seed(seed, "faker"))
+
+
+def rng_uuid4(rng):
+    """UUID versión 4 a partir del generador indicado (reproducible con semilla)"""
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Envío persistente de logs a los inputs TCP de Logstash
+Mantiene una conexión de larga duración por puerto (5000/5001/5002),
+agrupa las líneas en escrituras grandes con sendall y reconecta con backoff.
+Con spool en disco, lo que no se puede entregar se guarda en lugar de
+descartarse y un hilo aparte lo reenvía a tasa acotada al reconectar
+"""
+
+import atexit
+import logging
+import socket
+import threading
+import time
+
+from common.metrics import REGISTRY, sender_metrics
+from common.spool import build_spool
+
+
+class LogstashSender:
+    """Conexión TCP persistente hacia un input tcp de Logstash con envío por lotes"""
+
+    def __init__(self, host, port, batch_bytes=64 * 1024, flush_interval=0.5,
+                 connect_timeout=3.0, send_timeout=10.0,
+                 backoff_initial=0.5, backoff_max=30.0, spool=None):
+        self.host = host
+        self.port = port
+        self.batch_bytes = batch_bytes
+        self.flush_interval = flush_interval
+        self.connect_timeout = connect_timeout
+        self.send_timeout = send_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        # Spool en disco (DiskSpool) para lo que no se pudo entregar; None descarta como antes
+        self.spool = spool
+
+        # Contadores de envío
+        self.sent = 0
+        self.failed = 0
+        self.reconnects = 0
+        self.bytes_sent = 0
+        self.errors = 0
+
+        # Latencia de cada sendall, expuesta en /metrics junto con los contadores
+        self.metric_labels = {"host": host, "port": str(port)}
+        self.send_latency = REGISTRY.histogram(
+            "sim_send_latency_seconds", "Segundos de cada escritura por lotes hacia Logstash", **self.metric_labels
+        )
+        REGISTRY.register_collector(self._collect_metrics)
+
+        self._sock = None
+        self._connected_once = False
+        self._backoff = backoff_initial
+        self._next_connect = 0.0
+
+        # Buffer de líneas pendientes (bytes ya codificados)
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._buffered_events = 0
+        self._lock = threading.Lock()
+
+        # Hilo que vacía el buffer aunque no se alcance batch_bytes (y, sin spool, abre las conexiones)
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name=f"sender-{port}", daemon=True
+        )
+        self._flusher.start()
+
+        # Con spool, las conexiones las abre el hilo de reenvío: el camino caliente nunca espera un connect
+        # (sin spool las abre el hilo de vaciado; lo que se vacía sin conexión se cuenta como fallido)
+        self._replayer = None
+        if spool is not None:
+            self._replayer = threading.Thread(
+                target=self._replay_loop, name=f"spool-{port}", daemon=True
+            )
+            self._replayer.start()
+
+    def send(self, line):
+        """Encola una línea de log (sin salto de línea final)"""
+        self.send_bytes((line + '\n').encode('utf-8'))
+
+    def send_bytes(self, data, count=1):
+        """Encola bytes ya terminados en salto de línea que representan count eventos"""
+        with self._lock:
+            self._buffer.append(data)
+            self._buffered_bytes += len(data)
+            self._buffered_events += count
+            if self._buffered_bytes >= self.batch_bytes:
+                self._flush_locked()
+
+    def flush(self):
+        """Envía inmediatamente todo lo que haya en el buffer"""
+        with self._lock:
+            self._flush_locked()
+
+    def stats(self):
+        """Devuelve los contadores actuales del sender"""
+        with self._lock:
+            stats = {
+                "sent": self.sent,
+                "failed": self.failed,
+                "reconnects": self.reconnects,
+                "bytes_sent": self.bytes_sent,
+                "errors": self.errors,
+                "buffered": self._buffered_events,
+                "connected": self._sock is not None
+            }
+        if self.spool is not None:
+            stats.update({f"spool_{key}": value for key, value in self.spool.stats().items()})
+        return stats
+
+    def spool_summary(self):
+        """Línea de reporte del spool en disco (None si no hay spool)"""
+        if self.spool is None:
+            return None
+        stats = self.spool.stats()
+        return (
+            f"Spool {self.spool.directory} - pendientes: {stats['depth']} eventos "
+            f"({stats['bytes'] / 1024 / 1024:.1f} MB, {stats['segments']} segmentos), "
+            f"más antiguo: {stats['oldest_age']:.0f}s, guardados: {stats['spooled']}, "
+            f"reenviados: {stats['replayed']}, descartados: {stats['dropped']}"
+        )
+
+    def _collect_metrics(self):
+        """Muestras de los contadores del sender para el endpoint de métricas"""
+        stats = self.stats()
+        samples = sender_metrics(stats, self.metric_labels)
+        if self.spool is not None:
+            samples += [
+                ("sim_spool_events", "gauge", "Eventos en el spool en disco pendientes de reenvío",
+                 self.metric_labels, stats["spool_depth"]),
+                ("sim_spool_bytes", "gauge", "Bytes del spool en disco pendientes de reenvío",
+                 self.metric_labels, stats["spool_bytes"]),
+                ("sim_spool_oldest_age_seconds", "gauge", "Antigüedad del evento más viejo del spool",
+                 self.metric_labels, stats["spool_oldest_age"]),
+                ("sim_spool_replayed_total", "counter", "Eventos reenviados desde el spool",
+                 self.metric_labels, stats["spool_replayed"])
+            ]
+        return samples
+
+    def close(self):
+        """Detiene el hilo de vaciado, envía lo pendiente y cierra la conexión"""
+        self._stop.set()
+        # Sin spool el hilo de vaciado puede estar esperando un connect
+        self._flusher.join(timeout=self.flush_interval * 2 + self.connect_timeout)
+        if self._replayer is not None:
+            self._replayer.join(timeout=self.connect_timeout + 1)
+        if (self.spool is None and self._sock is None and not self._flusher.is_alive()
+                and time.monotonic() >= self._next_connect):
+            # Último intento de entregar lo pendiente antes de cerrar
+            self._connect_background()
+        with self._lock:
+            self._flush_locked()
+            self._disconnect()
+        if self.spool is not None:
+            self.spool.close()
+
+    def _flush_loop(self):
+        """Vacía el buffer cada flush_interval segundos y, sin spool, reconecta cuando vence el backoff"""
+        while True:
+            if self.spool is None and self._sock is None and time.monotonic() >= self._next_connect:
+                self._connect_background()
+            if self._stop.wait(self.flush_interval):
+                return
+            self.flush()
+
+    def _flush_locked(self):
+        """Envía el buffer con un único sendall (requiere self._lock)"""
+        if not self._buffer:
+            return
+
+        payload = b''.join(self._buffer)
+        count = self._buffered_events
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._buffered_events = 0
+
+        # Nunca se conecta con el lock tomado: sin conexión el lote va al spool o se descarta
+        if self._sock is None or not self._send_locked(payload, count):
+            self._undelivered(payload, count)
+
+    def _send_locked(self, payload, count):
+        """Escribe el payload en la conexión actual; devuelve False si falla (requiere self._lock)"""
+        started = time.perf_counter()
+        try:
+            self._sock.sendall(payload)
+        except OSError as e:
+            fate = "al spool" if self.spool is not None else "descartados"
+            logging.error(f"Error enviando a Logstash {self.host}:{self.port}: {e} ({count} eventos {fate})")
+            self.errors += 1
+            self._disconnect()
+            self._schedule_reconnect()
+            return False
+        self.sent += count
+        self.bytes_sent += len(payload)
+        self.send_latency.observe(time.perf_counter() - started)
+        return True
+
+    def _undelivered(self, payload, count):
+        """Guarda en el spool lo que no se pudo entregar o, sin spool (o con el spool lleno), lo descarta"""
+        if self.spool is None or not self.spool.append(payload, count):
+            self.failed += count
+
+    def _replay_loop(self):
+        """Reconecta fuera del camino caliente y reenvía el spool a como mucho replay_rate eventos/s"""
+        next_send = time.monotonic()
+        while not self._stop.is_set():
+            if self._sock is None:
+                self._stop.wait(max(0.0, self._next_connect - time.monotonic()))
+                if not self._stop.is_set():
+                    self._connect_background()
+                continue
+            record = self.spool.peek()
+            if record is None:
+                self._stop.wait(0.2)
+                continue
+            _, count, payload = record
+            with self._lock:
+                delivered = self._sock is not None and self._send_locked(payload, count)
+            if not delivered:
+                continue
+            self.spool.commit()
+            # Ritmo acotado: el siguiente lote sale cuando le toca según los eventos ya reenviados
+            next_send = max(next_send, time.monotonic() - 1.0) + count / self.spool.replay_rate
+            self._stop.wait(max(0.0, next_send - time.monotonic()))
+
+    def _connect_background(self):
+        """Abre la conexión sin tener el lock, para que los envíos no esperen al connect mientras tanto"""
+        sock = self._open_socket()
+        if sock is not None:
+            with self._lock:
+                if self._sock is None:
+                    self._attach(sock)
+                else:
+                    sock.close()
+
+    def _open_socket(self):
+        """Intenta conectar; devuelve el socket o None tras programar el reintento"""
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+        except OSError as e:
+            logging.error(
+                f"No se pudo conectar a Logstash {self.host}:{self.port}: {e} "
+                f"(reintento en {self._backoff:.1f}s)"
+            )
+            self.errors += 1
+            self._schedule_reconnect()
+            return None
+        sock.settimeout(self.send_timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _attach(self, sock):
+        """Adopta una conexión recién abierta (requiere self._lock)"""
+        self._sock = sock
+        if self._connected_once:
+            self.reconnects += 1
+            logging.info(f"Reconectado a Logstash {self.host}:{self.port}")
+        self._connected_once = True
+        self._backoff = self.backoff_initial
+
+    def _schedule_reconnect(self):
+        """Programa el próximo intento de conexión con backoff exponencial"""
+        self._next_connect = time.monotonic() + self._backoff
+        self._backoff = min(self._backoff * 2, self.backoff_max)
+
+    def _disconnect(self):
+        """Cierra el socket actual si existe"""
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+
+# Un sender compartido por destino (host, puerto)
+_senders = {}
+_senders_lock = threading.Lock()
+
+
+def get_sender(host, port, spool_options=None, worker_index=None, **kwargs):
+    """Devuelve el sender compartido para host:port, creándolo (con su spool si se pidió) si no existe"""
+    with _senders_lock:
+        sender = _senders.get((host, port))
+        if sender is None:
+            sender = LogstashSender(host, port, spool=build_spool(spool_options, host, port, worker_index), **kwargs)
+            _senders[(host, port)] = sender
+        return sender
+
+
+def close_all():
+    """Envía lo pendiente y cierra todos los senders abiertos"""
+    with _senders_lock:
+        senders = list(_senders.values())
+        _senders.clear()
+    for sender in senders:
+        sender.close()
+
+
+atexit.register(close_all)
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Base compartida de los tres simuladores
+Reúne lo que no depende de la familia: generadores con semilla, escenario,
+salidas (archivo con rotación, Logstash por tcp o http, o Elasticsearch
+_bulk), eco a consola, métricas, sondas y perfil de tráfico, más los modos
+de ejecución que solo generan lotes en columnas y los entregan (tasa
+controlada, backfill sintético y exportación _bulk) y el punto de entrada
+de los scripts. Cada familia define cómo genera sus eventos y cómo los
+muestra en consola
+"""
+
+import json
+import logging
+import time
+from collections import Counter
+from colorama import Fore, Style
+from faker import Faker
+
+from common.bulk_export import BulkExporter
+from common.cli import paced_mode, parse_args, rate_profile, simulator_kwargs
+from common.clock import CachedClock, SyntheticClock
+from common.console import build_console
+from common.encoders import get_encoder
+from common.es_bulk import build_es_sender
+from common.filesink import RotatingFileSink, worker_log_path
+from common.http_sender import build_http_sender
+from common.loader import FAMILIES
+from common.metrics import GenerationMetrics, metrics_summary, start_metrics_server
+from common.pacing import RatePacer
+from common.probes import build_injector
+from common.scenario import FamilyScenario
+from common.seeding import make_rng, seed_faker
+from common.sender import get_sender
+from common.traffic import build_traffic
+from common.workers import run_worker_pool
+
+
+class BaseSimulator:
+    """Estado y salidas comunes de un simulador; las subclases generan los eventos de su familia"""
+
+    # Familia (clave de FAMILIES), etiqueta de los reportes, archivo de logs y descripción de los mensajes
+    FAMILY = None
+    LABEL = None
+    LOG_FILE = None
+    DESCRIPTION = None
+    FLEET_IDS = ()
+
+    def __init__(self, tcp_host="elk-logstash", tcp_port=None, fleet_ids=None, clock=None, file_options=None, worker_index=None, seed=None, probe_options=None, encoder=None, traffic_options=None, es_options=None, console_options=None, spool_options=None, http_options=None, scenario=None, outputs=True):
+        # Generadores propios: con semilla el flujo de eventos es reproducible
+        self.seed = seed
+        self.rng = make_rng(seed)
+        self.fake = Faker()
+        seed_faker(self.fake, seed)
+        # Escenario: flota, puertos y tablas de probabilidad (los de la clase si no se indicó)
+        self.scenario = FamilyScenario(scenario, self.FAMILY, self.FLEET_IDS)
+        self.tcp_host = tcp_host
+        self.tcp_port = tcp_port or self.scenario.port
+        # Codificador JSON de los eventos (orjson si está instalado)
+        self.encoder = get_encoder(encoder)
+        # Con outputs=False solo se arma el estado de generación (lotes, sondas, tráfico), sin archivo,
+        # conexión ni consola: para quien entrega los eventos por su cuenta, como el runner unificado
+        self.log_file = self.destination = None
+        self.file_sink = self.es_output = self.http_output = self.sender = self.console = None
+        if outputs:
+            self.open_outputs(worker_index, file_options, es_options, http_options, spool_options, console_options)
+        self.generation = GenerationMetrics(self.FAMILY)
+        # Sondas de latencia extremo a extremo (None si están desactivadas)
+        self.probes = build_injector(probe_options, self.FAMILY, worker_index)
+        self.fleet_ids = list(fleet_ids if fleet_ids is not None else self.scenario.fleet_ids)
+        # Muestreo de hosts precalculado: uniforme o con los pesos por host del escenario
+        self.sample_hosts = self.scenario.host_sampler(self.fleet_ids)
+        if scenario is not None:
+            logging.info(self.scenario.describe())
+        self.clock = clock or CachedClock()
+        # Perfil de tráfico: errores forzados por incidentes según el instante del reloj (None sin perfil)
+        self.traffic = build_traffic(traffic_options, self.FAMILY, self.clock.peek())
+
+    def open_outputs(self, worker_index, file_options, es_options, http_options, spool_options, console_options):
+        """Abre el archivo, la salida hacia Logstash o Elasticsearch y el eco a consola"""
+        self.log_file = self.LOG_FILE
+        if worker_index is not None:
+            # Cada worker escribe su propio archivo para no competir por la rotación
+            self.log_file = worker_log_path(self.log_file, worker_index)
+        self.file_sink = RotatingFileSink(self.log_file, **(file_options or {}))
+        # Con --file-codec el archivo lleva la extensión del códec (.gz, .zst)
+        self.log_file = self.file_sink.path
+        # Salida directa a la API _bulk de Elasticsearch en lugar de Logstash (None si no se pidió)
+        self.es_output = build_es_sender(es_options, FAMILIES[self.FAMILY]["index"], self.encoder)
+        # Lotes comprimidos al input http de Logstash en lugar de los inputs tcp (None si no se pidió)
+        self.http_output = build_http_sender(http_options, self.tcp_host, self.FAMILY, self.scenario.http_port)
+        # Con spool_options lo que no se pueda entregar se guarda en disco y se reenvía al reconectar
+        self.sender = self.es_output or self.http_output or get_sender(
+            self.tcp_host, self.tcp_port, spool_options=spool_options, worker_index=worker_index
+        )
+        output = self.es_output or self.http_output
+        self.destination = output.url if output else f"{self.tcp_host}:{self.tcp_port}"
+        # Eco a consola muestreado y escrito en segundo plano, con línea de estado periódica
+        self.console = build_console(console_options, self.LABEL)
+
+    @classmethod
+    def family_kwargs(cls, args):
+        """Argumentos del constructor propios de la familia, además de los de simulator_kwargs"""
+        return {}
+
+    def forced_errors(self):
+        """(probabilidad de forzar un error, WeightedChoice del error o None) del perfil de tráfico ahora"""
+        return self.traffic.errors_at(self.clock.peek()) if self.traffic else (0.0, None)
+
+    def build_columns(self, n):
+        """Genera n eventos de la flota en columnas (el método de FAMILIES de la familia)"""
+        return getattr(self, FAMILIES[self.FAMILY]["columns"])(n)
+
+    def encode_line(self, log_data):
+        """Serializa el log una sola vez a bytes con salto final, compartidos por todos los destinos"""
+        return self.encoder.line(log_data)
+
+    def send_to_logstash(self, payload):
+        """Encola la línea ya serializada en la conexión persistente hacia Logstash"""
+        self.sender.send_bytes(payload)
+
+    def write_to_file(self, payload):
+        """Encola la línea ya serializada en el archivo con buffer y rotación"""
+        self.file_sink.write_bytes(payload)
+
+    def deliver(self, payload, record):
+        """Entrega un evento ya codificado a Logstash (o su documento a Elasticsearch) y al archivo"""
+        if self.es_output is not None:
+            self.es_output.add(*self.bulk_document(record))
+        else:
+            self.send_to_logstash(payload)
+        self.write_to_file(payload)
+
+    def emit_batch(self, batch):
+        """Serializa el lote en columnas de una pasada y lo entrega a Logstash y al archivo"""
+        payload = batch.to_bytes()
+        if self.es_output is not None:
+            add = self.es_output.add
+            bulk_document = self.bulk_document
+            for record in batch.records():
+                add(*bulk_document(record))
+        else:
+            self.sender.send_bytes(payload, len(batch))
+        self.file_sink.write_bytes(payload, len(batch))
+        # Eco de a lo sumo una línea por lote: sample() aplica el 1 de cada N y el tope de líneas/s
+        console = self.console
+        console.tally(self.batch_categories(batch))
+        if console.sample(count=len(batch)):
+            self.echo_batch(batch, payload)
+
+    def batch_categories(self, batch):
+        """Eventos del lote por nivel, la categoría de la línea de estado de la consola"""
+        values = self.level_table.values
+        return {values[index]: count for index, count in Counter(batch.columns["level"]).items()}
+
+    def echo_batch(self, batch, payload):
+        """Muestra en consola el primer evento del lote (la línea JSON ya serializada)"""
+        self.echo(batch.keys[0], json.loads(payload[:payload.index(b"\n")]))
+
+    def emit_probe(self):
+        """Envía una sonda de latencia si toca (sin eco a consola)"""
+        if self.probes is not None and self.probes.due():
+            self.emit(self.fleet_ids[0], self.build_probe_log(self.probes.next_marker()), echo=False)
+
+    def report_sink_stats(self):
+        """Muestra los contadores de envío hacia Logstash y de escritura a archivo"""
+        if self.es_output is not None:
+            logging.info(self.es_output.summary())
+        elif self.http_output is not None:
+            logging.info(self.http_output.summary())
+        else:
+            stats = self.sender.stats()
+            logging.info(
+                f"Logstash {self.tcp_host}:{self.tcp_port} - enviados: {stats['sent']}, "
+                f"fallidos: {stats['failed']}, reconexiones: {stats['reconnects']}, "
+                f"bytes: {stats['bytes_sent']}"
+            )
+            spool_summary = self.sender.spool_summary()
+            if spool_summary:
+                logging.info(spool_summary)
+        file_stats = self.file_sink.stats()
+        logging.info(
+            f"Archivo {self.log_file} - escritos: {file_stats['written']}, "
+            f"errores: {file_stats['errors']}, perdidos: {file_stats['lost']}, rotaciones: {file_stats['rotations']}, "
+            f"bytes: {file_stats['bytes_written']}"
+        )
+        compression_summary = self.file_sink.compression_summary()
+        if compression_summary:
+            logging.info(compression_summary)
+        logging.info(metrics_summary(self.LABEL, self.generation, self.sender))
+
+    def close_sinks(self):
+        """Envía y escribe lo pendiente y cierra conexión y archivo"""
+        for sink in (self.console, self.sender, self.file_sink):
+            if sink is not None:
+                sink.close()
+
+    def run(self):
+        """Ejecuta el simulador: una ronda de logs de la flota cada 5-10 segundos"""
+        logging.info(f"{Fore.GREEN}Iniciando simulador de {self.DESCRIPTION}...{Style.RESET_ALL}")
+        logging.info(f"Enviando logs a {self.destination}")
+        logging.info(f"Guardando logs en {self.log_file}")
+
+        while True:
+            try:
+                self.emit_round()
+                self.emit_probe()
+                self.report_sink_stats()
+
+                # Esperar entre 5-10 segundos
+                sleep_time = self.rng.uniform(5, 10)
+                time.sleep(sleep_time)
+
+            except KeyboardInterrupt:
+                logging.info(f"{Fore.YELLOW}Deteniendo simulador...{Style.RESET_ALL}")
+                self.close_sinks()
+                self.report_sink_stats()
+                break
+            except Exception as e:
+                logging.error(f"Error en el simulador: {e}")
+                time.sleep(5)
+
+    def report_paced(self, pacer, reporter=None):
+        """Reporta la tasa lograda (a consola o al proceso padre en modo workers)"""
+        if reporter is None:
+            pacer.report(self.LABEL)
+            self.report_sink_stats()
+        else:
+            reporter(pacer.snapshot(), self.sender.stats())
+
+    def run_paced(self, pacer, reporter=None):
+        """Ejecuta el simulador a la tasa objetivo del pacer (eventos/segundo)"""
+        logging.info(f"{Fore.GREEN}Iniciando simulador de {self.DESCRIPTION} (tasa controlada)...{Style.RESET_ALL}")
+        logging.info(f"Enviando logs a {self.destination}")
+        logging.info(f"Guardando logs en {self.log_file}")
+
+        try:
+            while True:
+                # Sin eco por evento: los lotes solo se cuentan para la línea de estado de la consola
+                self.emit_batch(self.build_columns(pacer.acquire()))
+                self.emit_probe()
+
+                if pacer.report_due():
+                    self.report_paced(pacer, reporter)
+        except KeyboardInterrupt:
+            logging.info(f"{Fore.YELLOW}Deteniendo simulador...{Style.RESET_ALL}")
+            self.close_sinks()
+            self.report_paced(pacer, reporter)
+
+    def run_backfill(self, count, batch_size=1000):
+        """Genera count eventos con el reloj sintético lo más rápido posible"""
+        logging.info(f"{Fore.GREEN}Generando {count} {self.DESCRIPTION} en el rango sintético...{Style.RESET_ALL}")
+        logging.info(f"Enviando logs a {self.destination}")
+
+        started = time.monotonic()
+        remaining = count
+        try:
+            while remaining > 0:
+                n = min(batch_size, remaining)
+                self.emit_batch(self.build_columns(n))
+                remaining -= n
+        except KeyboardInterrupt:
+            logging.info(f"{Fore.YELLOW}Deteniendo simulador...{Style.RESET_ALL}")
+
+        self.close_sinks()
+        elapsed = max(time.monotonic() - started, 1e-9)
+        logging.info(f"{self.LABEL} - {count - remaining} eventos en {elapsed:.1f}s ({(count - remaining) / elapsed:.0f} eps)")
+        self.report_sink_stats()
+
+    def run_export(self, count, out_dir, chunk_bytes=10 * 1024 * 1024, batch_size=1000):
+        """Exporta count eventos del rango sintético a archivos _bulk NDJSON sin pasar por Logstash"""
+        logging.info(f"{Fore.GREEN}Exportando {count} {self.DESCRIPTION} a {out_dir}...{Style.RESET_ALL}")
+
+        exporter = BulkExporter(out_dir, FAMILIES[self.FAMILY]["index"], chunk_bytes, self.encoder)
+        started = time.monotonic()
+        remaining = count
+        try:
+            while remaining > 0:
+                n = min(batch_size, remaining)
+                for record in self.build_columns(n).records():
+                    exporter.add(*self.bulk_document(record))
+                remaining -= n
+        except KeyboardInterrupt:
+            logging.info(f"{Fore.YELLOW}Deteniendo exportación...{Style.RESET_ALL}")
+
+        exporter.close()
+        elapsed = max(time.monotonic() - started, 1e-9)
+        logging.info(f"{self.LABEL} - {count - remaining} eventos exportados en {elapsed:.1f}s ({(count - remaining) / elapsed:.0f} eps)")
+
+
+def main(simulator_class):
+    """Punto de entrada de los scripts: elige el modo (backfill/exportación, workers, tasa controlada o continuo)"""
+    family = simulator_class.FAMILY
+    args = parse_args(f"Simulador de {simulator_class.DESCRIPTION}")
+    if args.metrics_port and args.workers <= 1:
+        start_metrics_server(args.metrics_port)
+    kwargs = simulator_kwargs(args)
+    kwargs.update(simulator_class.family_kwargs(args))
+    if args.count:
+        clock = SyntheticClock(args.start, args.end, args.count)
+        simulator = simulator_class(clock=clock, **kwargs)
+        if args.export_dir:
+            simulator.run_export(args.count, args.export_dir, int(args.chunk_mb * 1024 * 1024))
+        else:
+            simulator.run_backfill(args.count)
+    elif args.workers > 1:
+        profile = rate_profile(args, family)
+        fleet = FamilyScenario(args.scenario_config, family, simulator_class.FLEET_IDS)
+        run_worker_pool(simulator_class, kwargs, fleet.fleet_ids, profile,
+                        args.workers, simulator_class.LABEL, args.report_interval, args.metrics_port, fleet.weight_of)
+    elif paced_mode(args, family):
+        simulator = simulator_class(**kwargs)
+        profile = rate_profile(args, family)
+        simulator.run_paced(RatePacer(profile, report_interval=args.report_interval))
+    else:
+        simulator = simulator_class(**kwargs)
+        simulator.run()
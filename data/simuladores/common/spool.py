@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Cola en disco para los eventos que no se pudieron entregar a Logstash
+Mientras el destino no responde, los lotes ya serializados se agregan a
+segmentos de solo anexado (spool-0000000001.seg, ...) con una cabecera por
+lote (instante, eventos, bytes). Un cursor persistido indica el siguiente
+lote a reenviar, así que lo pendiente sobrevive a un reinicio del simulador;
+los segmentos ya reenviados se borran. El tamaño total está acotado: con el
+spool lleno los lotes nuevos se descartan y se cuentan
+"""
+
+import glob
+import logging
+import os
+import struct
+import threading
+import time
+
+# Cabecera de cada lote: instante (epoch), eventos y bytes del contenido
+RECORD_HEADER = struct.Struct("<dII")
+CURSOR_FILE = "cursor"
+
+
+def spool_directory(base, host, port, worker_index=None):
+    """Directorio del spool de un destino: <base>/<host>-<port>[.w<índice>]"""
+    name = f"{host}-{port}"
+    if worker_index is not None:
+        # Cada worker tiene su propio spool, como su propio archivo de log
+        name += f".w{worker_index}"
+    return os.path.join(base, name)
+
+
+class DiskSpool:
+    """Cola FIFO acotada de lotes en segmentos de disco con cursor de lectura persistente"""
+
+    def __init__(self, directory, max_bytes=1024 * 1024 * 1024, segment_bytes=64 * 1024 * 1024,
+                 replay_rate=20000.0, fsync=False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        # Eventos/s máximos al reenviar, para no tumbar a Logstash justo cuando se recupera
+        self.replay_rate = replay_rate
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+
+        # Contadores: spooled/replayed/dropped en eventos desde el arranque
+        self.spooled = 0
+        self.replayed = 0
+        self.dropped = 0
+        self.errors = 0
+
+        self._lock = threading.Lock()
+        # Segmentos presentes: [secuencia, bytes] en orden; el último es el de escritura
+        self._segments = []
+        self._depth = 0
+        self._bytes = 0
+        self._head_time = None
+        self._read_seq, self._read_offset = self._load_cursor()
+        self._reader = None
+        self._pending = None
+        self._closed = False
+        self._recover()
+
+        # Siempre un segmento nuevo para escribir: nunca se anexa detrás de un lote incompleto
+        next_seq = self._segments[-1][0] + 1 if self._segments else 1
+        self._open_segment(next_seq)
+        if self._depth:
+            logging.warning(
+                f"Spool {directory}: {self._depth} eventos pendientes de una ejecución anterior "
+                f"({self._bytes / 1024 / 1024:.1f} MB), se reenviarán al conectar"
+            )
+
+    def append(self, payload, count):
+        """Guarda un lote de count eventos; devuelve False si el spool está lleno o falla el disco"""
+        record = RECORD_HEADER.pack(time.time(), count, len(payload)) + payload
+        with self._lock:
+            if self._closed or self._bytes + len(record) > self.max_bytes:
+                self.dropped += count
+                return False
+            try:
+                if self._segments[-1][1] >= self.segment_bytes:
+                    self._writer.close()
+                    self._open_segment(self._segments[-1][0] + 1)
+                self._writer.write(record)
+                if self.fsync:
+                    os.fsync(self._writer.fileno())
+            except OSError as e:
+                logging.error(f"Error escribiendo en el spool {self.directory}: {e} ({count} eventos descartados)")
+                self.errors += 1
+                self.dropped += count
+                return False
+            self._segments[-1][1] += len(record)
+            if not self._depth:
+                self._head_time = time.time()
+            self._depth += count
+            self._bytes += len(record)
+            self.spooled += count
+            return True
+
+    def peek(self):
+        """Siguiente lote pendiente como (instante, eventos, bytes) sin sacarlo, o None si no hay"""
+        with self._lock:
+            if self._pending is None:
+                self._pending = self._read_next()
+            return self._pending
+
+    def commit(self):
+        """Saca el lote devuelto por peek() tras entregarlo y persiste el cursor"""
+        with self._lock:
+            if self._pending is None:
+                return
+            _, count, payload = self._pending
+            self._pending = None
+            self._read_offset += RECORD_HEADER.size + len(payload)
+            self._depth -= count
+            self._bytes -= RECORD_HEADER.size + len(payload)
+            self.replayed += count
+            self._save_cursor()
+            head = self._read_next()
+            self._pending = head
+            self._head_time = head[0] if head is not None else None
+
+    def stats(self):
+        """Eventos y bytes pendientes, antigüedad del más viejo y contadores"""
+        with self._lock:
+            return {
+                "depth": self._depth,
+                "bytes": self._bytes,
+                "oldest_age": time.time() - self._head_time if self._head_time is not None else 0.0,
+                "segments": len(self._segments),
+                "spooled": self.spooled,
+                "replayed": self.replayed,
+                "dropped": self.dropped
+            }
+
+    def close(self):
+        """Cierra los archivos; lo pendiente queda en disco para la próxima ejecución"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._writer.close()
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+            if not self._depth:
+                # Nada pendiente: no quedan segmentos ni cursor
+                for seq, _ in self._segments:
+                    self._remove_segment(seq)
+                self._segments = []
+                self._remove_file(os.path.join(self.directory, CURSOR_FILE))
+            else:
+                if len(self._segments) > 1 and self._segments[-1][1] == 0:
+                    self._remove_segment(self._segments.pop()[0])
+                logging.warning(
+                    f"Spool {self.directory}: quedan {self._depth} eventos ({self._bytes / 1024 / 1024:.1f} MB), "
+                    f"se reenviarán en la próxima ejecución"
+                )
+
+    def _segment_path(self, seq):
+        """Ruta del segmento con esa secuencia"""
+        return os.path.join(self.directory, f"spool-{seq:010d}.seg")
+
+    def _open_segment(self, seq):
+        """Abre un segmento nuevo para anexar (sin buffer: cada lote es una escritura)"""
+        self._writer = open(self._segment_path(seq), 'ab', buffering=0)
+        self._segments.append([seq, 0])
+
+    def _load_cursor(self):
+        """Lee el cursor (segmento y desplazamiento del siguiente lote a reenviar)"""
+        try:
+            with open(os.path.join(self.directory, CURSOR_FILE), encoding='ascii') as f:
+                seq, offset = f.read().split()
+                return int(seq), int(offset)
+        except (OSError, ValueError):
+            return 0, 0
+
+    def _save_cursor(self):
+        """Persiste el cursor de forma atómica"""
+        path = os.path.join(self.directory, CURSOR_FILE)
+        try:
+            with open(path + ".tmp", 'w', encoding='ascii') as f:
+                f.write(f"{self._read_seq} {self._read_offset}")
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            self.errors += 1
+            logging.error(f"Error guardando el cursor del spool {self.directory}: {e}")
+
+    def _recover(self):
+        """Recorre los segmentos existentes: descarta lo ya reenviado y cuenta lo pendiente"""
+        for path in sorted(glob.glob(os.path.join(self.directory, "spool-*.seg"))):
+            seq = int(os.path.basename(path)[6:-4])
+            if seq < self._read_seq:
+                os.remove(path)
+                continue
+            start = self._read_offset if seq == self._read_seq else 0
+            valid, depth, first_time = self._scan(path, start)
+            if valid < os.path.getsize(path):
+                logging.warning(f"Spool {path}: lote incompleto al final, se trunca a {valid} bytes")
+                with open(path, 'r+b') as f:
+                    f.truncate(valid)
+            if valid <= start:
+                os.remove(path)
+                continue
+            self._segments.append([seq, valid])
+            self._depth += depth
+            self._bytes += valid - start
+            if self._head_time is None:
+                self._head_time = first_time
+        if self._segments and self._segments[0][0] != self._read_seq:
+            self._read_seq, self._read_offset = self._segments[0][0], 0
+
+    def _scan(self, path, start):
+        """Recorre las cabeceras de un segmento desde start: (bytes válidos, eventos, instante del primero)"""
+        depth = 0
+        first_time = None
+        offset = start
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            f.seek(start)
+            while offset + RECORD_HEADER.size <= size:
+                stamp, count, length = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+                if offset + RECORD_HEADER.size + length > size:
+                    break
+                f.seek(length, os.SEEK_CUR)
+                offset += RECORD_HEADER.size + length
+                depth += count
+                if first_time is None:
+                    first_time = stamp
+        return offset, depth, first_time
+
+    def _read_next(self):
+        """Lee el lote en el cursor, pasando al segmento siguiente al agotar uno (requiere self._lock)"""
+        while self._depth:
+            if self._reader is None:
+                if not self._segments:
+                    return None
+                if self._read_seq < self._segments[0][0]:
+                    self._read_seq, self._read_offset = self._segments[0][0], 0
+                self._reader = open(self._segment_path(self._read_seq), 'rb', buffering=0)
+            size = self._segments[0][1]
+            if self._read_offset + RECORD_HEADER.size <= size:
+                self._reader.seek(self._read_offset)
+                stamp, count, length = RECORD_HEADER.unpack(self._reader.read(RECORD_HEADER.size))
+                return stamp, count, self._reader.read(length)
+            if len(self._segments) == 1:
+                return None
+            # Segmento agotado y ya no se escribe en él: se borra y se sigue con el siguiente
+            self._reader.close()
+            self._reader = None
+            self._remove_segment(self._segments.pop(0)[0])
+            self._read_seq, self._read_offset = self._segments[0][0], 0
+            self._save_cursor()
+        return None
+
+    def _remove_segment(self, seq):
+        """Borra el archivo de un segmento"""
+        self._remove_file(self._segment_path(seq))
+
+    def _remove_file(self, path):
+        """Borra un archivo ignorando que ya no exista"""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def build_spool(options, host, port, worker_index=None):
+    """Crea el spool a partir de spool_options ({"directory", "max_bytes", ...}) o None si no se pidió"""
+    if not options or not options.get("directory"):
+        return None
+    options = dict(options)
+    directory = spool_directory(options.pop("directory"), host, port, worker_index)
+    spool = DiskSpool(directory, **options)
+    logging.info(
+        f"Spool en disco para {host}:{port}: {directory} (máximo {spool.max_bytes / 1024 / 1024:g} MB, "
+        f"segmentos de {spool.segment_bytes / 1024 / 1024:g} MB, reenvío a {spool.replay_rate:.0f} eps)"
+    )
+    return spool
@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+"""
+Receptor local que sustituye a los inputs tcp de Logstash
+Escucha en los puertos de logstash.conf (5000/5001/5002), separa las líneas
+como el codec json_lines y las parsea, marcando las que no son JSON válido
+(las líneas Apache de web, que Logstash guarda con _jsonparsefailure).
+Con grok, en los puertos indicados aplica además la expresión de
+%{COMBINEDAPACHELOG} al campo message como el filtro de logstash.conf
+(salvo en los eventos que ya traen response) y mide el tiempo de CPU del
+parseo por evento, para comparar los formatos de salida de web.
+Cuenta eventos y bytes por flujo, mide el intervalo entre llegadas y su
+jitter, y puede simular backpressure (lectura limitada, buffer de recepción
+pequeño) y reinicios de conexión (RST) para probar los senders sin el stack.
+HttpInputStandin hace lo mismo con los inputs http (8080/8081/8082), que
+reciben lotes NDJSON comprimidos con gzip. EsBulkStandin simula la API _bulk
+de Elasticsearch, con rechazos 429 opcionales para probar los reintentos de
+la salida directa
+"""
+
+import gzip
+import json
+import math
+import random
+import socket
+import socketserver
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from common.bulk_export import COMBINED_APACHE_RE
+from common.loader import FAMILIES
+from common.metrics import LATENCY_BUCKETS, Histogram
+
+# Nombre de cada flujo por puerto, como los inputs de logstash.conf
+STREAM_NAMES = {spec["port"]: family for family, spec in FAMILIES.items()}
+HTTP_STREAM_NAMES = {spec["http_port"]: family for family, spec in FAMILIES.items()}
+
+RECV_BYTES = 256 * 1024
+
+
+def count_lines(block, parse=True, grok=False):
+    """(eventos, líneas no JSON, eventos sin match de grok) de un bloque de líneas terminadas en salto de línea"""
+    if not parse:
+        return block.count(b'\n'), 0, 0
+    events = invalid = unmatched = 0
+    search = COMBINED_APACHE_RE.search
+    for line in block.split(b'\n'):
+        if not line.strip():
+            continue
+        events += 1
+        try:
+            event = json.loads(line)
+        except ValueError:
+            # Como el codec json_lines: la línea entera queda en message con _jsonparsefailure
+            invalid += 1
+            event = {"message": line.decode('utf-8', errors='replace')}
+        if not grok or not isinstance(event, dict) or "response" in event:
+            continue
+        match = search(event.get("message") or "")
+        if match is None:
+            unmatched += 1
+        else:
+            event.update(match.groupdict())
+    return events, invalid, unmatched
+
+
+class StreamStats:
+    """Contadores de un flujo (puerto) y distribución de los intervalos entre llegadas"""
+
+    def __init__(self, name, port):
+        self.name = name
+        self.port = port
+        self.events = 0
+        self.invalid = 0
+        self.bytes = 0
+        self.connections = 0
+        self.active = 0
+        self.resets = 0
+        self.truncated = 0
+        # Bytes ya descomprimidos (solo inputs http con Content-Encoding; bytes son los de la red)
+        self.decoded_bytes = 0
+        # Eventos sin match de grok (_grokparsefailure) y CPU del hilo lector dedicada a parsear
+        self.grok = False
+        self.unmatched = 0
+        self.parse_seconds = 0.0
+        # Intervalos entre lecturas con datos: histograma y suma/cuadrados para media y jitter
+        self.gaps = Histogram(LATENCY_BUCKETS)
+        self._gap_sq_sum = 0.0
+        self._gap_max = 0.0
+        self._last_arrival = None
+        self._lock = threading.Lock()
+
+    def opened(self):
+        """Registra una conexión nueva"""
+        with self._lock:
+            self.connections += 1
+            self.active += 1
+
+    def closed(self, reset=False, truncated=False):
+        """Registra el cierre de una conexión (reset: cerrada por el receptor con RST)"""
+        with self._lock:
+            self.active -= 1
+            self.resets += reset
+            self.truncated += truncated
+
+    def record(self, size, events, invalid, now, unmatched=0, parse_seconds=0.0):
+        """Registra una lectura de size bytes con sus eventos completos y lo que costó parsearlos"""
+        with self._lock:
+            if self._last_arrival is not None:
+                gap = now - self._last_arrival
+                self._gap_sq_sum += gap * gap
+                self._gap_max = max(self._gap_max, gap)
+                self.gaps.observe(gap)
+            self._last_arrival = now
+            self.bytes += size
+            self.events += events
+            self.invalid += invalid
+            self.unmatched += unmatched
+            self.parse_seconds += parse_seconds
+
+    def wait_for_bytes(self, total, timeout=30.0):
+        """Espera a haber recibido total bytes; devuelve False si vence el plazo"""
+        deadline = time.monotonic() + timeout
+        while self.bytes < total:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def snapshot(self):
+        """Contadores actuales y estadísticas de llegada en milisegundos"""
+        _, gap_sum, gap_count = self.gaps.snapshot()
+        with self._lock:
+            mean = gap_sum / gap_count if gap_count else 0.0
+            variance = max(0.0, self._gap_sq_sum / gap_count - mean * mean) if gap_count else 0.0
+            return {
+                "stream": self.name,
+                "port": self.port,
+                "events": self.events,
+                "invalid": self.invalid,
+                "grok": self.grok,
+                "grok_failures": self.unmatched,
+                "parse_cpu_ms": self.parse_seconds * 1000,
+                "parse_us_per_event": self.parse_seconds * 1e6 / self.events if self.events else 0.0,
+                "bytes": self.bytes,
+                "decoded_bytes": self.decoded_bytes,
+                "connections": self.connections,
+                "active": self.active,
+                "resets": self.resets,
+                "truncated": self.truncated,
+                "gap_mean_ms": mean * 1000,
+                "jitter_ms": math.sqrt(variance) * 1000,
+                "gap_p99_ms": self.gaps.quantile(0.99) * 1000,
+                "gap_max_ms": self._gap_max * 1000
+            }
+
+
+class _StandinServer(socketserver.ThreadingTCPServer):
+    """Servidor TCP que aplica el buffer de recepción antes de escuchar (lo heredan las conexiones)"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, handler, rcvbuf=0):
+        self.rcvbuf = rcvbuf
+        self.stats = None
+        super().__init__(address, handler)
+
+    def server_bind(self):
+        if self.rcvbuf:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
+        super().server_bind()
+
+
+class LogstashStandin:
+    """Receptor json_lines en varios puertos con backpressure y reinicios opcionales"""
+
+    def __init__(self, ports=None, host="0.0.0.0", parse=True, read_rate=0, rcvbuf=0,
+                 reset_interval=0, seed=None, grok_ports=()):
+        self.host = host
+        self.parse = parse
+        # Puertos (tal como se piden, 0 incluido) en los que se aplica el grok de web
+        self.grok_ports = set(grok_ports)
+        # Bytes/s máximos que se leen de cada conexión (0 sin límite)
+        self.read_rate = read_rate
+        self.rcvbuf = rcvbuf
+        # Segundos medios de vida de una conexión antes de cortarla con RST (0 nunca)
+        self.reset_interval = reset_interval
+        self.rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.streams = {}
+        self._servers = []
+        for port in (ports if ports is not None else sorted(STREAM_NAMES)):
+            self._serve(port)
+
+    def _serve(self, port):
+        """Arranca el servidor de un puerto (0 elige uno libre) y registra su flujo"""
+        standin = self
+
+        class LineHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                standin._handle(self.request, self.server.stats)
+
+        server = _StandinServer((self.host, port), LineHandler, self.rcvbuf)
+        bound_port = server.server_address[1]
+        server.stats = StreamStats(STREAM_NAMES.get(port, f"tcp-{bound_port}"), bound_port)
+        server.stats.grok = self.parse and port in self.grok_ports
+        self.streams[bound_port] = server.stats
+        self._servers.append(server)
+        threading.Thread(target=server.serve_forever, name=f"standin-{bound_port}", daemon=True).start()
+
+    def _reset_deadline(self):
+        """Instante en que se cortará una conexión nueva (variación de ±50% sobre el intervalo)"""
+        if not self.reset_interval:
+            return None
+        with self._rng_lock:
+            factor = self.rng.uniform(0.5, 1.5)
+        return time.monotonic() + self.reset_interval * factor
+
+    def _handle(self, sock, stats):
+        """Lee una conexión hasta que se cierra, contando líneas completas"""
+        stats.opened()
+        sock.settimeout(0.5)
+        deadline = self._reset_deadline()
+        started = time.monotonic()
+        received = 0
+        pending = b''
+        reset = False
+        try:
+            while True:
+                if deadline is not None and time.monotonic() >= deadline:
+                    # SO_LINGER 0: el cierre envía RST en lugar de FIN
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+                    sock.close()
+                    reset = True
+                    break
+                try:
+                    data = sock.recv(RECV_BYTES)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    break
+                if not data:
+                    # Al cerrar, el codec entrega la última línea aunque no termine en salto de línea
+                    if pending.strip():
+                        cpu = time.thread_time()
+                        events, invalid, unmatched = count_lines(pending + b'\n', self.parse, stats.grok)
+                        stats.record(0, events, invalid, time.monotonic(), unmatched, time.thread_time() - cpu)
+                        pending = b''
+                    break
+                now = time.monotonic()
+                chunk = pending + data if pending else data
+                cut = chunk.rfind(b'\n') + 1
+                pending = chunk[cut:]
+                cpu = time.thread_time()
+                events, invalid, unmatched = count_lines(chunk[:cut], self.parse, stats.grok) if cut else (0, 0, 0)
+                stats.record(len(data), events, invalid, now, unmatched, time.thread_time() - cpu)
+
+                if self.read_rate:
+                    # Backpressure: no leer más rápido que read_rate; el buffer TCP se llena y el sender espera
+                    received += len(data)
+                    ahead = received / self.read_rate - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        finally:
+            stats.closed(reset=reset, truncated=bool(pending.strip()))
+
+    def snapshot(self):
+        """Estado de todos los flujos"""
+        return [stats.snapshot() for stats in self.streams.values()]
+
+    def close(self):
+        """Deja de aceptar conexiones"""
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+
+class HttpInputStandin:
+    """Inputs http mínimos con keep-alive: descomprimen cada lote gzip y cuentan sus líneas como json_lines"""
+
+    def __init__(self, ports=None, host="0.0.0.0", parse=True, grok_ports=()):
+        self.host = host
+        self.parse = parse
+        self.grok_ports = set(grok_ports)
+        self.streams = {}
+        self._servers = []
+        for port in (ports if ports is not None else sorted(HTTP_STREAM_NAMES)):
+            self._serve(port)
+
+    def _serve(self, port):
+        """Arranca el servidor HTTP de un puerto (0 elige uno libre) y registra su flujo"""
+        standin = self
+
+        class InputHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                self.server.stats.opened()
+
+            def finish(self):
+                super().finish()
+                self.server.stats.closed()
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                status = standin._batch(self.server.stats, body, self.headers.get("Content-Encoding"))
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((self.host, port), InputHandler)
+        server.daemon_threads = True
+        bound_port = server.server_address[1]
+        server.stats = StreamStats(HTTP_STREAM_NAMES.get(port, f"http-{bound_port}"), bound_port)
+        server.stats.grok = self.parse and port in self.grok_ports
+        self.streams[bound_port] = server.stats
+        self._servers.append(server)
+        threading.Thread(target=server.serve_forever, name=f"standin-http-{bound_port}", daemon=True).start()
+
+    def _batch(self, stats, body, encoding):
+        """Cuenta un lote; devuelve el status HTTP (415 si el códec no es gzip, 400 si no descomprime)"""
+        now = time.monotonic()
+        size = len(body)
+        if encoding == "gzip":
+            try:
+                body = gzip.decompress(body)
+            except (OSError, EOFError):
+                return 400
+        elif encoding:
+            return 415
+        if body and not body.endswith(b'\n'):
+            body += b'\n'
+        cpu = time.thread_time()
+        events, invalid, unmatched = count_lines(body, self.parse, stats.grok)
+        stats.record(size, events, invalid, now, unmatched, time.thread_time() - cpu)
+        with stats._lock:
+            stats.decoded_bytes += len(body)
+        return 200
+
+    def snapshot(self):
+        """Estado de todos los flujos"""
+        return [stats.snapshot() for stats in self.streams.values()]
+
+    def close(self):
+        """Deja de aceptar peticiones"""
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+
+class BulkStats:
+    """Contadores de la API _bulk: peticiones, documentos por índice y rechazos"""
+
+    def __init__(self, port):
+        self.port = port
+        self.requests = 0
+        self.connections = 0
+        self.docs = 0
+        self.invalid = 0
+        self.bytes = 0
+        self.gzip = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.indices = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        """Contadores actuales"""
+        with self._lock:
+            return {
+                "stream": "_bulk",
+                "port": self.port,
+                "requests": self.requests,
+                "connections": self.connections,
+                "events": self.docs,
+                "invalid": self.invalid,
+                "bytes": self.bytes,
+                "gzip_requests": self.gzip,
+                "rejected": self.rejected,
+                "throttled": self.throttled,
+                "indices": dict(self.indices)
+            }
+
+
+class EsBulkStandin:
+    """API _bulk mínima con keep-alive que cuenta documentos y puede rechazarlos con 429"""
+
+    def __init__(self, port=9200, host="0.0.0.0", reject_rate=0.0, throttle_rate=0.0, seed=None):
+        # Fracción de documentos rechazados con 429 dentro de una respuesta 200 (cola de escritura llena)
+        self.reject_rate = reject_rate
+        # Fracción de peticiones completas respondidas con 429
+        self.throttle_rate = throttle_rate
+        self.rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        standin = self
+
+        class BulkHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with standin.stats._lock:
+                    standin.stats.connections += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if not self.path.split('?')[0].endswith("/_bulk"):
+                    self._reply(404, {"error": "solo se simula _bulk"})
+                    return
+                if self.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                    with standin.stats._lock:
+                        standin.stats.gzip += 1
+                status, result = standin._bulk(body)
+                self._reply(status, result)
+
+            def _reply(self, status, result):
+                data = json.dumps(result).encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), BulkHandler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self.stats = BulkStats(self.port)
+        threading.Thread(target=self._server.serve_forever, name=f"standin-bulk-{self.port}", daemon=True).start()
+
+    def _bulk(self, body):
+        """(status, respuesta) de una petición _bulk con pares acción + documento"""
+        with self._rng_lock:
+            throttled = self.rng.random() < self.throttle_rate
+        if throttled:
+            with self.stats._lock:
+                self.stats.requests += 1
+                self.stats.throttled += 1
+                self.stats.bytes += len(body)
+            return 429, {"error": {"type": "es_rejected_execution_exception"}, "status": 429}
+
+        lines = [line for line in body.split(b'\n') if line.strip()]
+        items = []
+        indices = {}
+        rejected = invalid = 0
+        for action_line, doc_line in zip(lines[::2], lines[1::2]):
+            try:
+                index = json.loads(action_line)["index"]["_index"]
+                json.loads(doc_line)
+            except (ValueError, KeyError, TypeError):
+                invalid += 1
+                items.append({"index": {"status": 400, "error": {"type": "mapper_parsing_exception"}}})
+                continue
+            with self._rng_lock:
+                reject = self.rng.random() < self.reject_rate
+            if reject:
+                rejected += 1
+                items.append({"index": {"_index": index, "status": 429,
+                                        "error": {"type": "es_rejected_execution_exception"}}})
+            else:
+                indices[index] = indices.get(index, 0) + 1
+                items.append({"index": {"_index": index, "status": 201, "result": "created"}})
+
+        with self.stats._lock:
+            self.stats.requests += 1
+            self.stats.bytes += len(body)
+            self.stats.docs += len(items) - rejected - invalid
+            self.stats.rejected += rejected
+            self.stats.invalid += invalid
+            for index, count in indices.items():
+                self.stats.indices[index] = self.stats.indices.get(index, 0) + count
+        return 200, {"took": 1, "errors": bool(rejected or invalid), "items": items}
+
+    def snapshot(self):
+        """Estado de la API _bulk"""
+        return self.stats.snapshot()
+
+    def close(self):
+        """Deja de aceptar peticiones"""
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Trazas distribuidas coherentes para el simulador de microservicios
+Cada petición recorre un grafo de llamadas (gateway -> auth -> order ->
+payment/inventory ...) y produce un árbol de spans que comparten trace_id,
+con parent_span_id y duraciones anidadas: la duración de cada span es su
+tiempo propio más la de sus llamadas hijas (ejecutadas en secuencia) y cada
+hijo empieza dentro del intervalo de su padre
+Los ids siguen el formato W3C (32 y 16 hex) y salen de getrandbits del
+generador del simulador, sin pasar por uuid
+"""
+
+import json
+
+# Grafo por defecto: puntos de entrada con su peso, llamadas (hijo, probabilidad)
+# y tiempo propio de cada servicio en ms [mínimo, máximo]
+DEFAULT_CALL_GRAPH = {
+    "entrypoints": {
+        "gateway-service": 0.85,
+        "monitoring-service": 0.1,
+        "analytics-service": 0.05
+    },
+    "calls": {
+        "gateway-service": [["auth-service", 1.0], ["order-service", 0.5], ["user-service", 0.35]],
+        "auth-service": [["user-service", 0.3], ["config-service", 0.05]],
+        "order-service": [["inventory-service", 0.9], ["payment-service", 0.7], ["notification-service", 0.4]],
+        "payment-service": [["notification-service", 0.3]],
+        "user-service": [["analytics-service", 0.2]],
+        "monitoring-service": [["config-service", 0.5]]
+    },
+    "latency_ms": {
+        "gateway-service": [1, 10],
+        "auth-service": [2, 30],
+        "user-service": [2, 40],
+        "order-service": [5, 80],
+        "inventory-service": [2, 60],
+        "payment-service": [20, 400],
+        "notification-service": [1, 50],
+        "analytics-service": [1, 20],
+        "config-service": [1, 5],
+        "monitoring-service": [1, 10]
+    }
+}
+
+# Límite de profundidad por si el grafo configurado tiene ciclos
+MAX_DEPTH = 8
+
+
+def load_call_graph(path=None):
+    """Lee un grafo de llamadas JSON (mismas claves que DEFAULT_CALL_GRAPH) o devuelve el de por defecto"""
+    if not path:
+        return DEFAULT_CALL_GRAPH
+    with open(path, encoding='utf-8') as f:
+        graph = json.load(f)
+    for key in ("entrypoints", "calls"):
+        if key not in graph:
+            raise ValueError(f"El grafo de llamadas {path} no tiene la clave '{key}'")
+    return graph
+
+
+class Span:
+    """Span terminado de una traza"""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "service", "start", "duration", "error", "depth")
+
+    def __init__(self, trace_id, span_id, parent_id, service, start, duration, error, depth):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.service = service
+        # Instante de inicio (segundos desde epoch)
+        self.start = start
+        self.duration = duration
+        self.error = error
+        self.depth = depth
+
+
+class TraceGenerator:
+    """Genera árboles de spans recorriendo el grafo de llamadas"""
+
+    def __init__(self, rng, call_graph=None, error_rate=0.03, error_propagation=0.5):
+        self.rng = rng
+        graph = call_graph or DEFAULT_CALL_GRAPH
+        self.entrypoints = list(graph["entrypoints"])
+        self.entry_weights = list(graph["entrypoints"].values())
+        self.calls = {service: [tuple(call) for call in calls] for service, calls in graph["calls"].items()}
+        self.latency = {
+            service: (low / 1000.0, high / 1000.0)
+            for service, (low, high) in graph.get("latency_ms", {}).items()
+        }
+        self.error_rate = error_rate
+        self.error_propagation = error_propagation
+
+    def trace_id(self):
+        """Trace id de 128 bits en hexadecimal"""
+        return "%032x" % self.rng.getrandbits(128)
+
+    def span_id(self):
+        """Span id de 64 bits en hexadecimal"""
+        return "%016x" % self.rng.getrandbits(64)
+
+    def self_time(self, service):
+        """Tiempo propio de un span en segundos, sesgado hacia el mínimo"""
+        low, high = self.latency.get(service, (0.001, 0.05))
+        return low + (high - low) * self.rng.random() ** 2
+
+    def generate(self, end=0.0):
+        """Spans de una petición en orden de finalización (hijos antes que el padre); la raíz termina en end"""
+        service = self.rng.choices(self.entrypoints, self.entry_weights)[0]
+        spans = []
+        root = self._walk(self.trace_id(), None, service, 0, 0.0, spans)
+        shift = end - root.duration
+        for span in spans:
+            span.start += shift
+        return spans
+
+    def _walk(self, trace_id, parent_id, service, depth, start, spans):
+        """Genera el span de service que empieza en start y, antes, los de sus llamadas; devuelve el span"""
+        span_id = self.span_id()
+        rand = self.rng.random
+        duration = self.self_time(service)
+        error = rand() < self.error_rate
+
+        if depth < MAX_DEPTH:
+            # Las llamadas salen tras la mitad del tiempo propio, una detrás de otra
+            offset = start + duration / 2
+            for child, probability in self.calls.get(service, ()):
+                if rand() >= probability:
+                    continue
+                child_span = self._walk(trace_id, span_id, child, depth + 1, offset, spans)
+                offset += child_span.duration
+                duration += child_span.duration
+                if child_span.error and rand() < self.error_propagation:
+                    error = True
+
+        span = Span(trace_id, span_id, parent_id, service, start, duration, error, depth)
+        spans.append(span)
+        return span
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Perfiles de tráfico: tasa y mezcla de errores que cambian con el tiempo
+Un archivo JSON describe la tasa base de cada familia y lo que la modula:
+ciclo diario sinusoidal, ráfagas Poisson y incidentes programados que suben
+la tasa y fuerzan errores (por ejemplo una tormenta de "Too many connections"
+en db que también eleva los ERROR de micro y los 5xx de web). Con la misma
+semilla el perfil es repetible: las ráfagas salen de un generador propio y
+los incidentes dependen solo del tiempo transcurrido desde el inicio
+"""
+
+import json
+import logging
+import math
+import random
+import time
+
+from common.loader import FAMILIES
+from common.sampling import WeightedChoice
+from common.seeding import derive_seed
+
+
+def _check_range(value, low, high, label):
+    """Valida que value sea un número en [low, high]"""
+    if not isinstance(value, (int, float)) or not low <= value <= high:
+        raise ValueError(f"{label} debe ser un número entre {low} y {high} (recibido: {value!r})")
+
+
+def _check_pair(value, label):
+    """Valida un rango [mínimo, máximo] de números positivos"""
+    if not isinstance(value, (list, tuple)) or len(value) != 2 or not 0 < value[0] <= value[1]:
+        raise ValueError(f"{label} debe ser [mínimo, máximo] con 0 < mínimo <= máximo (recibido: {value!r})")
+
+
+def validate_traffic(config):
+    """Comprueba las claves y rangos de un perfil de tráfico; lanza ValueError con el problema"""
+    if not isinstance(config, dict):
+        raise ValueError("El perfil de tráfico debe ser un objeto JSON")
+    eps = config.get("eps")
+    if not isinstance(eps, dict) or not eps:
+        raise ValueError("El perfil de tráfico necesita 'eps' con la tasa base de al menos una familia")
+    for family, rate in eps.items():
+        if family not in FAMILIES:
+            raise ValueError(f"Familia desconocida en eps: {family} (opciones: {', '.join(FAMILIES)})")
+        _check_range(rate, 0, float("inf"), f"eps.{family}")
+
+    diurnal = config.get("diurnal")
+    if diurnal:
+        _check_range(diurnal.get("amplitude", 0), 0, 1, "diurnal.amplitude")
+        _check_range(diurnal.get("peak_hour", 0), 0, 24, "diurnal.peak_hour")
+        _check_range(diurnal.get("period_hours", 24), 0.001, float("inf"), "diurnal.period_hours")
+
+    bursts = config.get("bursts")
+    if bursts:
+        _check_range(bursts.get("per_hour", 0), 0, float("inf"), "bursts.per_hour")
+        _check_pair(bursts.get("multiplier", [1, 1]), "bursts.multiplier")
+        _check_pair(bursts.get("duration_s", [1, 1]), "bursts.duration_s")
+
+    for index, incident in enumerate(config.get("incidents", [])):
+        label = f"incidents[{index}] ({incident.get('name', 'sin nombre')})"
+        for key in ("start_s", "duration_s"):
+            if key not in incident:
+                raise ValueError(f"{label} necesita '{key}'")
+            _check_range(incident[key], 0, float("inf"), f"{label}.{key}")
+        _check_range(incident.get("ramp_s", 0), 0, incident["duration_s"] / 2.0, f"{label}.ramp_s")
+        if incident.get("every_s"):
+            _check_range(incident["every_s"], incident["duration_s"], float("inf"), f"{label}.every_s")
+        for family, effect in incident.get("effects", {}).items():
+            if family not in FAMILIES:
+                raise ValueError(f"{label}: familia desconocida en effects: {family}")
+            _check_range(effect.get("rate", 1), 0, float("inf"), f"{label}.effects.{family}.rate")
+            _check_range(effect.get("error_rate", 0), 0, 1, f"{label}.effects.{family}.error_rate")
+            errors = effect.get("errors", {})
+            if not isinstance(errors, dict) or any(weight <= 0 for weight in errors.values()):
+                raise ValueError(f"{label}.effects.{family}.errors debe ser {{error: peso > 0}}")
+    return config
+
+
+def load_traffic(path):
+    """Lee y valida un perfil de tráfico JSON"""
+    with open(path, encoding='utf-8') as f:
+        return validate_traffic(json.load(f))
+
+
+class TrafficModel:
+    """Tasa objetivo y errores forzados de una familia según el perfil de tráfico"""
+
+    def __init__(self, config, family, seed=None, start=None):
+        self.family = family
+        self.eps = float(config["eps"].get(family, 0))
+        # Instante (epoch) que corresponde a t=0 del perfil: el reloj real o el inicio del rango sintético
+        self.start = start if start is not None else time.time()
+
+        diurnal = config.get("diurnal") or {}
+        self.amplitude = diurnal.get("amplitude", 0.0)
+        self.peak_hour = diurnal.get("peak_hour", 0.0)
+        self.period_hours = diurnal.get("period_hours", 24.0)
+
+        # Ráfagas: mismas para todas las familias con la misma semilla (un pico de tráfico toca todas las capas)
+        seed = config.get("seed", seed)
+        self.rng = random.Random(derive_seed(seed, "traffic") if seed is not None else None)
+        bursts = config.get("bursts") or {}
+        self.burst_rate = bursts.get("per_hour", 0) / 3600.0
+        self.burst_multiplier = bursts.get("multiplier", [1, 1])
+        self.burst_duration = bursts.get("duration_s", [1, 1])
+        self._bursts = []
+        self._next_burst = self.rng.expovariate(self.burst_rate) if self.burst_rate > 0 else None
+
+        self.incidents = []
+        for incident in config.get("incidents", []):
+            effect = incident.get("effects", {}).get(self.family)
+            if not effect:
+                continue
+            errors = effect.get("errors") or {}
+            values = [int(error) if family == "web" else error for error in errors]
+            self.incidents.append({
+                "name": incident.get("name", "incidente"),
+                "start": incident["start_s"],
+                "duration": incident["duration_s"],
+                "ramp": incident.get("ramp_s", 0),
+                "every": incident.get("every_s", 0),
+                "rate": effect.get("rate", 1.0),
+                "error_rate": effect.get("error_rate", 0.0),
+                "errors": WeightedChoice(values, list(errors.values())) if errors else None
+            })
+        self._active = set()
+
+    def diurnal_factor(self, t):
+        """Factor del ciclo diario (1 ± amplitud, máximo en peak_hour de la hora local)"""
+        if not self.amplitude:
+            return 1.0
+        epoch = self.start + t
+        local_hours = (epoch + time.localtime(epoch).tm_gmtoff) / 3600.0
+        return 1.0 + self.amplitude * math.cos(2 * math.pi * (local_hours - self.peak_hour) / self.period_hours)
+
+    def burst_factor(self, t):
+        """Multiplicador de la ráfaga activa en t (1 si no hay ninguna)"""
+        if self._next_burst is None:
+            return 1.0
+        # Las ráfagas se generan en orden, así que la secuencia no depende de cuándo se consulte
+        while self._next_burst <= t:
+            start = self._next_burst
+            self._bursts.append((
+                start, start + self.rng.uniform(*self.burst_duration), self.rng.uniform(*self.burst_multiplier)
+            ))
+            self._next_burst = start + self.rng.expovariate(self.burst_rate)
+        factor = 1.0
+        for start, end, multiplier in self._bursts:
+            if start <= t < end:
+                factor = max(factor, multiplier)
+        self._bursts = [burst for burst in self._bursts if burst[1] > t]
+        return factor
+
+    def intensity(self, incident, t):
+        """Intensidad del incidente en t: 0 fuera, 1 en pleno, rampas lineales al entrar y salir"""
+        offset = t - incident["start"]
+        if offset < 0:
+            return 0.0
+        if incident["every"]:
+            offset %= incident["every"]
+        if offset >= incident["duration"]:
+            return 0.0
+        ramp = incident["ramp"]
+        if not ramp:
+            return 1.0
+        return min(1.0, offset / ramp, (incident["duration"] - offset) / ramp)
+
+    def rate_at(self, elapsed):
+        """Eventos por segundo objetivo a los elapsed segundos del inicio (interfaz de los perfiles de RatePacer)"""
+        rate = self.eps * self.diurnal_factor(elapsed) * self.burst_factor(elapsed)
+        for incident in self.incidents:
+            level = self.intensity(incident, elapsed)
+            if level:
+                rate *= 1.0 + (incident["rate"] - 1.0) * level
+        return rate
+
+    def errors_at(self, now):
+        """(probabilidad de forzar un error, WeightedChoice del error o None) en el instante epoch now"""
+        t = now - self.start
+        keep = 1.0
+        strongest, choice = 0.0, None
+        for incident in self.incidents:
+            level = self.intensity(incident, t)
+            self._log_transition(incident, level > 0, t)
+            rate = incident["error_rate"] * level
+            if not rate:
+                continue
+            keep *= 1.0 - rate
+            if rate > strongest:
+                strongest, choice = rate, incident["errors"]
+        return 1.0 - keep, choice
+
+    def _log_transition(self, incident, active, t):
+        """Registra cuándo empieza y termina cada incidente"""
+        name = incident["name"]
+        if active and name not in self._active:
+            self._active.add(name)
+            logging.warning(f"Perfil de tráfico ({self.family}): incidente {name} activo a los {t:.0f}s")
+        elif not active and name in self._active:
+            self._active.discard(name)
+            logging.info(f"Perfil de tráfico ({self.family}): incidente {name} terminado a los {t:.0f}s")
+
+
+def build_traffic(options, family, start=None):
+    """Crea el modelo a partir de traffic_options ({"config", "seed"}) o None si no hay perfil"""
+    if not options or not options.get("config"):
+        return None
+    model = TrafficModel(options["config"], family, options.get("seed"), start)
+    logging.info(
+        f"Perfil de tráfico ({family}): {model.eps:.0f} eps base, ciclo diario ±{model.amplitude * 100:.0f}%, "
+        f"{model.burst_rate * 3600:.1f} ráfagas/h, {len(model.incidents)} incidentes"
+    )
+    return model
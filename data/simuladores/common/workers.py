@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Reparto de la flota simulada entre varios procesos
+Cada worker genera los eventos de un rango contiguo de ids (servidores,
+bases de datos o instancias) con su propia conexión a Logstash y su propia
+semilla; el proceso padre agrega el throughput que reporta cada worker
+"""
+
+import logging
+import multiprocessing
+import queue
+import random
+import signal
+import time
+
+from common.metrics import start_metrics_server
+from common.pacing import RatePacer, ScaledProfile
+from common.seeding import derive_seed
+
+
+def shard_ids(ids, n_workers):
+    """Divide la lista de ids en n_workers rangos contiguos de tamaño similar"""
+    size, extra = divmod(len(ids), n_workers)
+    shards = []
+    start = 0
+    for index in range(n_workers):
+        end = start + size + (1 if index < extra else 0)
+        shards.append(ids[start:end])
+        start = end
+    return shards
+
+
+def _stop_on_sigterm(signum, frame):
+    """Convierte SIGTERM en KeyboardInterrupt una sola vez para cerrar limpio"""
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    raise KeyboardInterrupt
+
+
+def _worker_main(factory, kwargs, index, shard, seed, profile, share, report_interval, stats_queue, metrics_port):
+    """Punto de entrada de cada proceso worker"""
+    # Ctrl+C lo gestiona el padre, que detiene a los workers con SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, _stop_on_sigterm)
+    if metrics_port:
+        # Cada worker expone sus propias métricas en un puerto consecutivo
+        start_metrics_server(metrics_port + index)
+
+    simulator = factory(fleet_ids=shard, worker_index=index, seed=seed, **kwargs)
+    pacer = RatePacer(ScaledProfile(profile, share), report_interval=report_interval)
+
+    def reporter(snapshot, sender_stats):
+        stats_queue.put((index, snapshot, sender_stats))
+
+    simulator.run_paced(pacer, reporter=reporter)
+
+
+def _log_aggregate(label, shards, latest):
+    """Registra el throughput de cada worker y el total agregado"""
+    total_achieved = total_target = 0.0
+    total_events = total_sent = total_failed = total_bytes = 0
+    for index in sorted(latest):
+        snapshot, stats = latest[index]
+        shard = shards[index]
+        logging.info(
+            f"{label} worker {index} (ids {shard[0]}-{shard[-1]}) - "
+            f"lograda: {snapshot['achieved']:.0f}/{snapshot['target']:.0f} eps, "
+            f"enviados: {stats['sent']}, fallidos: {stats['failed']}"
+            f"{', en spool: ' + str(stats['spool_depth']) if 'spool_depth' in stats else ''}"
+        )
+        total_achieved += snapshot["achieved"]
+        total_target += snapshot["target"]
+        total_events += snapshot["total"]
+        total_sent += stats["sent"]
+        total_failed += stats["failed"]
+        total_bytes += stats["bytes_sent"]
+
+    ratio = (total_achieved / total_target * 100) if total_target > 0 else 0.0
+    logging.info(
+        f"{label} total ({len(latest)}/{len(shards)} workers) - tasa objetivo: {total_target:.0f} eps, "
+        f"lograda: {total_achieved:.0f} eps ({ratio:.1f}%), total: {total_events}, "
+        f"enviados: {total_sent}, fallidos: {total_failed}, bytes: {total_bytes}"
+    )
+
+
+def run_worker_pool(factory, kwargs, fleet_ids, profile, n_workers, label, report_interval=10.0, metrics_port=0,
+                    weight_of=len):
+    """Lanza n_workers procesos que se reparten fleet_ids y la tasa del perfil (en proporción a weight_of de cada rango)"""
+    fleet_ids = list(fleet_ids)
+    if n_workers > len(fleet_ids):
+        logging.warning(f"{label}: {n_workers} workers para {len(fleet_ids)} ids, se usarán {len(fleet_ids)}")
+        n_workers = len(fleet_ids)
+
+    shards = shard_ids(fleet_ids, n_workers)
+    # Con semilla base cada worker recibe una sub-semilla estable; sin ella, una aleatoria
+    kwargs = dict(kwargs)
+    base_seed = kwargs.pop("seed", None)
+    if base_seed is not None:
+        seeds = [derive_seed(base_seed, "worker", index) for index in range(len(shards))]
+    else:
+        seeds = [random.SystemRandom().getrandbits(64) for _ in shards]
+    stats_queue = multiprocessing.Queue()
+
+    processes = []
+    for index, shard in enumerate(shards):
+        share = weight_of(shard) / weight_of(fleet_ids)
+        process = multiprocessing.Process(
+            target=_worker_main,
+            args=(factory, kwargs, index, shard, seeds[index], profile, share, report_interval, stats_queue, metrics_port),
+            name=f"{label}-worker-{index}"
+        )
+        process.start()
+        processes.append(process)
+        logging.info(f"{label} worker {index} iniciado: ids {shard[0]}-{shard[-1]}, semilla {seeds[index]}")
+
+    signal.signal(signal.SIGTERM, _stop_on_sigterm)
+    latest = {}
+    last_report = time.monotonic()
+
+    try:
+        while any(process.is_alive() for process in processes):
+            try:
+                index, snapshot, stats = stats_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            latest[index] = (snapshot, stats)
+            if time.monotonic() - last_report >= report_interval:
+                _log_aggregate(label, shards, latest)
+                last_report = time.monotonic()
+    except KeyboardInterrupt:
+        logging.info(f"{label}: deteniendo {len(processes)} workers...")
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    # Vaciar la cola mientras terminan para que ningún worker quede bloqueado en put()
+    deadline = time.monotonic() + 15
+    while any(process.is_alive() for process in processes) and time.monotonic() < deadline:
+        try:
+            index, snapshot, stats = stats_queue.get(timeout=0.2)
+            latest[index] = (snapshot, stats)
+        except queue.Empty:
+            pass
+    while True:
+        try:
+            index, snapshot, stats = stats_queue.get_nowait()
+            latest[index] = (snapshot, stats)
+        except queue.Empty:
+            break
+
+    if latest:
+        _log_aggregate(label, shards, latest)
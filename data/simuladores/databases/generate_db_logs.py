@@ -4,15 +4,21 @@ Simulador de logs de bases de datos para ELK Stack
 Genera logs realistas de MySQL y PostgreSQL cada 5-10 segundos
 """
 
-import random
 import time
-import json
-import socket
 import logging
+import os
+import sys
+from array import array
 from datetime import datetime, timedelta
-from faker import Faker
 from colorama import init, Fore, Style
 
+# Módulos compartidos (data/simuladores/common, montado en /app/common)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.batch import FLOAT, ID, INT, NULL_FLOAT, STR, TEXT, EventBatch, json_schema
+from common.bulk_export import iso_to_datetime
+from common.entities import build_entities
+from common.simulator import BaseSimulator, main
+
 # Inicializar colorama para output colorizado
 init()
 
@@ -22,12 +28,23 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-class DatabaseLogSimulator:
-    def __init__(self):
-        self.fake = Faker()
-        self.log_file = "/app/logs/db-logs.log"
-        self.tcp_host = "elk-logstash"
-        self.tcp_port = 5001
+class DatabaseLogSimulator(BaseSimulator):
+    FAMILY = "db"
+    LABEL = "DB"
+    LOG_FILE = "/app/logs/db-logs.log"
+    DESCRIPTION = "logs de bases de datos"
+    # Flota simulada por defecto: 5 bases de datos (un escenario la reemplaza)
+    FLEET_IDS = range(1, 6)
+
+    def __init__(self, tcp_host="elk-logstash", tcp_port=None, fleet_ids=None, clock=None, file_options=None, worker_index=None, seed=None, probe_options=None, encoder=None, traffic_options=None, es_options=None, entity_options=None, console_options=None, spool_options=None, http_options=None, scenario=None, outputs=True):
+        super().__init__(
+            tcp_host=tcp_host, tcp_port=tcp_port, fleet_ids=fleet_ids, clock=clock, file_options=file_options,
+            worker_index=worker_index, seed=seed, probe_options=probe_options, encoder=encoder,
+            traffic_options=traffic_options, es_options=es_options, console_options=console_options,
+            spool_options=spool_options, http_options=http_options, scenario=scenario, outputs=outputs
+        )
+        # Pools de entidades (tenants, hosts cliente, huellas de consultas con parámetros); None sin --cardinality
+        self.entities = build_entities(entity_options)
         
         # Tipos de bases de datos
         self.db_types = ["mysql", "postgresql"]
@@ -39,6 +56,11 @@ class DatabaseLogSimulator:
             ("ERROR", 0.15)  # 15% errores
         ]
         
+        # Las tablas del escenario reemplazan a las de arriba (ya normalizadas a probabilidades)
+        self.log_levels = self.scenario.table("levels", self.log_levels)
+        # Probabilidad de mysql frente a postgresql (mitad y mitad por defecto)
+        self.mysql_share = dict(self.scenario.table("db_types", [("mysql", 0.5)])).get("mysql", 0.0)
+        
         # Queries MySQL comunes
         self.mysql_queries = [
             "SELECT * FROM users WHERE id = ?",
@@ -94,14 +116,54 @@ class DatabaseLogSimulator:
             "Replication lag detected",
             "Cache hit ratio low"
         ]
+        
+        # Schema de los lotes en columnas (mismas claves y orden que generate_mysql_log / generate_postgresql_log)
+        # La variante 1 (postgresql) usa process_id en lugar de thread_id
+        # Con pools de entidades se agregan tenant, host cliente, tabla e id de la huella (mismo orden que build_db_log)
+        fields = [
+            ("timestamp", ID), ("db_type", STR), ("thread_id", INT), ("level", STR),
+            ("message", TEXT), ("query", STR), ("duration", FLOAT),
+            ("db_instance", STR), ("server_id", STR)
+        ]
+        if self.entities is not None:
+            fields += [("tenant_id", STR), ("client_host", STR), ("table", STR), ("query_id", STR)]
+        self.batch_schema = json_schema(fields, renames=[{}, {"thread_id": "process_id"}])
+        self.db_type_table = self.batch_schema.table("db_type")
+        for db_type in self.db_types:
+            self.db_type_table.intern(db_type)
+        self.level_table = self.batch_schema.table("level")
+        self.query_table = self.batch_schema.table("query")
+        self.query_table.intern(None)
+        # Índices internados de db_instance y server_id por id de la flota
+        self.instance_index = {
+            db_id: (self.batch_schema.table("db_instance").intern(f"db-{db_id:02d}"),
+                    self.batch_schema.table("server_id").intern(f"db-server-{db_id:02d}"))
+            for db_id in self.fleet_ids
+        }
+        if self.entities is not None:
+            # Cada valor de los pools se interna una sola vez: el lote guarda solo índices
+            entities = self.entities
+            self.tenant_index = entities.tenants.interned(self.batch_schema.table("tenant_id"))
+            self.host_index = entities.hosts.interned(self.batch_schema.table("client_host"))
+            fingerprints = entities.queries.values
+            self.fingerprint_index = [
+                [self.query_table.intern(fingerprint.texts[dialect]) for fingerprint in fingerprints]
+                for dialect in range(len(self.db_types))
+            ]
+            table_column = self.batch_schema.table("table")
+            query_id_column = self.batch_schema.table("query_id")
+            table_column.intern(None)
+            query_id_column.intern(None)
+            self.fingerprint_table_index = [table_column.intern(fingerprint.table) for fingerprint in fingerprints]
+            self.fingerprint_id_index = [query_id_column.intern(fingerprint.query_id) for fingerprint in fingerprints]
 
     def generate_timestamp(self):
         """Genera un timestamp en formato ISO8601"""
-        return datetime.now().isoformat()
+        return self.clock.iso()
 
     def generate_log_level(self):
         """Genera un nivel de log basado en probabilidades"""
-        rand = random.random()
+        rand = self.rng.random()
         cumulative = 0
         for level, prob in self.log_levels:
             cumulative += prob
@@ -112,15 +174,15 @@ class DatabaseLogSimulator:
     def generate_mysql_log(self, level):
         """Genera un log de MySQL"""
         timestamp = self.generate_timestamp()
-        thread_id = random.randint(1000, 9999)
+        thread_id = self.rng.randint(1000, 9999)
         
         if level == "ERROR":
-            message = random.choice(self.error_messages)
+            message = self.rng.choice(self.error_messages)
         elif level == "WARN":
-            message = random.choice(self.warning_messages)
+            message = self.rng.choice(self.warning_messages)
         else:
-            query = random.choice(self.mysql_queries)
-            duration = random.uniform(0.001, 2.0)
+            query = self.rng.choice(self.mysql_queries)
+            duration = self.rng.uniform(0.001, 2.0)
             message = f"Query: {query} | Duration: {duration:.3f}s"
         
         log_line = f"{timestamp} {thread_id} [{level}] {message}"
@@ -132,21 +194,21 @@ class DatabaseLogSimulator:
             "level": level,
             "message": message,
             "query": query if level == "INFO" else None,
-            "duration": random.uniform(0.001, 2.0) if level == "INFO" else None
+            "duration": self.rng.uniform(0.001, 2.0) if level == "INFO" else None
         }
 
     def generate_postgresql_log(self, level):
         """Genera un log de PostgreSQL"""
         timestamp = self.generate_timestamp()
-        process_id = random.randint(1000, 9999)
+        process_id = self.rng.randint(1000, 9999)
         
         if level == "ERROR":
-            message = random.choice(self.error_messages)
+            message = self.rng.choice(self.error_messages)
         elif level == "WARN":
-            message = random.choice(self.warning_messages)
+            message = self.rng.choice(self.warning_messages)
         else:
-            query = random.choice(self.postgresql_queries)
-            duration = random.uniform(0.001, 2.0)
+            query = self.rng.choice(self.postgresql_queries)
+            duration = self.rng.uniform(0.001, 2.0)
             message = f"Query: {query} | Duration: {duration:.3f}s"
         
         return {
@@ -156,80 +218,182 @@ class DatabaseLogSimulator:
             "level": level,
             "message": message,
             "query": query if level == "INFO" else None,
-            "duration": random.uniform(0.001, 2.0) if level == "INFO" else None
+            "duration": self.rng.uniform(0.001, 2.0) if level == "INFO" else None
         }
 
-    def send_to_logstash(self, log_data):
-        """Envía el log a Logstash vía TCP"""
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.connect((self.tcp_host, self.tcp_port))
-                s.sendall((json.dumps(log_data) + '\n').encode('utf-8'))
-        except Exception as e:
-            logging.error(f"Error enviando a Logstash: {e}")
-
-    def write_to_file(self, log_data):
-        """Escribe el log a archivo"""
-        try:
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(log_data) + '\n')
-        except Exception as e:
-            logging.error(f"Error escribiendo archivo: {e}")
-
-    def run(self):
-        """Ejecuta el simulador"""
-        logging.info(f"{Fore.GREEN}Iniciando simulador de logs de bases de datos...{Style.RESET_ALL}")
-        logging.info(f"Enviando logs a {self.tcp_host}:{self.tcp_port}")
-        logging.info(f"Guardando logs en {self.log_file}")
-        
-        db_count = 0
-        
-        while True:
-            try:
-                # Generar logs para múltiples bases de datos (simulando 5 bases de datos)
-                for db_id in range(1, 6):
-                    db_count += 1
-                    db_type = random.choice(self.db_types)
-                    level = self.generate_log_level()
-                    
-                    # Generar 1-2 logs por base de datos
-                    for _ in range(random.randint(1, 2)):
-                        if db_type == "mysql":
-                            log_data = self.generate_mysql_log(level)
-                        else:
-                            log_data = self.generate_postgresql_log(level)
-                        
-                        # Agregar identificador de la base de datos
-                        log_data["db_instance"] = f"db-{db_id:02d}"
-                        log_data["server_id"] = f"db-server-{db_id:02d}"
-                        
-                        # Enviar a Logstash
-                        self.send_to_logstash(log_data)
-                        
-                        # Escribir a archivo
-                        self.write_to_file(log_data)
-                        
-                        # Log de consola colorizado
-                        if level == "ERROR":
-                            color = Fore.RED
-                        elif level == "WARN":
-                            color = Fore.YELLOW
-                        else:
-                            color = Fore.GREEN
-                        
-                        print(f"{color}[{datetime.now().strftime('%H:%M:%S')}] {db_type.upper()}-{db_id:02d} [{level}] {log_data['message'][:80]}...{Style.RESET_ALL}")
-                
-                # Esperar entre 5-10 segundos
-                sleep_time = random.uniform(5, 10)
-                time.sleep(sleep_time)
-                
-            except KeyboardInterrupt:
-                logging.info(f"{Fore.YELLOW}Deteniendo simulador...{Style.RESET_ALL}")
-                break
-            except Exception as e:
-                logging.error(f"Error en el simulador: {e}")
-                time.sleep(5)
+    def render_line(self, log_data):
+        """Serializa el log como una línea JSON (json_lines)"""
+        return self.encoder.dumps(log_data)
+
+    def build_db_log(self, db_id, db_type, level):
+        """Genera un log de la base de datos db_id con su identificador"""
+        if db_type == "mysql":
+            log_data = self.generate_mysql_log(level)
+        else:
+            log_data = self.generate_postgresql_log(level)
+        
+        # Agregar identificador de la base de datos
+        log_data["db_instance"] = f"db-{db_id:02d}"
+        log_data["server_id"] = f"db-server-{db_id:02d}"
+        if self.entities is not None:
+            self.add_entities(log_data, self.db_types.index(db_type))
+        return log_data
+
+    def add_entities(self, log_data, dialect):
+        """Agrega tenant y host cliente y, en las consultas, la huella con valores reales de sus parámetros"""
+        entities = self.entities
+        rng = self.rng
+        tenant = log_data["tenant_id"] = entities.tenants.sample(rng)
+        log_data["client_host"] = entities.hosts.sample(rng)
+        log_data["table"] = log_data["query_id"] = None
+        if log_data["query"] is not None:
+            fingerprint = entities.queries.sample(rng)
+            values = entities.param_values(fingerprint.params, rng, log_data["timestamp"], tenant)
+            duration = log_data["message"].rsplit(" | ", 1)[1]
+            log_data["query"] = fingerprint.texts[dialect]
+            log_data["message"] = f"Query: {fingerprint.render(values)} | {duration}"
+            log_data["table"] = fingerprint.table
+            log_data["query_id"] = fingerprint.query_id
+
+    def build_db_columns(self, n):
+        """Genera n logs repartidos entre las bases de datos de la flota, en columnas"""
+        started = time.perf_counter()
+        db_ids = self.sample_hosts(n, self.rng)
+        batch = EventBatch(self.batch_schema, n, keys=db_ids)
+        
+        rng = self.rng
+        rand = rng.random
+        choice = rng.choice
+        timestamp = self.generate_timestamp
+        generate_log_level = self.generate_log_level
+        intern_level = self.level_table.intern
+        intern_query = self.query_table.intern
+        queries_by_type = (self.mysql_queries, self.postgresql_queries)
+        instance_index = self.instance_index
+        # Errores forzados por los incidentes del perfil de tráfico (tormentas de conexiones)
+        forced_rate, forced_errors = self.forced_errors()
+        entities = self.entities
+        if entities is not None:
+            sample_fingerprint = entities.queries.table.sample
+            fingerprints = entities.queries.values
+            param_values = entities.param_values
+            fingerprint_index = self.fingerprint_index
+            fingerprint_tables, fingerprint_ids = self.fingerprint_table_index, self.fingerprint_id_index
+            tenant_index, host_index = self.tenant_index, self.host_index
+            tenant_names = entities.tenants.values
+            tenant_samples = entities.tenants.table.sample_n(n, rng)
+            tenants = array('I', [tenant_index[i] for i in tenant_samples])
+            client_hosts = array('I', [host_index[i] for i in entities.hosts.table.sample_n(n, rng)])
+            tables, fingerprint_id_column = array('I'), array('I')
+        
+        timestamps, messages = [], []
+        db_types, pids, levels = array('I'), array('q'), array('I')
+        query_ids, durations = array('I'), array('d')
+        instances, servers = array('I'), array('I')
+        mysql_share = self.mysql_share
+        for row, db_id in enumerate(db_ids):
+            db_type = 0 if rand() < mysql_share else 1
+            level = generate_log_level()
+            forced = forced_rate and rand() < forced_rate
+            if forced:
+                level = "ERROR"
+            ts = timestamp()
+            timestamps.append(ts)
+            db_types.append(db_type)
+            pids.append(1000 + int(rand() * 9000))
+            levels.append(intern_level(level))
+            if level == "ERROR":
+                messages.append(forced_errors.sample(rng) if forced and forced_errors else choice(self.error_messages))
+                query_ids.append(0)
+                durations.append(NULL_FLOAT)
+            elif level == "WARN":
+                messages.append(choice(self.warning_messages))
+                query_ids.append(0)
+                durations.append(NULL_FLOAT)
+            elif entities is None:
+                query = choice(queries_by_type[db_type])
+                messages.append(f"Query: {query} | Duration: {0.001 + 1.999 * rand():.3f}s")
+                query_ids.append(intern_query(query))
+                durations.append(0.001 + 1.999 * rand())
+            else:
+                # Huella con popularidad Zipf y valores de parámetros de los pools (usuarios, tenants)
+                k = sample_fingerprint(rng)
+                fingerprint = fingerprints[k]
+                query = fingerprint.render(param_values(fingerprint.params, rng, ts, tenant_names[tenant_samples[row]]))
+                messages.append(f"Query: {query} | Duration: {0.001 + 1.999 * rand():.3f}s")
+                query_ids.append(fingerprint_index[db_type][k])
+                durations.append(0.001 + 1.999 * rand())
+                tables.append(fingerprint_tables[k])
+                fingerprint_id_column.append(fingerprint_ids[k])
+            if entities is not None and level in ("ERROR", "WARN"):
+                tables.append(0)
+                fingerprint_id_column.append(0)
+            instance, server = instance_index[db_id]
+            instances.append(instance)
+            servers.append(server)
+        
+        batch.columns.update(
+            timestamp=timestamps, db_type=db_types, thread_id=pids, level=levels, message=messages,
+            query=query_ids, duration=durations, db_instance=instances, server_id=servers
+        )
+        if entities is not None:
+            batch.columns.update(tenant_id=tenants, client_host=client_hosts, table=tables, query_id=fingerprint_id_column)
+        batch.variants = db_types
+        self.generation.record(n, time.perf_counter() - started)
+        return batch
+
+    def build_probe_log(self, marker):
+        """Log marcador con la corrida, la secuencia y el instante de envío como campos"""
+        log_data = self.build_db_log(self.fleet_ids[0], self.db_types[0], "INFO")
+        log_data.update(marker, message=f"Probe {marker['probe_run']} #{marker['probe_seq']}")
+        return log_data
+
+    def emit(self, db_id, log_data, echo=True):
+        """Envía el log a Logstash, lo escribe a archivo y opcionalmente a consola"""
+        # Serializar una sola vez y reutilizar los bytes en ambos destinos
+        payload = self.encode_line(log_data)
+        
+        # Enviar a Logstash (o indexar el documento equivalente directamente en Elasticsearch) y escribir a archivo
+        self.deliver(payload, log_data)
+        
+        # Eco muestreado por nivel: el texto solo se formatea si el evento se muestra
+        if echo and self.console.sample(log_data["level"]):
+            self.echo(db_id, log_data)
+
+    def echo(self, db_id, log_data):
+        """Escribe el log en consola con el color de su nivel"""
+        level = log_data["level"]
+        if level == "ERROR":
+            color = Fore.RED
+        elif level == "WARN":
+            color = Fore.YELLOW
+        else:
+            color = Fore.GREEN
+        
+        self.console.write(f"{color}[{self.clock.hms()}] {log_data['db_type'].upper()}-{db_id:02d} [{level}] {log_data['message'][:80]}...{Style.RESET_ALL}")
+
+    def emit_round(self):
+        """Genera y emite 1-2 logs por base de datos de la flota (una ronda del modo continuo)"""
+        forced_rate, forced_errors = self.forced_errors()
+        for db_id in self.fleet_ids:
+            db_type = self.db_types[0 if self.rng.random() < self.mysql_share else 1]
+            level = self.generate_log_level()
+            
+            # Generar 1-2 logs por base de datos
+            for _ in range(self.rng.randint(1, 2)):
+                started = time.perf_counter()
+                # Errores forzados por los incidentes del perfil de tráfico, como en build_db_columns
+                forced = forced_rate and self.rng.random() < forced_rate
+                log_data = self.build_db_log(db_id, db_type, "ERROR" if forced else level)
+                if forced and forced_errors:
+                    log_data["message"] = forced_errors.sample(self.rng)
+                self.generation.record(1, time.perf_counter() - started)
+                self.emit(db_id, log_data)
+
+    def bulk_document(self, log_data):
+        """Documento equivalente al que indexa Logstash desde el input tcp 5001"""
+        doc = dict(log_data, type="db-logs", log_source="database", environment="production")
+        return iso_to_datetime(log_data["timestamp"]), doc
 
 if __name__ == "__main__":
-    simulator = DatabaseLogSimulator()
-    simulator.run()
+    main(DatabaseLogSimulator)
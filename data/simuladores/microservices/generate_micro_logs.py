@@ -4,16 +4,24 @@ Simulador de logs de microservicios para ELK Stack
 Genera logs JSON estructurados con trace IDs cada 5-10 segundos
 """
 
-import random
 import time
 import json
-import socket
 import logging
-import uuid
+import os
+import sys
+from array import array
+from collections import deque
 from datetime import datetime, timedelta
-from faker import Faker
 from colorama import init, Fore, Style
 
+# Módulos compartidos (data/simuladores/common, montado en /app/common)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.batch import CONST, FLOAT, ID, INT, RAW, STR, EventBatch, json_schema
+from common.bulk_export import iso_to_datetime
+from common.entities import build_entities
+from common.simulator import BaseSimulator, main
+from common.tracing import TraceGenerator, load_call_graph
+
 # Inicializar colorama para output colorizado
 init()
 
@@ -23,12 +31,27 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-class MicroserviceLogSimulator:
-    def __init__(self):
-        self.fake = Faker()
-        self.log_file = "/app/logs/micro-logs.log"
-        self.tcp_host = "elk-logstash"
-        self.tcp_port = 5002
+class MicroserviceLogSimulator(BaseSimulator):
+    FAMILY = "micro"
+    LABEL = "Micro"
+    LOG_FILE = "/app/logs/micro-logs.log"
+    DESCRIPTION = "logs de microservicios"
+    # Flota simulada por defecto: 10 instancias de microservicios (un escenario la reemplaza)
+    FLEET_IDS = range(1, 11)
+
+    def __init__(self, tcp_host="elk-logstash", tcp_port=None, fleet_ids=None, clock=None, file_options=None, worker_index=None, seed=None, probe_options=None, encoder=None, traffic_options=None, call_graph=None, es_options=None, entity_options=None, console_options=None, spool_options=None, http_options=None, scenario=None, outputs=True):
+        super().__init__(
+            tcp_host=tcp_host, tcp_port=tcp_port, fleet_ids=fleet_ids, clock=clock, file_options=file_options,
+            worker_index=worker_index, seed=seed, probe_options=probe_options, encoder=encoder,
+            traffic_options=traffic_options, es_options=es_options, console_options=console_options,
+            spool_options=spool_options, http_options=http_options, scenario=scenario, outputs=outputs
+        )
+        # Pools de entidades (pods y nodos por servicio, usuarios, tenants); None sin --cardinality
+        self.entities = build_entities(entity_options)
+        
+        # Trazas coherentes: spans generados que aún no se emitieron
+        self.traces = TraceGenerator(self.rng, call_graph)
+        self.pending_spans = deque()
         
         # Microservicios simulados
         self.services = [
@@ -44,6 +67,8 @@ class MicroserviceLogSimulator:
             ("WARN", 0.15),  # 15% advertencias
             ("ERROR", 0.1)   # 10% errores
         ]
+        # Los niveles del escenario reemplazan a los de arriba (ya normalizados a probabilidades)
+        self.log_levels = self.scenario.table("levels", self.log_levels)
         
         # Endpoints de microservicios
         self.endpoints = {
@@ -100,22 +125,44 @@ class MicroserviceLogSimulator:
             "Health check passed",
             "Metrics collected"
         ]
+        
+        # Schema de los lotes en columnas (mismas claves y orden que generate_microservice_log)
+        self.batch_schema = json_schema([
+            ("timestamp", ID), ("level", STR), ("service", STR), ("message", STR),
+            ("trace_id", ID), ("span_id", ID), ("parent_span_id", ID), ("endpoint", STR),
+            ("duration", FLOAT), ("metrics.cpu_usage", FLOAT), ("metrics.memory_usage", FLOAT),
+            ("metrics.response_time", FLOAT), ("metrics.requests_per_second", FLOAT),
+            ("environment", CONST, "production"), ("version", STR), ("error", RAW),
+            ("instance_id", STR), ("pod_name", STR)
+        ] + ([("host", STR), ("tenant_id", STR), ("user_id", INT)] if self.entities is not None else []))
+        self.level_table = self.batch_schema.table("level")
+        self.service_table = self.batch_schema.table("service")
+        self.message_table = self.batch_schema.table("message")
+        self.endpoint_table = self.batch_schema.table("endpoint")
+        self.version_table = self.batch_schema.table("version")
+        # Índices internados de instance_id y pod_name por (servicio, id de la flota)
+        self.instance_index = {}
+        if self.entities is not None:
+            # Usuario y tenant de la traza en curso: todos sus spans los comparten
+            self.tenant_index = self.entities.tenants.interned(self.batch_schema.table("tenant_id"))
+            self.pod_index = {}
+            self.trace_owner = (None, 0, 0)
 
     def generate_timestamp(self):
         """Genera un timestamp en formato ISO8601"""
-        return datetime.now().isoformat()
+        return self.clock.iso()
 
     def generate_trace_id(self):
-        """Genera un trace ID único"""
-        return str(uuid.uuid4())
+        """Genera un trace ID único (128 bits en hexadecimal, formato W3C)"""
+        return self.traces.trace_id()
 
     def generate_span_id(self):
-        """Genera un span ID único"""
-        return str(uuid.uuid4())[:8]
+        """Genera un span ID único (64 bits en hexadecimal)"""
+        return self.traces.span_id()
 
     def generate_log_level(self):
         """Genera un nivel de log basado en probabilidades"""
-        rand = random.random()
+        rand = self.rng.random()
         cumulative = 0
         for level, prob in self.log_levels:
             cumulative += prob
@@ -123,45 +170,53 @@ class MicroserviceLogSimulator:
                 return level
         return "INFO"
 
-    def generate_microservice_log(self, service):
-        """Genera un log de microservicio"""
-        timestamp = self.generate_timestamp()
+    def generate_microservice_log(self, service, span=None):
+        """Genera un log de microservicio (el de un span de traza si se indica)"""
+        timestamp = self.generate_timestamp() if span is None else self.clock.iso_at(span.start)
         level = self.generate_log_level()
-        trace_id = self.generate_trace_id()
-        span_id = self.generate_span_id()
+        if span is None:
+            trace_id = self.generate_trace_id()
+            span_id = self.generate_span_id()
+            parent_span_id = None
+            duration = self.rng.uniform(0.001, 5.0)
+        else:
+            trace_id, span_id, parent_span_id = span.trace_id, span.span_id, span.parent_id
+            duration = span.duration
+            # ERROR queda para los spans que fallaron (o cuyo hijo propagó el error)
+            if span.error:
+                level = "ERROR"
+            elif level == "ERROR":
+                level = "WARN"
         
         # Generar mensaje basado en el nivel
         if level == "ERROR":
-            message = random.choice(self.error_messages)
+            message = self.rng.choice(self.error_messages)
             error = {
                 "type": "ServiceError",
                 "message": message,
                 "stack_trace": f"Error in {service} at {timestamp}"
             }
         elif level == "WARN":
-            message = random.choice(self.warning_messages)
+            message = self.rng.choice(self.warning_messages)
             error = None
         elif level == "DEBUG":
             message = f"Debug info for {service}"
             error = None
         else:
-            message = random.choice(self.info_messages)
+            message = self.rng.choice(self.info_messages)
             error = None
         
         # Generar endpoint si es un servicio HTTP
         endpoint = None
         if service in self.endpoints:
-            endpoint = random.choice(self.endpoints[service])
-        
-        # Generar duración de respuesta
-        duration = random.uniform(0.001, 5.0)
+            endpoint = self.rng.choice(self.endpoints[service])
         
         # Generar métricas adicionales
         metrics = {
-            "cpu_usage": random.uniform(10, 90),
-            "memory_usage": random.uniform(20, 80),
+            "cpu_usage": self.rng.uniform(10, 90),
+            "memory_usage": self.rng.uniform(20, 80),
             "response_time": duration,
-            "requests_per_second": random.uniform(10, 1000)
+            "requests_per_second": self.rng.uniform(10, 1000)
         }
         
         log_data = {
@@ -171,11 +226,12 @@ class MicroserviceLogSimulator:
             "message": message,
             "trace_id": trace_id,
             "span_id": span_id,
+            "parent_span_id": parent_span_id,
             "endpoint": endpoint,
             "duration": duration,
             "metrics": metrics,
             "environment": "production",
-            "version": f"1.{random.randint(0, 9)}.{random.randint(0, 9)}"
+            "version": f"1.{self.rng.randint(0, 9)}.{self.rng.randint(0, 9)}"
         }
         
         if error:
@@ -183,75 +239,223 @@ class MicroserviceLogSimulator:
         
         return log_data
 
-    def send_to_logstash(self, log_data):
-        """Envía el log a Logstash vía TCP"""
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.connect((self.tcp_host, self.tcp_port))
-                s.sendall((json.dumps(log_data) + '\n').encode('utf-8'))
-        except Exception as e:
-            logging.error(f"Error enviando a Logstash: {e}")
+    def render_line(self, log_data):
+        """Serializa el log como una línea JSON (json_lines)"""
+        return self.encoder.dumps(log_data)
+
+    def build_instance_log(self, service_id, service, span=None):
+        """Genera un log del servicio (o de un span) con el identificador de la instancia"""
+        log_data = self.generate_microservice_log(service, span)
+        
+        # Agregar identificador de instancia
+        log_data["instance_id"] = f"{service}-{service_id:02d}"
+        log_data["pod_name"] = f"{service}-pod-{service_id:02d}"
+        if self.entities is not None:
+            # Réplica concreta del Deployment con su nodo, y el usuario y tenant de la traza
+            pod, host = self.entities.pods(service, len(self.services)).sample(self.rng)
+            _, tenant, user = self.trace_entities(log_data["trace_id"])
+            log_data.update(pod_name=pod, host=host, tenant_id=self.entities.tenants.values[tenant], user_id=user)
+        return log_data
+
+    def trace_entities(self, trace_id):
+        """(trace_id, índice del tenant en el pool, usuario) de la traza, muestreados al ver su primer span"""
+        owner = self.trace_owner
+        if owner[0] != trace_id:
+            rng = self.rng
+            owner = (trace_id, self.entities.tenants.table.sample(rng), self.entities.users.sample(rng))
+            self.trace_owner = owner
+        return owner
+
+    def pod_names(self, service):
+        """(pool de pods del servicio, índices internados de pod_name y host de cada pod)"""
+        names = self.pod_index.get(service)
+        if names is None:
+            pool = self.entities.pods(service, len(self.services))
+            pod_table, host_table = self.batch_schema.table("pod_name"), self.batch_schema.table("host")
+            names = (pool.table.sample, [pod_table.intern(pod) for pod, _ in pool.values],
+                     [host_table.intern(host) for _, host in pool.values])
+            self.pod_index[service] = names
+        return names
 
-    def write_to_file(self, log_data):
-        """Escribe el log a archivo"""
-        try:
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(log_data) + '\n')
-        except Exception as e:
-            logging.error(f"Error escribiendo archivo: {e}")
+    def instance_names(self, service, service_id):
+        """Índices internados de instance_id y pod_name de una instancia"""
+        key = (service, service_id)
+        names = self.instance_index.get(key)
+        if names is None:
+            names = (self.batch_schema.table("instance_id").intern(f"{service}-{service_id:02d}"),
+                     self.batch_schema.table("pod_name").intern(f"{service}-pod-{service_id:02d}"))
+            self.instance_index[key] = names
+        return names
 
-    def run(self):
-        """Ejecuta el simulador"""
-        logging.info(f"{Fore.GREEN}Iniciando simulador de logs de microservicios...{Style.RESET_ALL}")
-        logging.info(f"Enviando logs a {self.tcp_host}:{self.tcp_port}")
-        logging.info(f"Guardando logs en {self.log_file}")
+    def build_instance_columns(self, n):
+        """Genera n logs de spans de trazas repartidos entre las instancias de la flota, en columnas"""
+        started = time.perf_counter()
+        # Errores forzados por los incidentes del perfil de tráfico: más spans fallidos en las trazas nuevas
+        forced_rate, forced_errors = self.forced_errors()
+        traces = self.traces
+        base_error_rate = traces.error_rate
+        if forced_rate:
+            traces.error_rate = 1.0 - (1.0 - base_error_rate) * (1.0 - forced_rate)
+            # Parte de los ERROR que corresponde al incidente (con su mensaje propio)
+            forced_share = forced_rate / traces.error_rate
+        # Las trazas que no caben en el lote se completan en el siguiente
+        pending = self.pending_spans
+        clock = self.clock
+        while len(pending) < n:
+            # La traza termina en el instante actual; cada span lleva su inicio dentro del intervalo del padre
+            spans = traces.generate(clock.peek())
+            clock.advance(len(spans))
+            pending.extend(spans)
+        traces.error_rate = base_error_rate
+        service_ids = self.sample_hosts(n, self.rng)
+        batch = EventBatch(self.batch_schema, n, keys=service_ids)
         
-        service_count = 0
+        rng = self.rng
+        rand = rng.random
+        choice = rng.choice
+        iso_at = clock.iso_at
+        generate_log_level = self.generate_log_level
+        intern_level = self.level_table.intern
+        intern_service = self.service_table.intern
+        intern_message = self.message_table.intern
+        intern_endpoint = self.endpoint_table.intern
+        intern_version = self.version_table.intern
+        instance_names = self.instance_names
+        endpoints = self.endpoints
+        entities = self.entities
+        if entities is not None:
+            pod_names, trace_entities, tenant_index = self.pod_names, self.trace_entities, self.tenant_index
+            hosts, tenants, users = array('I'), array('I'), array('q')
         
-        while True:
-            try:
-                # Generar logs para múltiples microservicios (simulando 10 microservicios)
-                for service_id in range(1, 11):
-                    service_count += 1
-                    service = random.choice(self.services)
-                    
-                    # Generar 1-3 logs por microservicio
-                    for _ in range(random.randint(1, 3)):
-                        log_data = self.generate_microservice_log(service)
-                        
-                        # Agregar identificador de instancia
-                        log_data["instance_id"] = f"{service}-{service_id:02d}"
-                        log_data["pod_name"] = f"{service}-pod-{service_id:02d}"
-                        
-                        # Enviar a Logstash
-                        self.send_to_logstash(log_data)
-                        
-                        # Escribir a archivo
-                        self.write_to_file(log_data)
-                        
-                        # Log de consola colorizado
-                        if log_data["level"] == "ERROR":
-                            color = Fore.RED
-                        elif log_data["level"] == "WARN":
-                            color = Fore.YELLOW
-                        elif log_data["level"] == "DEBUG":
-                            color = Fore.BLUE
-                        else:
-                            color = Fore.GREEN
-                        
-                        print(f"{color}[{datetime.now().strftime('%H:%M:%S')}] {service.upper()}-{service_id:02d} [{log_data['level']}] {log_data['message'][:60]}...{Style.RESET_ALL}")
-                
-                # Esperar entre 5-10 segundos
-                sleep_time = random.uniform(5, 10)
-                time.sleep(sleep_time)
-                
-            except KeyboardInterrupt:
-                logging.info(f"{Fore.YELLOW}Deteniendo simulador...{Style.RESET_ALL}")
-                break
-            except Exception as e:
-                logging.error(f"Error en el simulador: {e}")
-                time.sleep(5)
+        timestamps, trace_ids, span_ids, parent_ids, errors = [], [], [], [], []
+        levels, services, messages, endpoint_ids = array('I'), array('I'), array('I'), array('I')
+        versions, instances, pods = array('I'), array('I'), array('I')
+        durations, cpu, memory, rps = array('d'), array('d'), array('d'), array('d')
+        for service_id in service_ids:
+            span = pending.popleft()
+            service = span.service
+            # Timestamp del log: el inicio del span
+            ts = iso_at(span.start)
+            # ERROR queda para los spans que fallaron (o cuyo hijo propagó el error)
+            level = generate_log_level()
+            if span.error:
+                level = "ERROR"
+            elif level == "ERROR":
+                level = "WARN"
+            
+            error = ""
+            if level == "ERROR":
+                if forced_errors is not None and rand() < forced_share:
+                    message = forced_errors.sample(rng)
+                else:
+                    message = choice(self.error_messages)
+                error = ', "error": ' + json.dumps({
+                    "type": "ServiceError",
+                    "message": message,
+                    "stack_trace": f"Error in {service} at {ts}"
+                })
+            elif level == "WARN":
+                message = choice(self.warning_messages)
+            elif level == "DEBUG":
+                message = f"Debug info for {service}"
+            else:
+                message = choice(self.info_messages)
+            
+            timestamps.append(ts)
+            trace_ids.append(span.trace_id)
+            span_ids.append(span.span_id)
+            parent_ids.append(span.parent_id)
+            errors.append(error)
+            levels.append(intern_level(level))
+            services.append(intern_service(service))
+            messages.append(intern_message(message))
+            endpoint_ids.append(intern_endpoint(choice(endpoints[service]) if service in endpoints else None))
+            durations.append(span.duration)
+            cpu.append(10 + 80 * rand())
+            memory.append(20 + 60 * rand())
+            rps.append(10 + 990 * rand())
+            versions.append(intern_version(f"1.{int(rand() * 10)}.{int(rand() * 10)}"))
+            instance, pod = instance_names(service, service_id)
+            instances.append(instance)
+            if entities is None:
+                pods.append(pod)
+            else:
+                sample_pod, pod_ids, host_ids = pod_names(service)
+                k = sample_pod(rng)
+                pods.append(pod_ids[k])
+                hosts.append(host_ids[k])
+                _, tenant, user = trace_entities(span.trace_id)
+                tenants.append(tenant_index[tenant])
+                users.append(user)
+        
+        columns = batch.columns
+        columns.update(
+            timestamp=timestamps, level=levels, service=services, message=messages,
+            trace_id=trace_ids, span_id=span_ids, parent_span_id=parent_ids, endpoint=endpoint_ids,
+            duration=durations, version=versions, error=errors, instance_id=instances, pod_name=pods
+        )
+        columns["metrics.cpu_usage"] = cpu
+        columns["metrics.memory_usage"] = memory
+        columns["metrics.response_time"] = durations
+        columns["metrics.requests_per_second"] = rps
+        if entities is not None:
+            columns.update(host=hosts, tenant_id=tenants, user_id=users)
+        self.generation.record(n, time.perf_counter() - started)
+        return batch
+
+    def build_instance_batch(self, n):
+        """Genera n logs de spans de trazas repartidos entre las instancias de la flota como (id, dict)"""
+        batch = self.build_instance_columns(n)
+        return list(zip(batch.keys, batch.records()))
+
+    def build_probe_log(self, marker):
+        """Log marcador con la corrida, la secuencia y el instante de envío como campos"""
+        log_data = self.build_instance_log(self.fleet_ids[0], self.services[0])
+        log_data.update(marker, level="INFO", message=f"Probe {marker['probe_run']} #{marker['probe_seq']}")
+        log_data.pop("error", None)
+        return log_data
+
+    def emit(self, service_id, log_data, echo=True):
+        """Envía el log a Logstash, lo escribe a archivo y opcionalmente a consola"""
+        # Serializar una sola vez y reutilizar los bytes en ambos destinos
+        payload = self.encode_line(log_data)
+        
+        # Enviar a Logstash (o indexar el documento equivalente directamente en Elasticsearch) y escribir a archivo
+        self.deliver(payload, log_data)
+        
+        # Eco muestreado por nivel: el texto solo se formatea si el evento se muestra
+        if echo and self.console.sample(log_data["level"]):
+            self.echo(service_id, log_data)
+
+    def echo(self, service_id, log_data):
+        """Escribe el log en consola con el color de su nivel"""
+        level = log_data["level"]
+        if level == "ERROR":
+            color = Fore.RED
+        elif level == "WARN":
+            color = Fore.YELLOW
+        elif level == "DEBUG":
+            color = Fore.BLUE
+        else:
+            color = Fore.GREEN
+        
+        self.console.write(f"{color}[{self.clock.hms()}] {log_data['service'].upper()}-{service_id:02d} [{level}] {log_data['message'][:60]}...{Style.RESET_ALL}")
+
+    def emit_round(self):
+        """Genera y emite 1-3 logs por instancia de la flota como spans de trazas (una ronda del modo continuo)"""
+        count = self.rng.randint(len(self.fleet_ids), 3 * len(self.fleet_ids))
+        for service_id, log_data in self.build_instance_batch(count):
+            self.emit(service_id, log_data)
+
+    def bulk_document(self, log_data):
+        """Documento equivalente al que indexa Logstash desde el input tcp 5002"""
+        doc = dict(log_data, type="micro-logs", log_source="microservice")
+        return iso_to_datetime(log_data["timestamp"]), doc
+
+    @classmethod
+    def family_kwargs(cls, args):
+        """Grafo de llamadas de las trazas (JSON con entrypoints, calls y latency_ms)"""
+        return {"call_graph": load_call_graph(os.environ.get("SIM_CALL_GRAPH"))}
 
 if __name__ == "__main__":
-    simulator = MicroserviceLogSimulator()
-    simulator.run()
+    main(MicroserviceLogSimulator)
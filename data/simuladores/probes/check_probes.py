@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Verificador de latencia extremo a extremo con los eventos sonda
+Consulta periódicamente los índices *-logs-* buscando las sondas de una
+corrida y reporta los percentiles de latencia, las perdidas y las que se
+hicieron visibles fuera de orden
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+# Módulos compartidos (data/simuladores/common, montado en /app/common)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.probes import ProbeChecker
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verificador de latencia extremo a extremo con eventos sonda")
+    parser.add_argument("--es", default=os.environ.get("ES_URL", "http://elk-elasticsearch:9200"), help="URL de Elasticsearch")
+    parser.add_argument("--run", default=os.environ.get("SIM_PROBE_RUN"), help="Prefijo del id de corrida (por defecto todas)")
+    parser.add_argument("--index", default="*-logs-*", help="Patrón de índices a consultar")
+    parser.add_argument(
+        "--ledger", default=os.environ.get("SIM_PROBE_LEDGER"),
+        help="Directorio de registros de los simuladores (--probe-ledger): cuenta también las sondas "
+             "perdidas al final de una corrida y las corridas sin ninguna sonda visible"
+    )
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Segundos entre consultas (resolución de la medida)")
+    parser.add_argument("--report-interval", type=float, default=10.0, help="Segundos entre reportes")
+    parser.add_argument("--duration", type=float, default=0, help="Segundos de medición (0 hasta Ctrl+C)")
+    parser.add_argument("--grace", type=float, default=30.0, help="Segundos de espera final antes de dar por perdidas las sondas")
+    parser.add_argument("--output", help="Archivo JSON donde guardar el resumen final")
+    args = parser.parse_args()
+
+    checker = ProbeChecker(args.es, args.run, args.index, ledger_dir=args.ledger)
+    logging.info(f"Buscando sondas {args.run or '(todas)'} en {args.es}/{args.index}")
+
+    started = time.monotonic()
+    last_report = started
+    try:
+        while not args.duration or time.monotonic() - started < args.duration:
+            checker.poll()
+            if time.monotonic() - last_report >= args.report_interval:
+                checker.report()
+                last_report = time.monotonic()
+            time.sleep(args.poll_interval)
+    except KeyboardInterrupt:
+        logging.info("Deteniendo verificador...")
+
+    # Margen para que las últimas sondas enviadas terminen de indexarse
+    deadline = time.monotonic() + args.grace
+    while time.monotonic() < deadline and checker.summary()["missing"] > 0:
+        time.sleep(args.poll_interval)
+        checker.poll()
+
+    summary = checker.report(final=True)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
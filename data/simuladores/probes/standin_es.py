@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Sustituto local de Logstash + Elasticsearch para probar las sondas de latencia
+Recibe líneas en los puertos TCP de los simuladores, las interpreta como lo
+hace el pipeline (json_lines y grok COMBINEDAPACHELOG para web), o por
+HTTP en _bulk como los envía la salida directa (--output elasticsearch), guarda solo
+los eventos sonda y los devuelve por HTTP en <patrón>/_search una vez pasado
+un retardo configurable que simula el pipeline y el refresh del índice
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import random
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Módulos compartidos (data/simuladores/common, montado en /app/common)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.bulk_export import parse_combined
+from common.probes import parse_marker
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+class ProbeStore:
+    """Sondas recibidas con el instante a partir del cual son visibles"""
+
+    def __init__(self, delay=1.0, jitter=0.0, drop=0.0, seed=None):
+        self.delay = delay
+        self.jitter = jitter
+        self.drop = drop
+        self.rng = random.Random(seed)
+        self.lines = {}
+        self.dropped = 0
+        self._docs = []
+        self._lock = threading.Lock()
+
+    def ingest(self, port, line):
+        """Interpreta una línea como el pipeline y guarda el documento si es una sonda"""
+        try:
+            doc = json.loads(line)
+        except ValueError:
+            doc = {"message": line}
+            doc.update(parse_combined(line) or {})
+        with self._lock:
+            self.lines[port] = self.lines.get(port, 0) + 1
+            if not isinstance(doc, dict) or parse_marker(doc) is None:
+                return
+            if self.rng.random() < self.drop:
+                self.dropped += 1
+                return
+            visible_at = time.time() + self.delay + self.rng.uniform(0, self.jitter)
+            self._docs.append((visible_at, doc))
+
+    def visible(self):
+        """Documentos sonda ya buscables"""
+        now = time.time()
+        with self._lock:
+            return [doc for visible_at, doc in self._docs if visible_at <= now]
+
+
+def matches(doc, clause):
+    """Aplica una cláusula de la consulta del verificador (bool/should, exists, prefix, match_phrase_prefix)"""
+    kind, spec = next(iter(clause.items()))
+    if kind == "bool":
+        should = spec.get("should", [])
+        return not should or sum(matches(doc, sub) for sub in should) >= spec.get("minimum_should_match", 1)
+    if kind == "exists":
+        return spec["field"] in doc
+    field, value = next(iter(spec.items()))
+    text = doc.get(field[:-len(".keyword")] if field.endswith(".keyword") else field)
+    if not isinstance(text, str):
+        return False
+    if kind == "prefix":
+        return text.startswith(value)
+    if kind == "match_phrase_prefix":
+        # Aproximación sin analizador: la frase aparece como texto dentro del campo
+        return value in text
+    raise ValueError(f"Cláusula no soportada por el sustituto: {kind}")
+
+
+def serve_tcp(store, port):
+    """Input tcp con codec json_lines en el puerto indicado"""
+
+    class LineHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw in self.rfile:
+                line = raw.decode('utf-8', errors='replace').rstrip('\n')
+                if line:
+                    store.ingest(port, line)
+
+    server = socketserver.ThreadingTCPServer(("0.0.0.0", port), LineHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name=f"tcp-{port}", daemon=True).start()
+    return server
+
+
+def bulk_items(store, body):
+    """Ingiere los documentos de una petición _bulk (salida directa de los simuladores) y devuelve sus items"""
+    if not body:
+        return []
+    lines = [line for line in body.split(b'\n') if line.strip()]
+    for doc_line in lines[1::2]:
+        store.ingest("_bulk", doc_line.decode('utf-8', errors='replace'))
+    return [{"index": {"status": 201, "result": "created"}} for _ in lines[1::2]]
+
+
+def serve_http(store, port):
+    """API _search mínima (devuelve las sondas visibles que cumplen la consulta) y _bulk"""
+
+    class SearchHandler(BaseHTTPRequestHandler):
+        def _search(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b''
+            if self.path.split('?')[0].endswith("/_bulk"):
+                if self.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                self._reply({"took": 1, "errors": False, "items": bulk_items(store, body)})
+                return
+            if not self.path.split('?')[0].endswith("/_search"):
+                self.send_error(404)
+                return
+            try:
+                request = json.loads(body) if body else {}
+                size = int(request.get("size", 10))
+            except (ValueError, AttributeError):
+                request, size = {}, 10
+            query = request.get("query")
+            try:
+                docs = [doc for doc in store.visible() if query is None or matches(doc, query)]
+            except (ValueError, AttributeError, KeyError, StopIteration) as e:
+                self._reply({"error": {"type": "parsing_exception", "reason": str(e)}}, status=400)
+                return
+            # Como con el sort por @timestamp descendente del verificador: las más recientes primero
+            hits = [{"_source": doc} for doc in reversed(docs[-size:])] if size > 0 else []
+            self._reply({"hits": {"total": {"value": len(docs)}, "hits": hits}})
+
+        def _reply(self, result, status=200):
+            body = json.dumps(result).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = _search
+        do_POST = _search
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), SearchHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name=f"http-{port}", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sustituto local de Logstash + Elasticsearch para las sondas")
+    parser.add_argument("--tcp-ports", default="5000,5001,5002", help="Puertos TCP de entrada separados por comas")
+    parser.add_argument("--http-port", type=int, default=9200, help="Puerto HTTP de las APIs _search y _bulk")
+    parser.add_argument("--delay", type=float, default=1.0, help="Segundos hasta que una sonda es buscable")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Segundos extra aleatorios sobre --delay")
+    parser.add_argument("--drop", type=float, default=0.0, help="Fracción de sondas que se descartan (para probar pérdidas)")
+    parser.add_argument("--seed", type=int, help="Semilla del retardo y los descartes")
+    args = parser.parse_args()
+
+    store = ProbeStore(args.delay, args.jitter, args.drop, args.seed)
+    ports = [int(port) for port in args.tcp_ports.split(',')]
+    for port in ports:
+        serve_tcp(store, port)
+    serve_http(store, args.http_port)
+    logging.info(f"Escuchando líneas en {ports} y _search/_bulk en http://0.0.0.0:{args.http_port}")
+
+    try:
+        while True:
+            time.sleep(10)
+            logging.info(f"Líneas por puerto: {store.lines}, sondas: {len(store.visible())}, descartadas: {store.dropped}")
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Sustituto local de los inputs tcp de Logstash para medir la entrega de los
+simuladores sin levantar el stack (Elasticsearch, Logstash, Kibana)
+Escucha en 5000/5001/5002, parsea json_lines, cuenta eventos por flujo y
+reporta la tasa de ingesta y el jitter entre llegadas; con --read-rate-kb,
+--rcvbuf-kb y --reset-interval simula backpressure y reinicios de conexión.
+Con --es-port sirve además la API _bulk de Elasticsearch para la salida
+directa de los simuladores (--output elasticsearch), con rechazos 429 opcionales,
+y con --http-ports los inputs http que reciben lotes comprimidos (--output logstash-http)
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from colorama import init, Fore, Style
+
+# Módulos compartidos (data/simuladores/common, montado en /app/common)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.loader import FAMILIES
+from common.standin import STREAM_NAMES, EsBulkStandin, HttpInputStandin, LogstashStandin
+
+# Inicializar colorama para output colorizado
+init()
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def report(standin, previous, elapsed):
+    """Registra una línea por flujo con la tasa desde el reporte anterior; devuelve el estado actual"""
+    current = {}
+    for stream in standin.snapshot():
+        last = previous.get(stream["port"], {"events": 0, "bytes": 0})
+        rate = (stream["events"] - last["events"]) / elapsed if elapsed > 0 else 0.0
+        mb_rate = (stream["bytes"] - last["bytes"]) / elapsed / (1024 * 1024) if elapsed > 0 else 0.0
+        invalid = f", {Fore.YELLOW}no JSON: {stream['invalid']}{Style.RESET_ALL}" if stream["invalid"] else ""
+        if stream["grok"]:
+            invalid += f", sin match de grok: {stream['grok_failures']}"
+        if stream["decoded_bytes"]:
+            ratio = stream["decoded_bytes"] / stream["bytes"] if stream["bytes"] else 0.0
+            invalid += f", descomprimidos: {stream['decoded_bytes'] / 1024 / 1024:.1f} MB (x{ratio:.1f})"
+        if stream["events"]:
+            invalid += f", parseo: {stream['parse_us_per_event']:.2f} µs/evento"
+        logging.info(
+            f"{Fore.CYAN}{stream['stream']} ({stream['port']}){Style.RESET_ALL} - "
+            f"eventos: {stream['events']} ({rate:,.0f} ev/s, {mb_rate:.2f} MB/s){invalid}, "
+            f"conexiones: {stream['active']}/{stream['connections']}, resets: {stream['resets']}, "
+            f"líneas cortadas: {stream['truncated']}, llegadas media/jitter/p99/máx: "
+            f"{stream['gap_mean_ms']:.1f}/{stream['jitter_ms']:.1f}/{stream['gap_p99_ms']:.1f}/"
+            f"{stream['gap_max_ms']:.1f} ms"
+        )
+        current[stream["port"]] = stream
+    return current
+
+
+def report_bulk(bulk, previous, elapsed):
+    """Registra la línea de la API _bulk con la tasa desde el reporte anterior; devuelve el estado actual"""
+    current = bulk.snapshot()
+    rate = (current["events"] - previous.get("events", 0)) / elapsed if elapsed > 0 else 0.0
+    mb_rate = (current["bytes"] - previous.get("bytes", 0)) / elapsed / (1024 * 1024) if elapsed > 0 else 0.0
+    logging.info(
+        f"{Fore.CYAN}_bulk ({current['port']}){Style.RESET_ALL} - documentos: {current['events']} "
+        f"({rate:,.0f} docs/s, {mb_rate:.2f} MB/s), peticiones: {current['requests']} "
+        f"({current['gzip_requests']} gzip), conexiones: {current['connections']}, "
+        f"rechazos 429: {current['rejected']} docs / {current['throttled']} peticiones, inválidos: {current['invalid']}"
+    )
+    return current
+
+
+def parse_args():
+    """Parsea las opciones del receptor"""
+    parser = argparse.ArgumentParser(description="Sustituto local de los inputs tcp json_lines de Logstash")
+    parser.add_argument("--host", default="0.0.0.0", help="Dirección en la que escuchar")
+    parser.add_argument(
+        "--ports", default=",".join(str(port) for port in sorted(STREAM_NAMES)),
+        help="Puertos TCP separados por comas (por defecto los de logstash.conf)"
+    )
+    parser.add_argument("--no-parse", action="store_true", help="Solo contar líneas, sin parsear el JSON")
+    parser.add_argument(
+        "--grok", action="store_true",
+        help="Aplicar además el grok COMBINEDAPACHELOG de logstash.conf en el puerto web y medir su CPU por evento"
+    )
+    parser.add_argument(
+        "--read-rate-kb", type=float, default=0,
+        help="KB/s máximos leídos por conexión para simular backpressure (0 sin límite)"
+    )
+    parser.add_argument("--rcvbuf-kb", type=int, default=0, help="Buffer de recepción TCP en KB (0 el del sistema)")
+    parser.add_argument(
+        "--reset-interval", type=float, default=0,
+        help="Segundos medios de vida de cada conexión antes de cortarla con RST (0 nunca)"
+    )
+    parser.add_argument(
+        "--http-ports", default="",
+        help="Puertos de los inputs http separados por comas (vacío no los sirve; normalmente 8080,8081,8082)"
+    )
+    parser.add_argument(
+        "--es-port", type=int, default=0,
+        help="Puerto HTTP para simular la API _bulk de Elasticsearch (0 no la sirve; normalmente 9200)"
+    )
+    parser.add_argument(
+        "--es-reject-rate", type=float, default=0,
+        help="Fracción de documentos de cada _bulk rechazados con 429"
+    )
+    parser.add_argument(
+        "--es-throttle-rate", type=float, default=0,
+        help="Fracción de peticiones _bulk completas respondidas con 429"
+    )
+    parser.add_argument("--seed", type=int, help="Semilla de los instantes de reinicio y de los rechazos 429")
+    parser.add_argument("--report-interval", type=float, default=5.0, help="Segundos entre reportes")
+    parser.add_argument("--duration", type=float, default=0, help="Segundos de ejecución (0 hasta Ctrl+C)")
+    parser.add_argument("--output", help="Archivo JSON donde guardar el estado final de cada flujo")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    ports = [int(port) for port in args.ports.split(',') if port.strip()]
+    standin = LogstashStandin(
+        ports, host=args.host, parse=not args.no_parse,
+        read_rate=int(args.read_rate_kb * 1024), rcvbuf=args.rcvbuf_kb * 1024,
+        reset_interval=args.reset_interval, seed=args.seed,
+        grok_ports=[FAMILIES["web"]["port"]] if args.grok else ()
+    )
+    logging.info(f"{Fore.GREEN}Escuchando json_lines en {args.host}:{','.join(str(port) for port in standin.streams)}{Style.RESET_ALL}")
+    http_input = None
+    http_ports = [int(port) for port in args.http_ports.split(',') if port.strip()]
+    if http_ports:
+        http_input = HttpInputStandin(
+            http_ports, host=args.host, parse=not args.no_parse,
+            grok_ports=[FAMILIES["web"]["http_port"]] if args.grok else ()
+        )
+        logging.info(f"{Fore.GREEN}Sirviendo inputs http en {args.host}:{','.join(str(port) for port in http_input.streams)}{Style.RESET_ALL}")
+    bulk = None
+    if args.es_port:
+        bulk = EsBulkStandin(args.es_port, args.host, args.es_reject_rate, args.es_throttle_rate, args.seed)
+        logging.info(f"{Fore.GREEN}Sirviendo _bulk en http://{args.host}:{bulk.port}{Style.RESET_ALL}")
+
+    started = time.monotonic()
+    last_report = started
+    previous = {}
+    previous_http = {}
+    previous_bulk = {}
+    try:
+        while not args.duration or time.monotonic() - started < args.duration:
+            time.sleep(min(args.report_interval, 0.5))
+            now = time.monotonic()
+            if now - last_report >= args.report_interval:
+                previous = report(standin, previous, now - last_report)
+                if http_input is not None:
+                    previous_http = report(http_input, previous_http, now - last_report)
+                if bulk is not None:
+                    previous_bulk = report_bulk(bulk, previous_bulk, now - last_report)
+                last_report = now
+    except KeyboardInterrupt:
+        logging.info(f"{Fore.YELLOW}Deteniendo receptor...{Style.RESET_ALL}")
+
+    now = time.monotonic()
+    if now - last_report >= 0.1:
+        report(standin, previous, now - last_report)
+        if http_input is not None:
+            report(http_input, previous_http, now - last_report)
+        if bulk is not None:
+            report_bulk(bulk, previous_bulk, now - last_report)
+    standin.close()
+    if http_input is not None:
+        http_input.close()
+    if bulk is not None:
+        bulk.close()
+    if args.output:
+        summary = {"seconds": now - started, "streams": standin.snapshot()}
+        if http_input is not None:
+            summary["http_streams"] = http_input.snapshot()
+        if bulk is not None:
+            summary["bulk"] = bulk.snapshot()
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        logging.info(f"Estado final guardado en {args.output}")
@@ -0,0 +1,10 @@
+"""Configuración de pytest: los módulos se importan como common.* desde data/simuladores"""
+
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Los simuladores reportan por logging; en las pruebas solo interesan los fallos
+logging.disable(logging.WARNING)
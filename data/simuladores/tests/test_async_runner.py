@@ -0,0 +1,65 @@
+"""Runner asyncio: termina a tiempo aunque Logstash no responda y cuenta los lotes que no pudo entregar"""
+
+import asyncio
+import socket
+import time
+
+from common.async_runner import AsyncStreamSender, run_unified
+from common.loader import load_simulator_class
+
+
+def free_port():
+    """Puerto local sin nadie escuchando"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def test_runner_stops_after_duration_without_logstash():
+    sim = load_simulator_class("db")(seed=1, outputs=False)
+    started = time.monotonic()
+    asyncio.run(asyncio.wait_for(
+        run_unified({"db": sim}, {"db": 100}, "127.0.0.1", ports={"db": free_port()}, duration=1, report_interval=60),
+        timeout=8
+    ))
+    # Los reintentos de conexión se cortan con la parada en lugar de seguir con el backoff
+    assert time.monotonic() - started < 4
+
+
+def test_stalled_peer_does_not_block_send():
+    # Acepta la conexión pero nunca lee: el buffer del socket se llena y drain() no vuelve
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    port = server.getsockname()[1]
+
+    async def scenario():
+        stop = asyncio.Event()
+        sender = AsyncStreamSender("127.0.0.1", port, high_water=1024, send_timeout=0.3, stop=stop)
+        asyncio.get_running_loop().call_later(1.0, stop.set)
+        started = time.monotonic()
+        delivered = await sender.send(b"x" * (32 * 1024 * 1024), 1000)
+        elapsed = time.monotonic() - started
+        await sender.close()
+        return delivered, elapsed, sender.stats()
+
+    try:
+        delivered, elapsed, stats = asyncio.run(asyncio.wait_for(scenario(), timeout=10))
+    finally:
+        server.close()
+    assert not delivered
+    assert elapsed < 3
+    assert stats["failed"] == 1000 and stats["sent"] == 0 and stats["errors"] >= 1
+
+
+def test_unreachable_sender_counts_abandoned_batches():
+    async def scenario():
+        stop = asyncio.Event()
+        sender = AsyncStreamSender("127.0.0.1", free_port(), backoff_initial=0.05, stop=stop)
+        asyncio.get_running_loop().call_later(0.3, stop.set)
+        results = [await sender.send(b"{}\n", 10), await sender.send(b"{}\n", 5)]
+        return results, sender.stats()
+
+    results, stats = asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+    assert results == [False, False]
+    assert stats["failed"] == 15 and stats["errors"] >= 1
@@ -0,0 +1,92 @@
+"""Lotes en columnas: plantillas compiladas y NDJSON idéntico a json.dumps del dict equivalente"""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from common.batch import (
+    CONST, FLOAT, ID, INT, NULL_FLOAT, RAW, STR, TEXT, EventBatch, compile_template, json_schema, text_schema
+)
+from common.clock import SyntheticClock
+from common.loader import load_simulator_class
+
+
+@pytest.mark.parametrize("template, row, expected", [
+    ("%s-%d", ("a", 7), "a-7"),
+    ("[Server-%02d] %s", (3, "x"), "[Server-03] x"),
+    ("%d%% {llaves} %s", (50, "{}"), "50% {llaves} {}"),
+    ('{"a": %s, "b": {"c": %d}}', ('"v"', 1), '{"a": "v", "b": {"c": 1}}'),
+    ("sin campos", (), "sin campos")
+])
+def test_compile_template_matches_percent_operator(template, row, expected):
+    render_rows, render_row = compile_template(template)
+    assert template % row == expected
+    assert render_row(*row) == expected
+    assert render_rows([row, row]) == [expected, expected]
+
+
+FIELDS = [
+    ("timestamp", ID), ("level", STR), ("message", TEXT), ("count", INT), ("ratio", FLOAT),
+    ("metrics.cpu", FLOAT), ("metrics.host", STR), ("environment", CONST, "production"), ("extra", RAW)
+]
+
+
+def make_batch(schema):
+    """Lote de dos filas con nulos, escapes, anidamiento y un fragmento RAW"""
+    batch = EventBatch(schema, 2)
+    batch.columns.update(
+        timestamp=["2024-01-01T00:00:00.000001", "2024-01-01T00:00:01.500000"],
+        level=[schema.table("level").intern("INFO"), schema.table("level").intern(None)],
+        message=['dice "hola"\tcon ñ', None],
+        count=[1, -2],
+        ratio=[0.25, NULL_FLOAT],
+        **{"metrics.cpu": [12.5, 0.1], "metrics.host": [schema.table("metrics.host").intern("h-1")] * 2},
+        extra=[', "error": {"type": "X"}', ""]
+    )
+    return batch
+
+
+def test_json_lines_equal_json_dumps():
+    batch = make_batch(json_schema(FIELDS))
+    records = batch.records()
+    assert records[0] == {
+        "timestamp": "2024-01-01T00:00:00.000001", "level": "INFO", "message": 'dice "hola"\tcon ñ',
+        "count": 1, "ratio": 0.25, "metrics": {"cpu": 12.5, "host": "h-1"}, "environment": "production",
+        "error": {"type": "X"}
+    }
+    assert records[1]["level"] is None and records[1]["message"] is None and records[1]["ratio"] is None
+    assert batch.lines() == [json.dumps(record) for record in records]
+    assert batch.to_bytes() == "".join(json.dumps(record) + "\n" for record in records).encode('utf-8')
+
+
+def test_variants_rename_fields():
+    schema = json_schema([("thread_id", INT), ("level", STR)], renames=[{}, {"thread_id": "process_id"}])
+    batch = EventBatch(schema, 2)
+    batch.columns.update(thread_id=[10, 20], level=[schema.table("level").intern("WARN")] * 2)
+    batch.variants = [0, 1]
+    assert batch.records() == [{"thread_id": 10, "level": "WARN"}, {"process_id": 20, "level": "WARN"}]
+    assert batch.lines() == [json.dumps(record) for record in batch.records()]
+
+
+def test_constant_schema_renders_every_row():
+    batch = EventBatch(json_schema([("type", CONST, "web-logs"), ("version", CONST, 2)]), 2)
+    assert batch.to_bytes() == b'{"type": "web-logs", "version": 2}\n' * 2
+    assert batch.records() == [{"type": "web-logs", "version": 2}] * 2
+
+
+def test_text_schema_lines():
+    schema = text_schema([("server_id", INT), ("ip", STR), ("status", INT)], "[Server-%02d] %s %d")
+    batch = EventBatch(schema, 2, keys=[4, 12])
+    batch.columns.update(server_id=[4, 12], ip=[schema.table("ip").intern("10.0.0.1")] * 2, status=[200, 503])
+    assert batch.records() == ["[Server-04] 10.0.0.1 200", "[Server-12] 10.0.0.1 503"]
+    assert batch.to_bytes() == b"[Server-04] 10.0.0.1 200\n[Server-12] 10.0.0.1 503\n"
+    assert EventBatch(schema, 0).to_bytes() == b""
+
+
+@pytest.mark.parametrize("family", ["db", "micro"])
+def test_simulator_batches_serialize_like_json_dumps(family):
+    clock = SyntheticClock(datetime(2024, 1, 1), datetime(2024, 1, 2), 1000)
+    batch = load_simulator_class(family)(seed=2, clock=clock, outputs=False).build_columns(1000)
+    # Misma salida que el camino por evento con json.dumps: orden de claves, separadores y escapes
+    assert batch.lines() == [json.dumps(record) for record in batch.records()]
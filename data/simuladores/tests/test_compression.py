@@ -0,0 +1,30 @@
+"""Compresión: nivel pedido (0 incluido) o el de por defecto del códec, y frames legibles"""
+
+import gzip
+
+import pytest
+
+from common.compression import BlockCompressor, FrameCompressor, check_codec
+
+DATA = b'{"level": "INFO", "environment": "production"}\n' * 200
+
+
+def test_level_zero_is_kept():
+    # gzip nivel 0 guarda sin comprimir: no debe volverse el 6 por defecto
+    stored = BlockCompressor("gzip", 0)
+    assert stored.level == 0
+    assert BlockCompressor("gzip").level == 6
+    out = stored.compress(DATA, 200)
+    assert gzip.decompress(out) == DATA and len(out) > len(DATA)
+
+
+def test_frame_blocks_are_readable():
+    frame = FrameCompressor("gzip", 1)
+    out = frame.compress(DATA, 200) + frame.compress(DATA, 200) + frame.finish()
+    assert gzip.decompress(out) == DATA * 2
+    assert frame.stats.snapshot()["events"] == 400
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError, match="desconocido"):
+        check_codec("lz4")
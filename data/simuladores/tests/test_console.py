@@ -0,0 +1,57 @@
+"""Eco a consola: muestreo 1 de cada N con tope de líneas/s y una línea por lote en los modos por lotes"""
+
+import pytest
+
+from common.console import ConsoleReporter
+from common.loader import load_simulator_class
+
+
+class NullSink:
+    """Sender y archivo que descartan los lotes"""
+
+    def send_bytes(self, payload, count=1):
+        pass
+
+    def write_bytes(self, payload, count=1):
+        pass
+
+
+def test_sample_every_and_rate_cap():
+    console = ConsoleReporter("x", every=10, max_rate=0, status_interval=0)
+    shown = sum(console.sample("INFO") for _ in range(100))
+    assert shown == console.shown == 10
+    assert console.suppressed == 90 and console.categories == {"INFO": 100}
+    capped = ConsoleReporter("x", every=1, max_rate=5, status_interval=0)
+    assert sum(capped.sample() for _ in range(100)) == 5
+    console.close()
+    capped.close()
+
+
+@pytest.mark.parametrize("family, categories", [
+    ("web", {"2xx", "3xx", "4xx", "5xx"}), ("db", {"INFO", "WARN", "ERROR"}), ("micro", {"DEBUG", "INFO", "WARN", "ERROR"})
+])
+def test_batches_echo_one_line_and_fill_categories(family, categories):
+    sim = load_simulator_class(family)(seed=1, outputs=False)
+    sim.sender = sim.file_sink = NullSink()
+    sim.console = console = ConsoleReporter(family, every=3, max_rate=0, status_interval=0)
+    lines = []
+    console.write = lines.append
+    for _ in range(6):
+        sim.emit_batch(sim.build_columns(200))
+    console.close()
+    # Cada lote contiene un evento múltiplo de every: una línea por lote, el resto omitido
+    assert console.seen == 1200 and console.shown == len(lines) == 6
+    assert console.suppressed == 1194
+    assert set(console.categories) == categories and sum(console.categories.values()) == 1200
+    assert all("..." in line for line in lines)
+
+
+def test_batches_respect_every_larger_than_batch():
+    sim = load_simulator_class("db")(seed=1, outputs=False)
+    sim.sender = sim.file_sink = NullSink()
+    sim.console = console = ConsoleReporter("db", every=1000, max_rate=0, status_interval=0)
+    console.write = lambda text: None
+    for _ in range(20):
+        sim.emit_batch(sim.build_columns(100))
+    console.close()
+    assert console.shown == 2
@@ -0,0 +1,25 @@
+"""Archivo con buffer: contadores de escritura, errores por vaciado fallido y eventos perdidos"""
+
+from common.filesink import RotatingFileSink
+
+
+def test_counts_written_events(tmp_path):
+    sink = RotatingFileSink(str(tmp_path / "web.log"), flush_interval=60)
+    sink.write_bytes(b"a\nb\n", 2)
+    sink.write("c")
+    sink.close()
+    assert (tmp_path / "web.log").read_bytes() == b"a\nb\nc\n"
+    stats = sink.stats()
+    assert stats["written"] == 3 and stats["errors"] == stats["lost"] == 0
+
+
+def test_failed_flush_counts_one_error_and_its_events(tmp_path):
+    sink = RotatingFileSink(str(tmp_path / "no-existe" / "db.log"), flush_interval=60)
+    for _ in range(3):
+        sink.write_bytes(b"x\n" * 500, 500)
+        sink.flush()
+    sink.close()
+    stats = sink.stats()
+    # Un error por escritura fallida; los eventos de cada vaciado van a perdidos
+    assert stats["errors"] == 3
+    assert stats["lost"] == 1500 and stats["written"] == 0
@@ -0,0 +1,117 @@
+"""Formatos de línea web: todos llevan los mismos campos y los que pasan por grok coinciden con %{COMBINEDAPACHELOG}"""
+
+import json
+import re
+from datetime import datetime
+from functools import lru_cache
+
+import pytest
+
+from common.bulk_export import COMBINED_APACHE_RE, parse_combined
+from common.clock import SyntheticClock
+from common.linetemplate import WEB_FORMATS, ApacheLineTemplate, render_fields
+from common.loader import load_simulator_class
+from common.probes import parse_marker
+
+EVENTS = 500
+SERVER_RE = re.compile(r'^\[(Server-\d{2,})\] ')
+
+
+def make_simulator(web_format, seed=21):
+    """Simulador web sin salidas en el formato indicado"""
+    clock = SyntheticClock(datetime(2024, 1, 1), datetime(2024, 1, 2), EVENTS)
+    return load_simulator_class("web")(seed=seed, clock=clock, web_format=web_format, outputs=False)
+
+
+def parse_line(web_format, line):
+    """(servidor, campos como los de parse_combined) de una línea en cualquier formato"""
+    if web_format == "raw":
+        server = SERVER_RE.match(line)
+        assert server is not None
+        text = line[server.end():]
+        assert COMBINED_APACHE_RE.fullmatch(text)
+        return server.group(1), parse_combined(text)
+    doc = json.loads(line)
+    if web_format == "structured":
+        # El pipeline no ejecuta grok: los campos ya vienen separados y con sus tipos
+        server = doc.pop("server")
+        assert isinstance(doc["response"], int) and isinstance(doc["bytes"], int)
+        return server, doc
+    assert set(doc) == {"server", "message"}
+    message = doc["message"]
+    if web_format == "nginx":
+        # combined seguido de "$http_x_forwarded_for": el grok sin anclar coincide con el prefijo
+        assert message.endswith(' "-"')
+        message = message[:-4]
+    assert COMBINED_APACHE_RE.fullmatch(message)
+    return doc["server"], parse_combined(message)
+
+
+@lru_cache(maxsize=None)
+def batch_fields(web_format):
+    """Campos de cada línea de un lote con semilla fija (uno por formato)"""
+    lines = make_simulator(web_format).build_columns(EVENTS).to_bytes().decode('utf-8').splitlines()
+    assert len(lines) == EVENTS
+    return [parse_line(web_format, line) for line in lines]
+
+
+@pytest.mark.parametrize("web_format", WEB_FORMATS)
+def test_format_carries_the_same_fields_as_raw(web_format):
+    raw = batch_fields("raw")
+    assert batch_fields(web_format) == raw
+    sim = make_simulator("raw")
+    for server, fields in raw:
+        low, high = sim.status_bytes_ranges[fields["response"]]
+        assert low <= fields["bytes"] <= high
+        assert fields["httpversion"] == "1.1"
+        assert server.startswith("Server-")
+
+
+@pytest.mark.parametrize("web_format", WEB_FORMATS)
+def test_per_event_path_matches_format(web_format):
+    sim = make_simulator(web_format)
+    payload, status = sim.generate_apache_event(7)
+    server, fields = parse_line(web_format, payload.decode('utf-8')[:-1])
+    assert (server, fields["response"]) == ("Server-07", status)
+    # Las sondas pasan por encode_line y llegan en el mismo formato
+    marker = {"probe_run": "r1", "probe_seq": 4, "probe_sent_ms": 1704067200000}
+    probe = sim.encode_line(sim.build_probe_log(marker)).decode('utf-8')[:-1]
+    server, fields = parse_line(web_format, probe)
+    assert (server, fields["response"], fields["agent"]) == ("Server-00", 204, "sim-probe")
+    # El checker encuentra el marcador en el documento indexado (request tras el grok, o message)
+    assert parse_marker(fields) == ("r1", 4, 1704067200000)
+    document = {"message": probe} if web_format == "raw" else json.loads(probe)
+    assert parse_marker(document) == ("r1", 4, 1704067200000)
+
+
+def test_byte_renderer_matches_text_template():
+    sim = make_simulator("raw")
+    for n in (1, 37, EVENTS):
+        batch = sim.build_columns(n)
+        # Los fragmentos precodificados dan la misma salida que la plantilla % del schema
+        assert batch.to_bytes() == batch.to_text().encode('utf-8')
+
+
+@pytest.mark.parametrize("web_format", WEB_FORMATS)
+def test_render_fields_matches_template(web_format):
+    template = ApacheLineTemplate([3], ["10.0.0.1"], ["GET"], ["/api/users"], ["-"], ["curl/8.0"], fmt=web_format)
+    line = template.render(3, 0, "01/Jan/2024:00:00:00 +0000", 0, 0, 200, 512, 0, 0).decode('utf-8')
+    server, fields = parse_line(web_format, line[:-1])
+    assert render_fields(web_format, server, fields) == line
+
+
+@pytest.mark.parametrize("web_format", ["json", "nginx", "structured"])
+def test_json_formats_escape_text(web_format):
+    agent = 'Mozilla/5.0 (compatible; Señal\\bot)'
+    template = ApacheLineTemplate([1], ["10.0.0.2"], ["POST"], ["/búsqueda"], ["https://ejemplo.es/?q=a\\b"], [agent], fmt=web_format)
+    line = template.render(None, 0, "01/Jan/2024:00:00:00 +0000", 0, 0, 404, 10, 0, 0)
+    # Salida ASCII pura: los caracteres no ASCII y las barras van escapados
+    line.decode('ascii')
+    server, fields = parse_line(web_format, line.decode('ascii')[:-1])
+    assert server == "-"
+    assert (fields["agent"], fields["request"], fields["referrer"]) == (agent, "/búsqueda", "https://ejemplo.es/?q=a\\b")
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError, match="formato web desconocido"):
+        ApacheLineTemplate([1], ["10.0.0.1"], ["GET"], ["/"], ["-"], ["x"], fmt="clf")
@@ -0,0 +1,66 @@
+"""Métricas: cuantiles interpolados de los histogramas y exposición en formato Prometheus"""
+
+import urllib.error
+import urllib.request
+
+import pytest
+
+from common.metrics import Histogram, MetricsRegistry, start_metrics_server
+
+
+def test_quantile_interpolates_within_bucket():
+    histogram = Histogram(buckets=(1.0, 2.0, 4.0))
+    for _ in range(10):
+        histogram.observe(0.5)
+    # Todo en el primer bucket [0, 1]: el cuantil se reparte linealmente dentro de él
+    assert histogram.quantile(0.5) == pytest.approx(0.5)
+    assert histogram.quantile(0.9) == pytest.approx(0.9)
+    for _ in range(10):
+        histogram.observe(3.0)
+    assert histogram.quantile(0.5) == pytest.approx(1.0)
+    assert histogram.quantile(0.75) == pytest.approx(3.0)
+    assert histogram.quantile(1.0) == pytest.approx(4.0)
+
+
+def test_quantile_skips_empty_buckets_and_caps_at_last_bound():
+    histogram = Histogram(buckets=(1.0, 2.0, 4.0))
+    assert histogram.quantile(0.5) == 0.0
+    histogram.observe(3.5)
+    # Los buckets vacíos anteriores no cuentan como límite inferior con cuenta
+    assert histogram.quantile(0.5) == pytest.approx(3.0)
+    histogram.observe(100.0)
+    histogram.observe(100.0)
+    assert histogram.quantile(0.99) == 4.0
+
+
+def test_render_counters_histograms_and_collectors():
+    registry = MetricsRegistry()
+    registry.counter("sim_events_total", "Eventos", family="web").inc(5)
+    assert registry.counter("sim_events_total", "Eventos", family="web").value == 5
+    registry.histogram("sim_batch_seconds", "Segundos", buckets=(0.1, 1.0), family="db").observe(0.5)
+    registry.register_collector(lambda: [("sim_buffered", "gauge", "Pendientes", {"port": "5000"}, 7)])
+    lines = registry.render().splitlines()
+    assert "# TYPE sim_events_total counter" in lines
+    assert 'sim_events_total{family="web"} 5' in lines
+    assert 'sim_batch_seconds_bucket{family="db",le="0.1"} 0' in lines
+    assert 'sim_batch_seconds_bucket{family="db",le="1.0"} 1' in lines
+    assert 'sim_batch_seconds_bucket{family="db",le="+Inf"} 1' in lines
+    assert 'sim_batch_seconds_count{family="db"} 1' in lines
+    assert "# TYPE sim_buffered gauge" in lines
+    assert 'sim_buffered{port="5000"} 7' in lines
+
+
+def test_metrics_server():
+    registry = MetricsRegistry()
+    registry.counter("sim_events_total", "Eventos").inc()
+    server = start_metrics_server(0, host="127.0.0.1", registry=registry)
+    try:
+        url = "http://%s:%d" % server.server_address
+        with urllib.request.urlopen(url + "/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert b"sim_events_total 1" in response.read()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(url + "/otra", timeout=5)
+    finally:
+        server.shutdown()
+        server.server_close()
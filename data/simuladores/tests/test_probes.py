@@ -0,0 +1,128 @@
+"""Sondas: registro de emitidas, consulta de las más recientes y cuenta de perdidas, duplicadas y desordenadas"""
+
+import json
+import logging
+import time
+
+from common.probes import ProbeChecker, ProbeInjector, parse_marker, percentile, probe_path, read_ledger
+
+
+def marker(run, seq, age_ms=50):
+    """Documento indexado de una sonda de db/micro enviada hace age_ms"""
+    return {"probe_run": run, "probe_seq": seq, "probe_sent_ms": int(time.time() * 1000) - age_ms}
+
+
+def make_checker(monkeypatch, batches, **kwargs):
+    """Verificador cuyas búsquedas devuelven, por turno, cada lista de batches"""
+    checker = ProbeChecker("http://127.0.0.1:9200/", **kwargs)
+    results = iter(batches)
+    monkeypatch.setattr(checker, "search", lambda: next(results))
+    return checker
+
+
+def test_injector_writes_ledger(tmp_path):
+    injector = ProbeInjector("abc", "db", interval=60, worker_index=2, ledger_dir=str(tmp_path))
+    assert injector.run_id == "abc-db.w2"
+    for seq in (1, 2, 3):
+        assert injector.next_marker()["probe_seq"] == seq
+    assert json.loads((tmp_path / "abc-db.w2.json").read_text()) == {"probe_run": "abc-db.w2", "sent": 3}
+    assert [path.name for path in tmp_path.iterdir()] == ["abc-db.w2.json"]
+    assert not injector.due()
+
+
+def test_injector_reports_unwritable_ledger_once(tmp_path, caplog):
+    injector = ProbeInjector("abc", "web", ledger_dir=str(tmp_path / "no-existe"))
+    with caplog.at_level(logging.ERROR):
+        for _ in range(3):
+            injector.next_marker()
+    assert len([record for record in caplog.records if "registro de sondas" in record.message]) == 1
+
+
+def test_read_ledger_filters_and_skips_unreadable(tmp_path):
+    (tmp_path / "a-web.json").write_text(json.dumps({"probe_run": "a-web", "sent": 4}))
+    (tmp_path / "b-db.json").write_text(json.dumps({"probe_run": "b-db", "sent": 2}))
+    (tmp_path / "roto.json").write_text("{")
+    assert read_ledger(str(tmp_path)) == {"a-web": 4, "b-db": 2}
+    assert read_ledger(str(tmp_path), "a") == {"a-web": 4}
+
+
+def test_parse_marker_from_fields_and_path():
+    assert parse_marker(marker("r-db", 3, 0))[:2] == ("r-db", 3)
+    path = probe_path({"probe_run": "r-web", "probe_seq": 9, "probe_sent_ms": 1234})
+    assert parse_marker({"request": path}) == ("r-web", 9, 1234)
+    assert parse_marker({"message": f'1.2.3.4 - - [x] "GET {path} HTTP/1.1" 204 0'}) == ("r-web", 9, 1234)
+    assert parse_marker({"message": "GET /api/users"}) is None
+
+
+def test_query_asks_for_newest_probes_first():
+    query = ProbeChecker("http://es:9200", run_prefix="r1", max_hits=500)._query()
+    assert query["size"] == 500
+    assert query["sort"][0]["@timestamp"]["order"] == "desc"
+    should = query["query"]["bool"]["should"]
+    # La plantilla web mapea request como text sin .keyword y grok (ECS) deja la ruta en message
+    assert {"prefix": {"probe_run.keyword": "r1"}} in should
+    assert {"match_phrase_prefix": {"message": "/probe/r1"}} in should
+    assert "request.keyword" not in json.dumps(query)
+
+
+def test_standin_applies_the_query():
+    from probes.standin_es import matches
+
+    path = probe_path({"probe_run": "r1-web", "probe_seq": 1, "probe_sent_ms": 1})
+    docs = [
+        marker("r1-db", 1), marker("r2-db", 1),
+        {"message": f'[Server-00] 127.0.0.1 - - [x] "GET {path} HTTP/1.1" 204 0 "-" "sim-probe"'},
+        {"request": path, "response": 204},
+        {"message": path.replace("r1", "r2")}
+    ]
+    query = ProbeChecker("http://es:9200", run_prefix="r1")._query()["query"]
+    assert [doc for doc in docs if matches(doc, query)] == [docs[0], docs[2], docs[3]]
+    everything = ProbeChecker("http://es:9200")._query()["query"]
+    assert all(matches(doc, everything) for doc in docs)
+
+
+def test_poll_counts_duplicates_and_reordering(monkeypatch):
+    checker = make_checker(monkeypatch, [
+        [marker("r-db", 1), marker("r-db", 3), marker("r-db", 3)],
+        [marker("r-db", 1), marker("r-db", 3), marker("r-db", 2), marker("otra", 1)]
+    ], run_prefix="r")
+    assert checker.poll() == 2
+    assert checker.duplicates == 1
+    # La 2 aparece después de haber visto la 3 en una consulta anterior
+    assert checker.poll() == 1
+    assert checker.reordered == 1
+    summary = checker.summary()
+    assert (summary["runs"], summary["found"], summary["missing"]) == (1, 3, 0)
+    assert 0 <= summary["p50_ms"] <= summary["max_ms"]
+
+
+def test_ledger_counts_trailing_and_silent_runs(monkeypatch, tmp_path):
+    (tmp_path / "r-db.json").write_text(json.dumps({"probe_run": "r-db", "sent": 5}))
+    (tmp_path / "r-web.json").write_text(json.dumps({"probe_run": "r-web", "sent": 2}))
+    sources = [marker("r-db", 1), marker("r-db", 2)]
+    without_ledger = make_checker(monkeypatch, [sources])
+    without_ledger.poll()
+    assert without_ledger.summary()["missing"] == 0
+
+    checker = make_checker(monkeypatch, [sources], ledger_dir=str(tmp_path))
+    checker.poll()
+    summary = checker.summary()
+    # Faltan las sondas 3-5 de db y las dos de web, de la que no llegó ninguna
+    assert (summary["runs"], summary["found"], summary["missing"]) == (2, 2, 5)
+
+
+def test_poll_survives_search_errors(monkeypatch):
+    checker = ProbeChecker("http://127.0.0.1:9")
+
+    def fail():
+        raise OSError("sin conexión")
+
+    monkeypatch.setattr(checker, "search", fail)
+    assert checker.poll() == 0 and checker.errors == 1
+
+
+def test_percentile():
+    assert percentile([], 50) == 0.0
+    assert percentile([5, 1, 3, 2, 4], 50) == 3
+    assert percentile(list(range(1, 101)), 99) == 99
+    assert percentile([7], 99) == 7
@@ -0,0 +1,65 @@
+"""Muestreo con tablas alias: distribución, pesos nulos y equivalencia de sample y sample_n"""
+
+import random
+from collections import Counter
+
+import pytest
+
+from common.sampling import AliasTable, WeightedChoice, ZipfPool, zipf_weights
+
+SAMPLES = 200000
+
+
+@pytest.mark.parametrize("weights", [
+    [1, 1, 1, 1],
+    [0.7, 0.05, 0.03, 0.02, 0.05, 0.03, 0.02, 0.08, 0.015, 0.005, 0.005],
+    [80, 4, 6, 6, 2, 2],
+    zipf_weights(50)
+])
+def test_alias_table_matches_weights(weights):
+    table = AliasTable(weights)
+    counts = Counter(table.sample_n(SAMPLES, random.Random(1)))
+    total = sum(weights)
+    for index, weight in enumerate(weights):
+        expected = weight / total
+        # Cinco desvíos estándar de una binomial: no falla por azar con la semilla fija
+        tolerance = 5 * (expected * (1 - expected) / SAMPLES) ** 0.5 + 1e-9
+        assert abs(counts[index] / SAMPLES - expected) <= tolerance
+
+
+def test_zero_weight_is_never_sampled():
+    table = AliasTable([0, 3, 0, 1])
+    assert set(table.sample_n(10000, random.Random(2))) == {1, 3}
+
+
+@pytest.mark.parametrize("weights", [[], [0, 0]])
+def test_alias_table_rejects_empty_weights(weights):
+    with pytest.raises(ValueError):
+        AliasTable(weights)
+
+
+def test_sample_n_matches_repeated_sample():
+    table = AliasTable([5, 1, 2, 8, 0.5])
+    rng = random.Random(3)
+    single = [table.sample(rng) for _ in range(1000)]
+    assert table.sample_n(1000, random.Random(3)) == single
+
+
+def test_weighted_choice_values():
+    choice = WeightedChoice(["GET", "POST", "PUT"], [0, 1, 0])
+    assert choice.sample(random.Random(4)) == "POST"
+    assert set(choice.sample_n(100, random.Random(4))) == {"POST"}
+    # Sin pesos el reparto es uniforme
+    uniform = Counter(WeightedChoice("abcd").sample_n(40000, random.Random(5)))
+    assert set(uniform) == set("abcd")
+    assert max(uniform.values()) - min(uniform.values()) < 1000
+
+
+def test_zipf_pool_favors_first_values():
+    values = iter(range(100))
+    pool = ZipfPool(lambda: next(values), 100)
+    assert pool.values == list(range(100))
+    counts = Counter(pool.sample_n(50000, random.Random(6)))
+    assert counts[0] > counts[1] > counts[10] > counts[90]
+    weights = zipf_weights(10, exponent=1.5)
+    assert weights == sorted(weights, reverse=True) and weights[0] == 1.0
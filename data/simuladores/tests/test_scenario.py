@@ -0,0 +1,185 @@
+"""Escenarios: validación, carga de los archivos incluidos y coherencia por nivel entre los dos caminos de generación"""
+
+import hashlib
+import os
+import random
+import re
+from datetime import datetime
+
+import pytest
+
+from common.clock import SyntheticClock
+from common.loader import FAMILIES, load_simulator_class
+from common.scenario import MAX_HOSTS, SCENARIO_TABLES, FamilyScenario, load_scenario, scenario_eps, validate_scenario
+
+SCENARIOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scenarios")
+SCENARIO_FILES = ["default.toml", "large_fleet.toml"]
+EVENTS = 3000
+
+
+def make_simulator(family, scenario, seed=7):
+    """Simulador sin salidas, con semilla y reloj sintético"""
+    clock = SyntheticClock(datetime(2024, 1, 1), datetime(2024, 1, 2), EVENTS)
+    return load_simulator_class(family)(seed=seed, clock=clock, scenario=scenario, outputs=False)
+
+
+def db_shape(sim, record):
+    """Forma de un log de base de datos: campos, consulta y duración presentes y origen del mensaje"""
+    if record["message"] in sim.error_messages:
+        source = "error"
+    elif record["message"] in sim.warning_messages:
+        source = "warning"
+    else:
+        assert record["message"].startswith("Query: ")
+        source = "query"
+    return (record["db_type"], frozenset(record), record["query"] is None, record["duration"] is None, source)
+
+
+def micro_shape(sim, record):
+    """Forma de un log de microservicio: campos, bloque de error y origen del mensaje"""
+    if record["message"] in sim.error_messages:
+        source = "error"
+    elif record["message"] in sim.warning_messages:
+        source = "warning"
+    elif record["message"] == f"Debug info for {record['service']}":
+        source = "debug"
+    else:
+        assert record["message"] in sim.info_messages
+        source = "info"
+    return (frozenset(record), "error" in record, source)
+
+
+def shapes_by_level(records, shape):
+    """{nivel: {formas}} de una secuencia de logs"""
+    shapes = {}
+    for record in records:
+        shapes.setdefault(record["level"], set()).add(shape(record))
+    return shapes
+
+
+def db_events(sim, n):
+    """n logs del camino por evento (el del modo continuo)"""
+    for _ in range(n):
+        db_id = sim.rng.choice(sim.fleet_ids)
+        db_type = sim.db_types[0 if sim.rng.random() < sim.mysql_share else 1]
+        yield sim.build_db_log(db_id, db_type, sim.generate_log_level())
+
+
+def micro_events(sim, n):
+    """n logs del camino por evento (el del modo continuo)"""
+    for _ in range(n):
+        service_id = sim.rng.choice(sim.fleet_ids)
+        yield sim.build_instance_log(service_id, sim.rng.choice(sim.services))
+
+
+PATHS = {
+    "db": (db_shape, db_events),
+    "micro": (micro_shape, micro_events)
+}
+
+
+@pytest.mark.parametrize("name", SCENARIO_FILES)
+def test_scenario_files_load(name):
+    config = load_scenario(os.path.join(SCENARIOS, name))
+    for family in FAMILIES:
+        for table in SCENARIO_TABLES[family]:
+            if table in config.get(family, {}):
+                assert sum(weight for _, weight in config[family][table]) == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("name", SCENARIO_FILES)
+@pytest.mark.parametrize("family", sorted(PATHS))
+def test_levels_match_between_batch_and_event_paths(family, name):
+    config = load_scenario(os.path.join(SCENARIOS, name))
+    shape, events = PATHS[family]
+    batch_sim = make_simulator(family, config)
+    event_sim = make_simulator(family, config)
+
+    batch = shapes_by_level(batch_sim.build_columns(EVENTS).records(), lambda record: shape(batch_sim, record))
+    per_event = shapes_by_level(events(event_sim, EVENTS), lambda record: shape(event_sim, record))
+
+    # Los niveles salen de la tabla del escenario (o de la del simulador) y cada uno se ve igual por los dos caminos
+    assert set(batch) == set(per_event) == {level for level, _ in batch_sim.log_levels}
+    assert batch == per_event
+
+
+def test_default_scenario_is_byte_identical_to_no_scenario():
+    config = load_scenario(os.path.join(SCENARIOS, "default.toml"))
+    for family in FAMILIES:
+        digests = []
+        for scenario in (None, config):
+            sim = make_simulator(family, scenario)
+            digest = hashlib.sha256()
+            for _ in range(3):
+                digest.update(sim.build_columns(500).to_bytes())
+            digests.append(digest.hexdigest())
+        assert digests[0] == digests[1], family
+
+
+@pytest.mark.parametrize("config, message", [
+    ([], "debe ser una tabla"),
+    ({"mobile": {}}, "Secciones desconocidas: mobile"),
+    ({"logstash": {"host": "x", "port": 5000}}, "logstash solo admite host"),
+    ({"logstash": {"host": ""}}, "logstash.host"),
+    ({"web": []}, "web debe ser una tabla"),
+    ({"web": {"replicas": 3}}, "claves desconocidas: replicas"),
+    ({"web": {"port": 70000}}, "web.port debe ser un puerto"),
+    ({"db": {"http_port": True}}, "db.http_port debe ser un puerto"),
+    ({"micro": {"eps": -1}}, "micro.eps debe ser un número"),
+    ({"web": {"fleets": []}}, "web.fleets debe ser una lista"),
+    ({"web": {"fleets": ["edge"]}}, "web.fleets[0] debe ser una tabla"),
+    ({"web": {"fleets": [{"count": 2, "zone": "a"}]}}, "web.fleets[0]: claves desconocidas: zone"),
+    ({"web": {"fleets": [{"count": 0}]}}, "web.fleets[0].count debe ser un entero positivo"),
+    ({"web": {"fleets": [{"count": 2.5}]}}, "web.fleets[0].count"),
+    ({"web": {"fleets": [{"count": 1, "weight": 0}]}}, "web.fleets[0].weight debe ser un número mayor que 0"),
+    ({"web": {"fleets": [{"count": MAX_HOSTS}, {"count": 1}]}}, "superan el máximo"),
+    ({"web": {"fleets": [{"count": 1, "eps": 5}, {"count": 1}]}}, "en todas las flotas o en ninguna"),
+    ({"web": {"eps": 10, "fleets": [{"count": 1, "eps": 5}]}}, "se excluyen"),
+    ({"web": {"status_codes": {}}}, "web.status_codes debe ser una tabla"),
+    ({"web": {"status_codes": {"ok": 1}}}, "no es un código de estado HTTP"),
+    ({"web": {"status_codes": {"700": 1}}}, "700 no es un código de estado HTTP"),
+    ({"db": {"levels": {"DEBUG": 1}}}, "valor desconocido 'DEBUG'"),
+    ({"db": {"db_types": {"oracle": 1}}}, "valor desconocido 'oracle'"),
+    ({"micro": {"levels": {"INFO": "alto"}}}, "micro.levels.INFO debe ser un número"),
+    ({"micro": {"levels": {"INFO": 0, "ERROR": 0}}}, "al menos un peso positivo")
+])
+def test_invalid_scenarios_are_rejected(config, message):
+    with pytest.raises(ValueError, match=re.escape(message)):
+        validate_scenario(config)
+
+
+@pytest.mark.parametrize("name, content, message", [
+    ("escenario.ini", "", "extensión desconocida .ini"),
+    ("escenario", "", "extensión desconocida (ninguna)"),
+    ("escenario.toml", "[web]\nport = 0\n", "web.port"),
+    ("escenario.json", '{"db": {"levels": {"TRACE": 1}}}', "valor desconocido 'TRACE'")
+])
+def test_invalid_scenario_files_are_rejected(tmp_path, name, content, message):
+    path = tmp_path / name
+    path.write_text(content, encoding="utf-8")
+    with pytest.raises(ValueError, match=re.escape(message)):
+        load_scenario(str(path))
+
+
+def test_invalid_yaml_is_rejected(tmp_path):
+    pytest.importorskip("yaml")
+    path = tmp_path / "escenario.yaml"
+    path.write_text("web: [1, 2\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="YAML inválido"):
+        load_scenario(str(path))
+
+
+def test_large_fleet_weights_and_rate():
+    config = load_scenario(os.path.join(SCENARIOS, "large_fleet.toml"))
+    assert scenario_eps(config, "web") == pytest.approx(20 * 50 + 500 * 8 + 2000 * 0.5)
+    assert scenario_eps(config, "db") == pytest.approx(10 * 60 + 90 * 10)
+    web = FamilyScenario(config, "web", range(1, 51))
+    assert web.fleet_ids == list(range(1, 2521))
+    # Sin weight, el peso de cada host es su tasa
+    assert web.weight_of(range(1, 21)) == pytest.approx(20 * 50)
+    assert web.weight_of([21, 2520]) == pytest.approx(8.5)
+    # Los pesos de las tablas se normalizan (80 de 100)
+    assert dict(web.table("status_codes", []))[200] == pytest.approx(0.8)
+    sampled = web.host_sampler(web.fleet_ids)(20000, random.Random(1))
+    edge = sum(host_id <= 20 for host_id in sampled) / len(sampled)
+    assert edge == pytest.approx(1000 / 6000, abs=0.02)
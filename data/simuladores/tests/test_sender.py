@@ -0,0 +1,140 @@
+"""Sender TCP: entrega por lotes, sin bloquear el camino caliente con el destino caído, y reenvío del spool"""
+
+import socket
+import threading
+import time
+
+from common import sender as sender_module
+from common.sender import LogstashSender
+from common.spool import DiskSpool
+
+
+class Listener:
+    """Input tcp mínimo que acumula los bytes recibidos de cada conexión"""
+
+    def __init__(self, port=0):
+        self.server = socket.socket()
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(("127.0.0.1", port))
+        self.server.listen()
+        self.port = self.server.getsockname()[1]
+        self.received = bytearray()
+        self._lock = threading.Lock()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._read, args=(conn,), daemon=True).start()
+
+    def _read(self, conn):
+        with conn:
+            while True:
+                data = conn.recv(65536)
+                if not data:
+                    return
+                with self._lock:
+                    self.received += data
+
+    def lines(self, expected, timeout=5.0):
+        """Líneas recibidas, esperando hasta timeout a que lleguen expected"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                lines = bytes(self.received).splitlines()
+            if len(lines) >= expected:
+                return lines
+            time.sleep(0.02)
+        return lines
+
+    def close(self):
+        self.server.close()
+
+
+def free_port():
+    """Puerto local sin nadie escuchando"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def wait_for(condition, timeout=5.0):
+    """Espera hasta que condition() sea verdadera"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_delivers_batches_in_order():
+    listener = Listener()
+    sender = LogstashSender("127.0.0.1", listener.port, batch_bytes=4096, flush_interval=0.05)
+    try:
+        assert wait_for(lambda: sender.stats()["connected"])
+        for i in range(2000):
+            sender.send(f'{{"seq": {i}}}')
+        sender.send_bytes(b'{"seq": 2000}\n{"seq": 2001}\n', 2)
+    finally:
+        sender.close()
+    lines = listener.lines(2002)
+    listener.close()
+    assert lines == [b'{"seq": %d}' % i for i in range(2002)]
+    stats = sender.stats()
+    assert (stats["sent"], stats["failed"], stats["buffered"]) == (2002, 0, 0)
+
+
+def test_unreachable_destination_counts_failures_without_blocking():
+    sender = LogstashSender("127.0.0.1", free_port(), batch_bytes=1024, flush_interval=0.05, backoff_initial=0.05)
+    started = time.monotonic()
+    for _ in range(2000):
+        sender.send_bytes(b'{"x": 1}\n')
+    assert time.monotonic() - started < 1.0
+    sender.close()
+    stats = sender.stats()
+    assert stats["sent"] == 0 and stats["failed"] == 2000 and stats["errors"] >= 1
+
+
+def test_slow_connect_does_not_hold_the_send_lock(monkeypatch):
+    connecting = threading.Event()
+
+    def slow_connect(address, timeout=None):
+        # Un connect que tarda (SYN sin respuesta) y al final falla
+        connecting.set()
+        time.sleep(1.0)
+        raise OSError("timed out")
+
+    monkeypatch.setattr(sender_module.socket, "create_connection", slow_connect)
+    sender = LogstashSender("127.0.0.1", 9, batch_bytes=64, flush_interval=0.05, connect_timeout=1.0)
+    assert connecting.wait(2)
+    started = time.monotonic()
+    for _ in range(500):
+        sender.send_bytes(b'{"x": 1}\n')
+    sender.flush()
+    # Mientras el hilo de vaciado espera el connect, los envíos no se quedan esperando el lock
+    assert time.monotonic() - started < 0.5
+    sender.close()
+    assert sender.stats()["failed"] == 500
+
+
+def test_spool_replays_after_destination_recovers(tmp_path):
+    port = free_port()
+    spool = DiskSpool(str(tmp_path), replay_rate=100000)
+    sender = LogstashSender("127.0.0.1", port, batch_bytes=256, flush_interval=0.05, backoff_initial=0.05, backoff_max=0.2, spool=spool)
+    try:
+        for i in range(300):
+            sender.send(f'{{"seq": {i}}}')
+        sender.flush()
+        assert spool.stats()["depth"] == 300
+        listener = Listener(port)
+        lines = listener.lines(300)
+        assert wait_for(lambda: spool.stats()["depth"] == 0)
+    finally:
+        sender.close()
+    listener.close()
+    assert lines == [b'{"seq": %d}' % i for i in range(300)]
+    assert sender.stats()["failed"] == 0
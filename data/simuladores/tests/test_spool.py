@@ -0,0 +1,113 @@
+"""Spool en disco: cursor persistente entre ejecuciones y recuperación de lotes incompletos"""
+
+import os
+
+from common.spool import RECORD_HEADER, DiskSpool
+
+
+def drain(spool):
+    """Reenvía todo lo pendiente y devuelve los contenidos en orden"""
+    payloads = []
+    while True:
+        head = spool.peek()
+        if head is None:
+            return payloads
+        payloads.append(head[2])
+        spool.commit()
+
+
+def segments(directory):
+    """Segmentos presentes en el directorio, en orden"""
+    return sorted(name for name in os.listdir(directory) if name.endswith(".seg"))
+
+
+def test_replay_in_order(tmp_path):
+    spool = DiskSpool(str(tmp_path))
+    for i in range(5):
+        assert spool.append(f"lote {i}\n".encode(), 2)
+    assert spool.stats()["depth"] == 10
+    assert drain(spool) == [f"lote {i}\n".encode() for i in range(5)]
+    stats = spool.stats()
+    assert (stats["depth"], stats["bytes"], stats["spooled"], stats["replayed"]) == (0, 0, 10, 10)
+    spool.close()
+    # Sin nada pendiente no quedan segmentos ni cursor
+    assert os.listdir(tmp_path) == []
+
+
+def test_cursor_survives_restart(tmp_path):
+    spool = DiskSpool(str(tmp_path))
+    for i in range(4):
+        spool.append(f"lote {i}\n".encode(), 1)
+    assert spool.peek()[2] == b"lote 0\n"
+    spool.commit()
+    spool.commit()
+    spool.close()
+
+    spool = DiskSpool(str(tmp_path))
+    assert spool.stats()["depth"] == 2
+    spool.append(b"lote 4\n", 1)
+    assert drain(spool) == [b"lote 2\n", b"lote 3\n", b"lote 4\n"]
+    spool.close()
+
+
+def test_exhausted_segments_are_removed(tmp_path):
+    payload = b"x" * 100
+    spool = DiskSpool(str(tmp_path), segment_bytes=2 * (RECORD_HEADER.size + len(payload)))
+    for _ in range(6):
+        spool.append(payload, 1)
+    assert len(segments(tmp_path)) == 3
+    spool.peek()
+    for _ in range(3):
+        spool.commit()
+    # Los dos lotes del primer segmento ya se reenviaron: se borra al pasar al segundo
+    assert len(segments(tmp_path)) == 2
+    spool.close()
+
+    spool = DiskSpool(str(tmp_path))
+    assert spool.stats()["depth"] == 3
+    assert drain(spool) == [payload] * 3
+    spool.close()
+
+
+def test_truncated_record_is_dropped_on_recovery(tmp_path):
+    spool = DiskSpool(str(tmp_path))
+    spool.append(b"completo 1\n", 3)
+    spool.append(b"completo 2\n", 4)
+    spool.close()
+    (name,) = segments(tmp_path)
+    path = tmp_path / name
+    valid = path.stat().st_size
+    # Caída a mitad de una escritura: cabecera entera y solo parte del contenido
+    with open(path, 'ab') as f:
+        f.write(RECORD_HEADER.pack(0.0, 5, 100) + b"parcial")
+
+    spool = DiskSpool(str(tmp_path))
+    assert path.stat().st_size == valid
+    assert spool.stats()["depth"] == 7
+    spool.append(b"nuevo\n", 1)
+    assert drain(spool) == [b"completo 1\n", b"completo 2\n", b"nuevo\n"]
+    spool.close()
+
+
+def test_truncated_header_is_dropped_on_recovery(tmp_path):
+    spool = DiskSpool(str(tmp_path))
+    spool.append(b"completo\n", 1)
+    spool.close()
+    (name,) = segments(tmp_path)
+    with open(tmp_path / name, 'ab') as f:
+        f.write(RECORD_HEADER.pack(0.0, 1, 10)[:5])
+
+    spool = DiskSpool(str(tmp_path))
+    assert drain(spool) == [b"completo\n"]
+    spool.close()
+
+
+def test_full_spool_drops_new_batches(tmp_path):
+    payload = b"y" * 50
+    spool = DiskSpool(str(tmp_path), max_bytes=2 * (RECORD_HEADER.size + len(payload)))
+    assert spool.append(payload, 10)
+    assert spool.append(payload, 10)
+    assert not spool.append(payload, 10)
+    stats = spool.stats()
+    assert (stats["depth"], stats["dropped"]) == (20, 10)
+    spool.close()
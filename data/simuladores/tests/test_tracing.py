@@ -0,0 +1,69 @@
+"""Trazas: árboles de spans coherentes, con cada hijo dentro del intervalo de su padre"""
+
+import random
+from datetime import datetime
+
+from common.clock import SyntheticClock
+from common.loader import load_simulator_class
+from common.tracing import MAX_DEPTH, TraceGenerator
+
+# Resolución de los timestamps (a escala epoch un double tiene ~2e-7 s de precisión)
+EPSILON = 1e-6
+
+
+def check_trace(spans, end):
+    """Comprueba la estructura y los intervalos de una traza"""
+    root = spans[-1]
+    assert root.parent_id is None and root.depth == 0
+    assert abs(root.start + root.duration - end) < EPSILON
+    assert len({span.trace_id for span in spans}) == 1
+    by_id = {span.span_id: span for span in spans}
+    assert len(by_id) == len(spans)
+    position = {span.span_id: index for index, span in enumerate(spans)}
+    children = {}
+    for span in spans[:-1]:
+        parent = by_id[span.parent_id]
+        # Orden de finalización: el hijo antes que el padre, un nivel más abajo
+        assert position[span.span_id] < position[parent.span_id]
+        assert span.depth == parent.depth + 1 <= MAX_DEPTH
+        assert parent.start - EPSILON <= span.start
+        assert span.start + span.duration <= parent.start + parent.duration + EPSILON
+        children.setdefault(parent.span_id, []).append(span)
+    for siblings in children.values():
+        # Llamadas secuenciales: cada hermano empieza cuando termina el anterior
+        for previous, current in zip(siblings, siblings[1:]):
+            assert abs(previous.start + previous.duration - current.start) < EPSILON
+
+
+def test_generated_traces_nest_children_inside_parents():
+    generator = TraceGenerator(random.Random(4))
+    nested = 0
+    for index in range(500):
+        end = 1700000000.0 + index
+        spans = generator.generate(end)
+        check_trace(spans, end)
+        nested += len(spans) > 1
+    assert nested > 100
+
+
+def test_same_seed_same_traces():
+    first = [(span.span_id, span.start, span.duration) for span in TraceGenerator(random.Random(8)).generate(10.0)]
+    second = [(span.span_id, span.start, span.duration) for span in TraceGenerator(random.Random(8)).generate(10.0)]
+    assert first == second
+
+
+def test_micro_batch_timestamps_follow_spans():
+    clock = SyntheticClock(datetime(2024, 1, 1), datetime(2024, 1, 1, 0, 10), 2000)
+    sim = load_simulator_class("micro")(seed=3, clock=clock, outputs=False)
+    records = sim.build_columns(2000).records()
+    by_span = {record["span_id"]: record for record in records}
+    checked = 0
+    for record in records:
+        parent = by_span.get(record["parent_span_id"])
+        if parent is None:
+            continue
+        # El timestamp de un span es su inicio: nunca anterior al del padre
+        assert parent["timestamp"] <= record["timestamp"]
+        assert parent["trace_id"] == record["trace_id"]
+        checked += 1
+    assert checked > 500
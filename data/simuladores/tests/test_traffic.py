@@ -0,0 +1,154 @@
+"""Perfiles de tráfico: validación, incidentes con rampa, ciclo diario, ráfagas y errores forzados"""
+
+import copy
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+from common.clock import SyntheticClock
+from common.loader import load_simulator_class
+from common.traffic import TrafficModel, build_traffic, load_traffic, validate_traffic
+
+PROFILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "traffic", "db_storm.json")
+START = 1700000000.0
+
+
+def storm():
+    """Perfil db_storm.json sin ciclo diario ni ráfagas: solo el incidente"""
+    config = copy.deepcopy(load_traffic(PROFILE))
+    config.pop("diurnal")
+    config.pop("bursts")
+    return config
+
+
+@pytest.mark.parametrize("t, expected", [
+    (0, 0.0), (299, 0.0), (300, 0.0), (315, 0.5), (330, 1.0), (450, 1.0), (525, 0.5), (540, 0.0),
+    (3600 + 315, 0.5), (3600 + 400, 1.0), (3600 + 600, 0.0)
+])
+def test_incident_intensity_ramps_and_repeats(t, expected):
+    model = TrafficModel(storm(), "db", start=START)
+    assert model.intensity(model.incidents[0], t) == pytest.approx(expected)
+
+
+def test_rate_at_applies_incident_multiplier():
+    db = TrafficModel(storm(), "db", start=START)
+    assert db.rate_at(0) == 500
+    assert db.rate_at(315) == pytest.approx(500 * 1.25)
+    assert db.rate_at(400) == pytest.approx(750)
+    # Sin rate en el efecto la tasa de la familia no cambia
+    assert TrafficModel(storm(), "micro", start=START).rate_at(400) == 1500
+
+
+def test_errors_at_follows_incident():
+    web = TrafficModel(storm(), "web", start=START)
+    assert web.errors_at(START + 100) == (0.0, None)
+    rate, choice = web.errors_at(START + 400)
+    assert rate == pytest.approx(0.12)
+    # En web los errores son códigos de estado enteros
+    assert set(choice.values) == {503, 500, 504}
+    rate, _ = web.errors_at(START + 315)
+    assert rate == pytest.approx(0.06)
+    assert web.errors_at(START + 600) == (0.0, None)
+
+
+def test_overlapping_incidents_combine():
+    config = storm()
+    config["incidents"].append({
+        "name": "replica-lag", "start_s": 400, "duration_s": 60,
+        "effects": {"db": {"error_rate": 0.5, "errors": {"Replication lag": 1}}}
+    })
+    db = TrafficModel(validate_traffic(config), "db", start=START)
+    rate, choice = db.errors_at(START + 420)
+    assert rate == pytest.approx(1 - (1 - 0.7) * (1 - 0.5))
+    # El error sale del incidente más fuerte
+    assert "Too many connections" in choice.values
+
+
+def test_diurnal_cycle_peaks_at_local_hour():
+    config = {"eps": {"web": 100}, "diurnal": {"amplitude": 0.6, "peak_hour": 15}}
+    peak = time.mktime(datetime(2024, 3, 10, 15, 0).timetuple())
+    model = TrafficModel(config, "web", start=peak)
+    assert model.rate_at(0) == pytest.approx(160)
+    assert model.rate_at(12 * 3600) == pytest.approx(40)
+    assert model.rate_at(6 * 3600) == pytest.approx(100, abs=0.5)
+
+
+def test_bursts_are_repeatable_and_bounded():
+    config = {"seed": 3, "eps": {"micro": 100}, "bursts": {"per_hour": 30, "multiplier": [2, 4], "duration_s": [10, 60]}}
+    coarse = TrafficModel(config, "micro", start=START)
+    fine = TrafficModel(config, "micro", start=START)
+    # La secuencia no depende de cada cuánto se consulte
+    fine_rates = {}
+    for t in range(0, 7200):
+        fine_rates[t] = fine.rate_at(t)
+    coarse_rates = [coarse.rate_at(t) for t in range(0, 7200, 7)]
+    assert coarse_rates == [fine_rates[t] for t in range(0, 7200, 7)]
+    assert all(100 <= rate <= 400 for rate in fine_rates.values())
+    assert any(rate > 100 for rate in fine_rates.values())
+
+
+@pytest.mark.parametrize("config, message", [
+    ([], "objeto JSON"),
+    ({"eps": {}}, "necesita 'eps'"),
+    ({"eps": {"cache": 10}}, "Familia desconocida en eps: cache"),
+    ({"eps": {"web": -1}}, "eps.web"),
+    ({"eps": {"web": 1}, "diurnal": {"amplitude": 2}}, "diurnal.amplitude"),
+    ({"eps": {"web": 1}, "bursts": {"multiplier": [3, 2]}}, "bursts.multiplier"),
+    ({"eps": {"web": 1}, "incidents": [{"start_s": 0}]}, "necesita 'duration_s'"),
+    ({"eps": {"web": 1}, "incidents": [{"start_s": 0, "duration_s": 10, "ramp_s": 6}]}, "ramp_s"),
+    ({"eps": {"web": 1}, "incidents": [{"start_s": 0, "duration_s": 10, "every_s": 5}]}, "every_s"),
+    ({"eps": {"web": 1}, "incidents": [{"start_s": 0, "duration_s": 10, "effects": {"cache": {}}}]}, "familia desconocida"),
+    ({"eps": {"web": 1}, "incidents": [{"start_s": 0, "duration_s": 10, "effects": {"db": {"error_rate": 1.5}}}]}, "error_rate"),
+    ({"eps": {"web": 1}, "incidents": [{"start_s": 0, "duration_s": 10, "effects": {"db": {"errors": {"x": 0}}}}]}, "peso > 0")
+])
+def test_invalid_profiles_are_rejected(config, message):
+    with pytest.raises(ValueError, match=message):
+        validate_traffic(config)
+
+
+def test_build_traffic_without_profile():
+    assert build_traffic(None, "db") is None
+    assert build_traffic({"config": None}, "db") is None
+
+
+def test_db_batches_force_incident_errors():
+    # Un evento por segundo sintético durante los primeros 10 minutos del perfil
+    clock = SyntheticClock(START, START + 600, 600)
+    sim = load_simulator_class("db")(
+        seed=1, clock=clock, outputs=False, traffic_options={"config": storm(), "seed": 1}
+    )
+    errors = {}
+    for second in range(0, 600, 10):
+        errors[second] = sum(record["level"] == "ERROR" for record in sim.build_columns(10).records())
+
+    def share(first, last):
+        return sum(errors[second] for second in range(first, last, 10)) / (last - first)
+
+    # 15% de ERROR sin incidente; en pleno incidente 70% forzados más el 15% del resto
+    assert share(0, 300) < 0.3
+    assert share(330, 510) > 0.6
+    assert share(540, 600) < 0.35
+
+
+@pytest.mark.parametrize("family", ["web", "db"])
+def test_per_event_rounds_force_incident_errors(family):
+    # Reloj sintético llevado al pleno incidente (330-450s): el modo continuo (emit_round) también fuerza errores
+    clock = SyntheticClock(START, START + 600, 60000)
+    sim = load_simulator_class(family)(
+        seed=1, clock=clock, outputs=False, traffic_options={"config": storm(), "seed": 1}
+    )
+    clock.advance(34000)
+    emitted = []
+    if family == "web":
+        sim.emit_payload = lambda server_id, payload, status=200, echo=True: emitted.append(status in (503, 500, 504))
+        minimum = 0.1
+    else:
+        sim.emit = lambda db_id, log_data, echo=True: emitted.append(log_data["level"] == "ERROR")
+        minimum = 0.6
+    for _ in range(40):
+        sim.emit_round()
+    share = sum(emitted) / len(emitted)
+    # Sin incidente web tiene 2% de 5xx y db 15% de ERROR; el incidente fuerza 12% y 70%
+    assert share > minimum
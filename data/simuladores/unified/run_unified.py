@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Runner unificado de los simuladores de logs para ELK Stack
+Ejecuta las tres familias (web, db, micro) en un solo proceso asyncio, cada
+una con su tasa objetivo y su conexión TCP hacia Logstash
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from colorama import init, Fore, Style
+
+# Módulos compartidos (data/simuladores/common, montado en /app/common)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.async_runner import run_unified
+from common.encoders import ENCODERS
+from common.linetemplate import WEB_FORMATS
+from common.loader import FAMILIES, load_simulator_class
+from common.metrics import start_metrics_server
+from common.probes import new_run_id
+from common.scenario import FamilyScenario, load_scenario, scenario_eps
+from common.seeding import derive_seed
+from common.traffic import TrafficModel, load_traffic
+
+# Inicializar colorama para output colorizado
+init()
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def parse_args():
+    """Opciones del runner unificado; cada tasa toma su valor de una variable de entorno"""
+    parser = argparse.ArgumentParser(description="Runner unificado de los simuladores de logs")
+    parser.add_argument(
+        "--host", default=os.environ.get("LOGSTASH_HOST"),
+        help="Host de Logstash (por defecto el del escenario o elk-logstash)"
+    )
+    for family in FAMILIES:
+        parser.add_argument(
+            f"--{family}-eps", type=float, default=float(os.environ.get(f"SIM_{family.upper()}_EPS", 0)),
+            help=f"Tasa objetivo de la familia {family} en eventos/segundo (0 usa la del escenario o la desactiva)"
+        )
+        parser.add_argument(
+            f"--{family}-port", type=int,
+            help=f"Puerto TCP de Logstash para la familia {family} (por defecto el del escenario o {FAMILIES[family]['port']})"
+        )
+    parser.add_argument(
+        "--scenario", default=os.environ.get("SIM_SCENARIO"),
+        help="Escenario TOML/JSON/YAML: flotas, tasa por host, host y puertos de Logstash y tablas de probabilidad"
+    )
+    parser.add_argument(
+        "--profile", default=os.environ.get("SIM_PROFILE"),
+        help="Perfil de tráfico JSON: tasas base por familia, ciclo diario, ráfagas e incidentes (reemplaza a --*-eps)"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=os.environ.get("SIM_SEED"),
+        help="Semilla base; cada familia usa una sub-semilla derivada"
+    )
+    parser.add_argument(
+        "--report-interval", type=float, default=float(os.environ.get("SIM_REPORT_INTERVAL", 10)),
+        help="Segundos entre reportes de tasa lograda"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=float(os.environ.get("SIM_DURATION", 0)),
+        help="Segundos de ejecución (0 hasta Ctrl+C o SIGTERM)"
+    )
+    parser.add_argument(
+        "--probe-interval", type=float, default=float(os.environ.get("SIM_PROBE_INTERVAL", 0)),
+        help="Segundos entre eventos sonda de cada familia (0 desactiva)"
+    )
+    parser.add_argument(
+        "--probe-run", default=os.environ.get("SIM_PROBE_RUN"),
+        help="Id de corrida de las sondas (por defecto uno aleatorio)"
+    )
+    parser.add_argument(
+        "--probe-ledger", default=os.environ.get("SIM_PROBE_LEDGER"),
+        help="Directorio donde registrar cuántas sondas emitió cada familia (lo lee check_probes.py --ledger)"
+    )
+    parser.add_argument(
+        "--encoder", choices=ENCODERS, default=os.environ.get("SIM_ENCODER", "auto"),
+        help="Codificador JSON de los eventos que no salen de un lote columnar (sondas)"
+    )
+    parser.add_argument(
+        "--web-format", choices=WEB_FORMATS, default=os.environ.get("SIM_WEB_FORMAT", "raw"),
+        help="Formato de las líneas web: raw, json, nginx o structured (ver --web-format de los simuladores)"
+    )
+    parser.add_argument(
+        "--metrics-port", type=int, default=int(os.environ.get("SIM_METRICS_PORT", 0)),
+        help="Puerto HTTP para exponer /metrics en formato Prometheus (0 desactiva)"
+    )
+    parser.add_argument(
+        "--high-water-kb", type=int, default=1024,
+        help="KB en el buffer del socket a partir de los cuales se pausa la generación"
+    )
+    args = parser.parse_args()
+    args.scenario_config = None
+    if args.scenario:
+        try:
+            args.scenario_config = load_scenario(args.scenario)
+        except (OSError, ValueError) as e:
+            parser.error(f"escenario {args.scenario}: {e}")
+    args.host = args.host or (args.scenario_config or {}).get("logstash", {}).get("host") or "elk-logstash"
+    args.traffic = None
+    if args.profile:
+        try:
+            args.traffic = load_traffic(args.profile)
+        except (OSError, ValueError) as e:
+            parser.error(f"perfil de tráfico {args.profile}: {e}")
+        # Las tasas base salen del perfil
+        for family in FAMILIES:
+            setattr(args, f"{family}_eps", float(args.traffic["eps"].get(family, 0)))
+    else:
+        # Sin perfil, las familias sin tasa explícita toman la del escenario (suma de la tasa por host)
+        for family in FAMILIES:
+            if not getattr(args, f"{family}_eps"):
+                setattr(args, f"{family}_eps", scenario_eps(args.scenario_config, family))
+    if not any(getattr(args, f"{family}_eps") > 0 for family in FAMILIES):
+        parser.error("indica al menos una tasa: --web-eps, --db-eps, --micro-eps, --profile o eps en el escenario")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+    simulators, rates, ports, profiles = {}, {}, {}, {}
+    # Un mismo id de corrida para las tres familias (cada una agrega su sufijo)
+    probe_run = args.probe_run or new_run_id()
+    for family in FAMILIES:
+        eps = getattr(args, f"{family}_eps")
+        if eps <= 0:
+            continue
+        seed = derive_seed(args.seed, family) if args.seed is not None else None
+        simulator_class = load_simulator_class(family)
+        port = getattr(args, f"{family}_port") or FamilyScenario(args.scenario_config, family, ()).port
+        kwargs = {
+            "tcp_host": args.host, "tcp_port": port, "seed": seed, "scenario": args.scenario_config,
+            "probe_options": {"interval": args.probe_interval, "run_id": probe_run, "ledger": args.probe_ledger},
+            "encoder": args.encoder,
+            # Misma semilla de perfil en todas las familias: ráfagas e incidentes simultáneos
+            "traffic_options": {"config": args.traffic, "seed": args.seed},
+            # Solo el estado de generación: el runner entrega los lotes por su propia conexión asyncio
+            "outputs": False
+        }
+        if family == "web":
+            # El formato de línea solo existe en web: db y micro envían JSON a inputs json_lines
+            kwargs["web_format"] = args.web_format
+        simulators[family] = simulator_class(**kwargs)
+        rates[family] = eps
+        ports[family] = port
+
+    if args.traffic is not None:
+        # Un mismo t=0 para las tasas y los errores de todas las familias (construirlas lleva su tiempo)
+        started = time.time()
+        for family, simulator in simulators.items():
+            simulator.traffic.start = started
+            profiles[family] = TrafficModel(args.traffic, family, args.seed, started)
+
+    logging.info(f"{Fore.GREEN}Iniciando runner unificado: {', '.join(simulators)}{Style.RESET_ALL}")
+    asyncio.run(run_unified(
+        simulators, rates, args.host, ports=ports, report_interval=args.report_interval,
+        duration=args.duration or None, high_water=args.high_water_kb * 1024, profiles=profiles
+    ))
+    logging.info(f"{Fore.YELLOW}Runner unificado detenido{Style.RESET_ALL}")
@@ -4,15 +4,24 @@ Simulador de logs de servidores web para ELK Stack
 Genera logs realistas de Apache/Nginx cada 5-10 segundos
 """
 
-import random
 import time
 import json
-import socket
 import logging
-from datetime import datetime, timedelta
-from faker import Faker
+import os
+import sys
+from collections import Counter
+from datetime import datetime, timedelta, timezone
 from colorama import init, Fore, Style
 
+# Módulos compartidos (data/simuladores/common, montado en /app/common)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.batch import ID, INT, STR, EventBatch, text_schema
+from common.bulk_export import apache_to_datetime, parse_combined
+from common.linetemplate import ApacheLineTemplate, render_fields
+from common.probes import probe_path
+from common.sampling import WeightedChoice, ZipfPool
+from common.simulator import BaseSimulator, main
+
 # Inicializar colorama para output colorizado
 init()
 
@@ -22,12 +31,23 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-class WebLogSimulator:
-    def __init__(self):
-        self.fake = Faker()
-        self.log_file = "/app/logs/web-logs.log"
-        self.tcp_host = "elk-logstash"
-        self.tcp_port = 5000
+class WebLogSimulator(BaseSimulator):
+    FAMILY = "web"
+    LABEL = "Web"
+    LOG_FILE = "/app/logs/web-logs.log"
+    DESCRIPTION = "logs de servidores web"
+    # Flota simulada por defecto: 50 servidores web (un escenario la reemplaza)
+    FLEET_IDS = range(1, 51)
+
+    def __init__(self, tcp_host="elk-logstash", tcp_port=None, fleet_ids=None, clock=None, file_options=None, worker_index=None, seed=None, probe_options=None, encoder=None, traffic_options=None, ip_pool_size=5000, es_options=None, entity_options=None, console_options=None, spool_options=None, http_options=None, web_format="raw", scenario=None, outputs=True):
+        super().__init__(
+            tcp_host=tcp_host, tcp_port=tcp_port, fleet_ids=fleet_ids, clock=clock, file_options=file_options,
+            worker_index=worker_index, seed=seed, probe_options=probe_options, encoder=encoder,
+            traffic_options=traffic_options, es_options=es_options, console_options=console_options,
+            spool_options=spool_options, http_options=http_options, scenario=scenario, outputs=outputs
+        )
+        # Formato de las líneas hacia Logstash y el archivo (raw, json, nginx o structured)
+        self.web_format = web_format
         
         # Lista de métodos HTTP
         self.http_methods = ["GET", "POST", "PUT", "DELETE", "HEAD", "OPTIONS"]
@@ -55,6 +75,10 @@ class WebLogSimulator:
             (503, 0.005)  # 0.5% servicio no disponible
         ]
         
+        # Las tablas del escenario reemplazan a las de arriba (ya normalizadas a probabilidades)
+        self.status_codes = self.scenario.table("status_codes", self.status_codes)
+        self.http_methods = self.scenario.table("methods", [(method, 1.0) for method in self.http_methods])
+        
         # User agents realistas
         self.user_agents = [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
@@ -72,120 +96,206 @@ class WebLogSimulator:
             "https://www.facebook.com/", "https://www.twitter.com/", "https://www.linkedin.com/",
             "https://github.com/", "https://stackoverflow.com/"
         ]
+        
+        # Tablas precalculadas para la generación por lotes
+        # Pool de IPs cliente con reutilización tipo Zipf (pocos clientes muy activos)
+        # (los pools de entidades de --cardinality, entity_options, son de db y micro; web usa solo este)
+        self.ip_pool = ZipfPool(self.fake.ipv4, ip_pool_size)
+        self.status_choice = WeightedChoice(
+            [status for status, _ in self.status_codes],
+            [prob for _, prob in self.status_codes]
+        )
+        self.status_bytes_ranges = {status: self.bytes_range(status) for status, _ in self.status_codes}
+        self.method_choice = WeightedChoice(
+            [method for method, _ in self.http_methods],
+            [prob for _, prob in self.http_methods]
+        )
+        self.endpoint_choice = WeightedChoice(self.endpoints)
+        self.referrer_choice = WeightedChoice(self.referrers)
+        self.user_agent_choice = WeightedChoice(self.user_agents)
+        
+        # Schema de los lotes en columnas: los campos de texto se internan en el mismo
+        # orden que los valores de cada tabla alias, así el índice muestreado es el de la tabla
+        self.batch_schema = text_schema([
+            ("server_id", INT), ("ip", STR), ("timestamp", ID), ("method", STR), ("endpoint", STR),
+            ("status", INT), ("bytes", INT), ("referrer", STR), ("agent", STR)
+        ], '[Server-%02d] %s - - [%s] "%s %s HTTP/1.1" %d %d "%s" "%s"')
+        for name, choice in (("ip", self.ip_pool), ("method", self.method_choice), ("endpoint", self.endpoint_choice),
+                             ("referrer", self.referrer_choice), ("agent", self.user_agent_choice)):
+            table = self.batch_schema.table(name)
+            for value in choice.values:
+                table.intern(value)
+        # Fragmentos de línea precodificados a bytes: los lotes se ensamblan sin formatear texto
+        tables = self.batch_schema.tables
+        self.line_template = ApacheLineTemplate(
+            self.fleet_ids, tables["ip"].values, tables["method"].values, tables["endpoint"].values,
+            tables["referrer"].values, tables["agent"].values,
+            max_size=max(high for _, high in self.status_bytes_ranges.values()), fmt=web_format
+        )
+        self.batch_schema.renderer = self.line_template.render_columns
 
-    def generate_ip(self):
-        """Genera una IP realista"""
-        return self.fake.ipv4()
-
-    def generate_timestamp(self):
-        """Genera un timestamp en formato Apache"""
-        now = datetime.now()
-        return now.strftime("%d/%b/%Y:%H:%M:%S +0000")
-
-    def generate_status_code(self):
-        """Genera un código de estado HTTP basado en probabilidades"""
-        rand = random.random()
-        cumulative = 0
-        for status, prob in self.status_codes:
-            cumulative += prob
-            if rand <= cumulative:
-                return status
-        return 200
-
-    def generate_bytes(self, status_code):
-        """Genera el tamaño de respuesta en bytes"""
+    def bytes_range(self, status_code):
+        """Rango (mín, máx) del tamaño de respuesta según el código de estado"""
         if status_code >= 400:
-            return random.randint(0, 1000)  # Errores suelen ser más pequeños
+            return 0, 1000  # Errores suelen ser más pequeños
         elif status_code in [301, 302]:
-            return random.randint(0, 500)   # Redirecciones pequeñas
+            return 0, 500   # Redirecciones pequeñas
         else:
-            return random.randint(100, 50000)  # Respuestas normales
-
-    def generate_apache_log(self):
-        """Genera un log en formato Apache Common Log Format"""
-        ip = self.generate_ip()
-        timestamp = self.generate_timestamp()
-        method = random.choice(self.http_methods)
-        endpoint = random.choice(self.endpoints)
-        http_version = "1.1"
-        status = self.generate_status_code()
-        bytes_size = self.generate_bytes(status)
-        referrer = random.choice(self.referrers)
-        user_agent = random.choice(self.user_agents)
+            return 100, 50000  # Respuestas normales
+
+    def generate_web_log(self):
+        """Genera un log sin servidor en el formato web elegido (raw es el Apache combinado)"""
+        payload, _ = self.generate_apache_event()
+        return payload[:-1].decode('utf-8')
+
+    def generate_apache_event(self, server_id=None, forced=(0.0, None)):
+        """Genera una línea Apache ya codificada (con salto final) y su código de estado"""
+        rng = self.rng
+        status = self.status_choice.sample(rng)
+        # 5xx forzados por los incidentes del perfil de tráfico ((probabilidad, códigos) de forced_errors)
+        forced_rate, forced_errors = forced
+        if forced_rate and rng.random() < forced_rate:
+            status = forced_errors.sample(rng) if forced_errors else 503
+            if status not in self.status_bytes_ranges:
+                self.status_bytes_ranges[status] = self.bytes_range(status)
+        low, high = self.status_bytes_ranges[status]
+        payload = self.line_template.render(
+            server_id, self.ip_pool.table.sample(rng), self.clock.apache(),
+            self.method_choice.table.sample(rng), self.endpoint_choice.table.sample(rng),
+            status, low + int(rng.random() * (high - low + 1)),
+            self.referrer_choice.table.sample(rng), self.user_agent_choice.table.sample(rng)
+        )
+        return payload, status
+
+    def build_server_columns(self, n):
+        """Genera n logs Apache repartidos entre los servidores de la flota, en columnas"""
+        started = time.perf_counter()
+        rng = self.rng
+        server_ids = self.sample_hosts(n, rng)
+        batch = EventBatch(self.batch_schema, n, keys=server_ids)
         
-        # Formato Apache Common Log Format
-        log_line = f'{ip} - - [{timestamp}] "{method} {endpoint} HTTP/{http_version}" {status} {bytes_size} "{referrer}" "{user_agent}"'
+        apache_timestamp = self.clock.apache
+        statuses = self.status_choice.sample_n(n, rng)
+        # Tamaños respetando el rango de cada código de estado
+        ranges = self.status_bytes_ranges
+        rand = rng.random
         
-        return log_line
-
-    def send_to_logstash(self, log_line):
-        """Envía el log a Logstash vía TCP"""
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.connect((self.tcp_host, self.tcp_port))
-                s.sendall((log_line + '\n').encode('utf-8'))
-        except Exception as e:
-            logging.error(f"Error enviando a Logstash: {e}")
-
-    def write_to_file(self, log_line):
-        """Escribe el log a archivo"""
-        try:
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(log_line + '\n')
-        except Exception as e:
-            logging.error(f"Error escribiendo archivo: {e}")
-
-    def run(self):
-        """Ejecuta el simulador"""
-        logging.info(f"{Fore.GREEN}Iniciando simulador de logs de servidores web...{Style.RESET_ALL}")
-        logging.info(f"Enviando logs a {self.tcp_host}:{self.tcp_port}")
-        logging.info(f"Guardando logs en {self.log_file}")
+        # 5xx forzados por los incidentes del perfil de tráfico
+        forced_rate, forced_errors = self.forced_errors()
+        if forced_rate:
+            forced_values = forced_errors.values if forced_errors else [503]
+            for status in forced_values:
+                if status not in ranges:
+                    ranges[status] = self.bytes_range(status)
+            for i in range(n):
+                if rand() < forced_rate:
+                    statuses[i] = forced_errors.sample(rng) if forced_errors else 503
+        sizes = []
+        for status in statuses:
+            low, high = ranges[status]
+            sizes.append(low + int(rand() * (high - low + 1)))
         
-        server_count = 0
+        batch.columns.update(
+            server_id=server_ids,
+            ip=self.ip_pool.table.sample_n(n, rng),
+            timestamp=[apache_timestamp() for _ in range(n)],
+            method=self.method_choice.table.sample_n(n, rng),
+            endpoint=self.endpoint_choice.table.sample_n(n, rng),
+            status=statuses,
+            bytes=sizes,
+            referrer=self.referrer_choice.table.sample_n(n, rng),
+            agent=self.user_agent_choice.table.sample_n(n, rng)
+        )
+        self.generation.record(n, time.perf_counter() - started)
+        return batch
+
+    def render_line(self, log_line):
+        """Línea tal como se envía a Logstash y al archivo, en el formato web elegido"""
+        if self.web_format == "raw":
+            return log_line
+        # La línea lleva delante el servidor ([Server-NN]); la IP cliente nunca empieza por corchete
+        server = log_line[1:log_line.index("]")] if log_line.startswith("[") else None
+        fields = parse_combined(log_line)
+        if fields is None:
+            raise ValueError(f"línea Apache no reconocida: {log_line[:80]}")
+        return render_fields(self.web_format, server, fields)[:-1]
+
+    def encode_line(self, log_line):
+        """Bytes de la línea con salto final, compartidos por todos los destinos"""
+        return (self.render_line(log_line) + '\n').encode('utf-8')
+
+    def build_probe_log(self, marker):
+        """Log Apache marcador con la corrida, la secuencia y el instante de envío en la ruta"""
+        return f'[Server-00] 127.0.0.1 - - [{self.clock.apache()}] "GET {probe_path(marker)} HTTP/1.1" 204 0 "-" "sim-probe"'
+
+    def emit(self, server_id, log_line, echo=True):
+        """Envía el log a Logstash, lo escribe a archivo y opcionalmente a consola"""
+        # Serializar una sola vez y reutilizar los bytes en ambos destinos
+        fields = parse_combined(log_line) if echo else None
+        self.emit_payload(server_id, self.encode_line(log_line), fields["response"] if fields else 200, echo)
+
+    def emit_payload(self, server_id, payload, status=200, echo=True):
+        """Entrega una línea ya codificada; el código de estado solo da la categoría y el color del eco"""
+        # Enviar a Logstash (o indexar el documento equivalente directamente en Elasticsearch) y escribir a archivo
+        self.deliver(payload, payload[:-1].decode('utf-8'))
+        
+        # Eco muestreado: la clase del código de estado da la categoría y el color
+        if echo and self.console.sample(f"{status // 100}xx"):
+            self.echo(server_id, payload, status)
+
+    def echo(self, server_id, payload, status):
+        """Escribe el inicio de la línea en consola con el color de la clase del código de estado"""
+        if status < 300:
+            color = Fore.GREEN
+        elif status < 400:
+            color = Fore.YELLOW
+        elif status < 500:
+            color = Fore.RED
+        else:
+            color = Fore.MAGENTA
         
-        while True:
-            try:
-                # Generar logs para múltiples servidores (simulando 50 servidores)
-                for server_id in range(1, 51):
-                    server_count += 1
-                    
-                    # Generar 1-3 logs por servidor
-                    for _ in range(random.randint(1, 3)):
-                        log_line = self.generate_apache_log()
-                        
-                        # Agregar identificador del servidor
-                        log_line = f"[Server-{server_id:02d}] {log_line}"
-                        
-                        # Enviar a Logstash
-                        self.send_to_logstash(log_line)
-                        
-                        # Escribir a archivo
-                        self.write_to_file(log_line)
-                        
-                        # Log de consola colorizado
-                        status = log_line.split('"')[1].split()[1] if '"' in log_line else "200"
-                        if status.startswith('2'):
-                            color = Fore.GREEN
-                        elif status.startswith('3'):
-                            color = Fore.YELLOW
-                        elif status.startswith('4'):
-                            color = Fore.RED
-                        else:
-                            color = Fore.MAGENTA
-                        
-                        print(f"{color}[{datetime.now().strftime('%H:%M:%S')}] Server-{server_id:02d} - {log_line[:100]}...{Style.RESET_ALL}")
-                
-                # Esperar entre 5-10 segundos
-                sleep_time = random.uniform(5, 10)
-                time.sleep(sleep_time)
-                
-            except KeyboardInterrupt:
-                logging.info(f"{Fore.YELLOW}Deteniendo simulador...{Style.RESET_ALL}")
-                break
-            except Exception as e:
-                logging.error(f"Error en el simulador: {e}")
-                time.sleep(5)
+        line = payload[:100].decode('utf-8', errors='replace')
+        self.console.write(f"{color}[{self.clock.hms()}] Server-{server_id:02d} - {line}...{Style.RESET_ALL}")
+
+    def batch_categories(self, batch):
+        """Eventos del lote por clase del código de estado (2xx, 4xx...)"""
+        categories = {}
+        for status, count in Counter(batch.columns["status"]).items():
+            category = f"{status // 100}xx"
+            categories[category] = categories.get(category, 0) + count
+        return categories
+
+    def echo_batch(self, batch, payload):
+        """Muestra en consola el primer evento del lote"""
+        self.echo(batch.keys[0], payload[:payload.index(b"\n") + 1], batch.columns["status"][0])
+
+    def emit_round(self):
+        """Genera y emite 1-3 logs por servidor de la flota (una ronda del modo continuo)"""
+        forced = self.forced_errors()
+        for server_id in self.fleet_ids:
+            # Generar 1-3 logs por servidor
+            for _ in range(self.rng.randint(1, 3)):
+                started = time.perf_counter()
+                payload, status = self.generate_apache_event(server_id, forced)
+                self.generation.record(1, time.perf_counter() - started)
+                self.emit_payload(server_id, payload, status)
+
+    def bulk_document(self, log_line):
+        """Documento equivalente al que indexa Logstash tras el grok COMBINEDAPACHELOG"""
+        doc = parse_combined(log_line) or {}
+        moment = apache_to_datetime(doc["timestamp"]) if doc else datetime.now(timezone.utc)
+        doc.update({
+            "message": log_line,
+            "type": "web-logs",
+            "log_source": "web-server",
+            "environment": "production"
+        })
+        return moment, doc
+
+    @classmethod
+    def family_kwargs(cls, args):
+        """Formato de las líneas hacia Logstash y el archivo (solo aplica a web)"""
+        return {"web_format": args.web_format}
 
 if __name__ == "__main__":
-    simulator = WebLogSimulator()
-    simulator.run()
+    main(WebLogSimulator)